@@ -0,0 +1,121 @@
+import numpy as np
+from copy import copy
+import scipy.linalg as sc_la
+import scipy.sparse as sc_sparse
+import scipy.sparse.linalg as sc_sparse_la
+
+class BasisFactorisation():
+
+    """
+    Maintains the factorisation of a basis matrix, A_B, as columns are replaced.
+
+    The basis is LU factorised once and each pivot appends an eta vector
+    (the product form of the inverse) instead of refactorising. Solves are
+    done with the LU factors and then the eta file, so a pivot costs O(m^2)
+    rather than O(m^3). The basis is refactorised from scratch after a fixed
+    number of updates, or sooner if the pivot element is too small to give
+    a stable update.
+
+    Sparse basis matrices are factorised with SuperLU instead of a dense LU.
+    If no basis matrix is given the basis is the identity (all slack
+    variables basic) and nothing is factorised.
+
+    The LU factors may be of the basis with its columns in a different order,
+    as when they come from a FactorisationCache, in which case column_order
+    maps each column of the basis to its column in the factorised matrix.
+    """
+
+    refactorisation_interval = 50
+    stability_tolerance = 0.000000001
+
+    def __init__(self, basis_matrix=None):
+        self.column_order = None
+        if basis_matrix is None:
+            self.set_identity()
+        else:
+            self.refactorise(basis_matrix)
+
+    def set_identity(self):
+        self.LU = None
+        self.eta_indices = []
+        self.eta_columns = []
+
+    def refactorise(self, basis_matrix):
+        self.sparse = sc_sparse.issparse(basis_matrix)
+        if self.sparse:
+            self.LU = sc_sparse_la.splu(sc_sparse.csc_matrix(basis_matrix))
+        else:
+            self.LU, self.permute = sc_la.lu_factor(basis_matrix)
+        self.eta_indices = []
+        self.eta_columns = []
+
+    def set_column_order(self, column_order):
+        "Column i of the basis is column column_order[i] of the factorised matrix"
+        self.column_order = column_order
+
+    def lu_solve(self, vector, trans=0):
+        vector = np.asarray(vector, dtype=float)
+        if trans and self.column_order is not None:
+            vector = self.get_factorised_order(vector)
+        if self.LU is None:
+            solution = np.copy(vector)
+        elif self.sparse:
+            solution = self.LU.solve(vector, trans=("N", "T")[trans])
+        else:
+            solution = sc_la.lu_solve((self.LU, self.permute), vector, trans=trans)
+        if not trans and self.column_order is not None:
+            solution = solution[self.column_order]
+        return solution
+
+    def get_factorised_order(self, vector):
+        "Reorders the entries of a vector indexed by basis column to the factorised column order"
+        factorised_vector = np.empty_like(vector)
+        factorised_vector[self.column_order] = vector
+        return factorised_vector
+
+    def can_update(self, index, pivot_column):
+        update_count_valid = (len(self.eta_indices) < self.refactorisation_interval)
+        pivot_value_valid = (abs(pivot_column[index])
+                             > self.stability_tolerance * np.max(abs(pivot_column)))
+        return update_count_valid and pivot_value_valid
+
+    def update(self, index, pivot_column):
+        """
+        Records that column "index" of the basis has been replaced by a column
+        a_q, where pivot_column = A_B^{-1} a_q was computed with the old basis
+        """
+        self.eta_indices.append(index)
+        self.eta_columns.append(np.copy(pivot_column))
+
+    def solve(self, vector):
+        "Returns A_B^{-1} vector. Also accepts a matrix of right hand sides"
+        solution = self.lu_solve(vector)
+        for index, eta_column in zip(self.eta_indices, self.eta_columns):
+            solution = self.apply_eta_inverse(solution, index, eta_column)
+        return solution
+
+    def apply_eta_inverse(self, solution, index, eta_column):
+        pivot_entry = solution[index] / eta_column[index]
+        solution = solution - np.multiply.outer(eta_column, pivot_entry)
+        solution[index] = pivot_entry
+        return solution
+
+    def solve_transpose(self, vector):
+        "Returns A_B^{-T} vector. Also accepts a matrix of right hand sides"
+        solution = np.array(vector, dtype=float)
+        for index, eta_column in zip(reversed(self.eta_indices), reversed(self.eta_columns)):
+            solution = self.apply_eta_inverse_transpose(solution, index, eta_column)
+        solution = self.lu_solve(solution, trans=1)
+        return solution
+
+    def apply_eta_inverse_transpose(self, solution, index, eta_column):
+        off_pivot_sum = np.dot(eta_column, solution) - eta_column[index] * solution[index]
+        solution[index] = (solution[index] - off_pivot_sum) / eta_column[index]
+        return solution
+
+    def copy(self):
+        "Returns a copy that shares the LU factors, which are never modified in place"
+        factorisation = copy(self)
+        factorisation.eta_indices = list(self.eta_indices)
+        factorisation.eta_columns = list(self.eta_columns)
+        return factorisation
@@ -0,0 +1,111 @@
+import importlib.util
+import os
+import sys
+import numpy as np
+import scipy as sc
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from SolveResult import SolveResult
+
+def load_quadratic_simplex_module():
+    "The file name contains a dot so it cannot be imported with an import statement"
+    module_name = "QuadraticSimplexV1_0"
+    if module_name not in sys.modules:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "QuadraticSimplexV1.0.py")
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
+
+QuadraticSimplex = load_quadratic_simplex_module().QuadraticSimplex
+
+
+class BatchSolve():
+
+    """
+    Solves many independent problems over a pool of processes.
+
+    Problems are given as an iterable of (constraint_matrix, constraint_vector)
+    pairs and are sent to the workers in chunks, with only the arrays being
+    pickled. Results are yielded as SolveResult objects in the order the
+    chunks complete, so the index attribute should be used to match them to
+    the problems. At most a few chunks per worker are in flight at a time,
+    so the iterable can be a generator of more problems than fit in memory.
+
+    Options are set as class attributes of QuadraticSimplex in the workers,
+    so any option_* attribute can be given. Plotting and printing are turned
+    off unless the options say otherwise. An exception raised while solving
+    a problem is recorded in its result rather than stopping the batch.
+
+    As with any process pool, the calling script should guard its entry
+    point with if __name__ == "__main__".
+    """
+
+    chunk_size = 8
+    chunks_per_worker = 2
+
+    def __init__(self, problems, options=None, worker_count=None):
+        self.problems = problems
+        self.set_options(options)
+        self.worker_count = worker_count or os.cpu_count()
+
+    def set_options(self, options):
+        self.options = {"option_plot_state": False,
+                        "option_output": False}
+        if options is not None:
+            self.options.update(options)
+
+    def solve(self):
+        with ProcessPoolExecutor(max_workers=self.worker_count) as executor:
+            chunks = self.get_chunks()
+            futures = set()
+            self.submit_chunks(executor, chunks, futures)
+            while len(futures) > 0:
+                completed, futures = wait(futures, return_when=FIRST_COMPLETED)
+                self.submit_chunks(executor, chunks, futures)
+                for future in completed:
+                    yield from future.result()
+
+    def submit_chunks(self, executor, chunks, futures):
+        maximum_futures = self.worker_count * self.chunks_per_worker
+        while len(futures) < maximum_futures:
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            futures.add(executor.submit(solve_chunk, chunk, self.options))
+
+    def get_chunks(self):
+        chunk = []
+        for index, (constraint_matrix, constraint_vector) in enumerate(self.problems):
+            chunk.append((index,
+                          get_compact_matrix(constraint_matrix),
+                          np.asarray(constraint_vector, dtype=float)))
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if len(chunk) > 0:
+            yield chunk
+
+
+def get_compact_matrix(constraint_matrix):
+    if sc.sparse.issparse(constraint_matrix):
+        return sc.sparse.csc_matrix(constraint_matrix)
+    return np.ascontiguousarray(constraint_matrix, dtype=float)
+
+def solve_chunk(chunk, options):
+    for name, value in options.items():
+        setattr(QuadraticSimplex, name, value)
+    results = [solve_problem(index, constraint_matrix, constraint_vector)
+               for index, constraint_matrix, constraint_vector in chunk]
+    return results
+
+def solve_problem(index, constraint_matrix, constraint_vector):
+    problem = None
+    try:
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        return SolveResult.from_problem(index, problem)
+    except Exception as error:
+        iteration_count = 0 if problem is None else problem.iteration_count
+        return SolveResult.from_error(index, error, iteration_count)
@@ -0,0 +1,137 @@
+import numpy as np
+import hashlib
+import threading
+from collections import OrderedDict
+from BasisFactorisation import BasisFactorisation
+
+class FactorisationCache():
+
+    """
+    Stores basis factorisations by their set of basic variables, so that
+    problems with the same constraint matrix do not factorise a basis that has
+    been factorised before. This is shared by all the tableaux of a problem and
+    can be shared by problems that only differ in their constraint vector.
+
+    The key is the sorted basic variables, so tableaux that reach the same
+    vertex with their basic variables in a different order share an entry.
+    Each basis is factorised with its columns in sorted order, and the copy
+    handed out is given the column order of the basis that asked for it.
+    The values A_B^{-1} b are also stored for each constraint vector b.
+
+    Both stores are bounded by maximum_size and evict the least recently used
+    entry. hits and misses count factorisation lookups, and value_hits and
+    value_misses count value lookups. Lookups, stores and the counts are
+    made under a lock, so a cache can be used from several threads. A
+    missing factorisation is made outside the lock, so two threads can both
+    factorise the same basis, and the second one stored is kept.
+
+    Stored factorisations have no eta updates and copies are handed out, so
+    updating a factorisation never changes the one in the cache.
+    """
+
+    maximum_size = 1000
+
+    def __init__(self, maximum_size=None):
+        if maximum_size is not None:
+            self.maximum_size = maximum_size
+        self.factorisations = OrderedDict()
+        self.values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.value_hits = 0
+        self.value_misses = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        "Locks can not be pickled, so a copy sent to another process gets its own"
+        state = dict(self.__dict__)
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def get_key(self, basic_variables):
+        return np.sort(np.asarray(basic_variables)).tobytes()
+
+    def get_vector_key(self, vector):
+        "A short key for a constraint vector, which is computed once per vector"
+        vector_bytes = np.ascontiguousarray(vector, dtype=float).tobytes()
+        return hashlib.blake2b(vector_bytes, digest_size=16).digest()
+
+    def contains(self, basic_variables):
+        with self.lock:
+            return self.get_key(basic_variables) in self.factorisations
+
+    def get_factorisation(self, basic_variables, get_basis_matrix):
+        """
+        get_basis_matrix(variables) is only called if the basis has not been
+        factorised before, and is given the basic variables in sorted order
+        """
+        basic_variables = np.asarray(basic_variables)
+        sorted_variables = np.sort(basic_variables)
+        key = sorted_variables.tobytes()
+        factorisation = self.get_stored(self.factorisations, key)
+        if factorisation is None:
+            factorisation = BasisFactorisation(get_basis_matrix(sorted_variables))
+            self.store(self.factorisations, key, factorisation)
+        factorisation = factorisation.copy()
+        factorisation.set_column_order(self.get_column_order(basic_variables, sorted_variables))
+        return factorisation
+
+    def get_values(self, basic_variables, vector_key, factorisation, vector):
+        "Returns A_B^{-1} vector, reusing the values for the same basis set and vector"
+        basic_variables = np.asarray(basic_variables)
+        sorted_variables = np.sort(basic_variables)
+        key = (sorted_variables.tobytes(), vector_key)
+        column_order = np.searchsorted(sorted_variables, basic_variables)
+        sorted_values = self.get_stored(self.values, key)
+        if sorted_values is None:
+            values = factorisation.solve(vector)
+            sorted_values = np.empty_like(values)
+            sorted_values[column_order] = values
+            self.store(self.values, key, sorted_values)
+            return values
+        return sorted_values[column_order]
+
+    def get_column_order(self, basic_variables, sorted_variables):
+        "Column i of the basis is column column_order[i] of the sorted basis, or None if they match"
+        column_order = np.searchsorted(sorted_variables, basic_variables)
+        if np.array_equal(column_order, np.arange(len(column_order))):
+            return None
+        return column_order
+
+    def get_stored(self, store, key):
+        "Returns the stored value, or None, and counts the lookup as a hit or a miss"
+        with self.lock:
+            value = store.get(key)
+            if value is not None:
+                store.move_to_end(key)
+            self.count_lookup(store, value is not None)
+            return value
+
+    def count_lookup(self, store, hit):
+        if store is self.factorisations:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        elif hit:
+            self.value_hits += 1
+        else:
+            self.value_misses += 1
+
+    def store(self, store, key, value):
+        with self.lock:
+            store[key] = value
+            store.move_to_end(key)
+            while len(store) > self.maximum_size:
+                store.popitem(last=False)
+
+    def __str__(self):
+        string = (f"Factorisations: {len(self.factorisations)} stored, "
+                  f"{self.hits} hits, {self.misses} misses\n"
+                  f"Values: {len(self.values)} stored, "
+                  f"{self.value_hits} hits, {self.value_misses} misses\n")
+        return string
@@ -25,7 +25,7 @@ class PlotState():
             self.add_spatial_constraints()
 
     def set_constraint_objects(self):
-        constraint_data = zip(self.problem.constraint_matrix,
+        constraint_data = zip(self.problem.get_dense_constraint_matrix(),
                               self.problem.constraint_vector)
         self.constraint_objects = [Constraint(self, constraint, value)
                                    for constraint, value in constraint_data]
@@ -70,8 +70,8 @@ class PlotState():
         plt.gca().add_artist(profit_function)
 
     def draw_linear_profit_function(self):
-        potential_positions = [tableau.partial_position
-                               for tableau in self.problem.tableaux]
+        potential_positions = [tableau.partial_position for tableau in self.problem.tableaux
+                               if hasattr(tableau, "partial_position")]
         x_values = [position[0] for position in potential_positions]
         y_values = [position[1] for position in potential_positions]
         plt.plot(x_values, y_values, '-k')
@@ -11,7 +11,7 @@ class PlotState3D():
         self.create_base_polytope()
 
     def create_base_polytope(self):
-        self.matrix = np.concatenate((self.problem.constraint_matrix,
+        self.matrix = np.concatenate((self.problem.get_dense_constraint_matrix(),
                                       -1 * np.eye(3)))
         self.limits = np.concatenate((self.problem.constraint_vector,
                                       np.zeros(3)))
@@ -92,4 +92,5 @@ class PlotState3D():
 
     def draw_nodes(self):
         for tableau in self.problem.tableaux:
-            plt.plot(*tableau.partial_position, "*k", markersize=10)
+            if hasattr(tableau, "partial_position"):
+                plt.plot(*tableau.partial_position, "*k", markersize=10)
@@ -0,0 +1,162 @@
+import numpy as np
+import scipy as sc
+
+class Presolve():
+
+    """
+    Removes constraints that cannot affect the solution before any tableaux
+    are built, and maps results back to the original constraints.
+
+    Each row is scaled so that its largest coefficient has absolute value 1.
+    The following rows are then removed:
+    - all zero rows, which are always satisfied as b must be non-negative
+    - rows that are a positive multiple of another row, keeping the tightest
+    - rows that cannot be tight anywhere in the box 0 <= x <= u, where u is
+      the upper bound on each variable implied by the rows with no negative
+      coefficients. The rows that give these bounds are never removed.
+
+    constraint_matrix and constraint_vector are the scaled remaining rows, and
+    kept_rows gives the original index of each of them. The slack variables of
+    removed rows are basic in any basis of the original problem, which is how
+    get_original_basis reports a basis of the reduced problem.
+    """
+
+    duplicate_decimals = 9
+    redundancy_tolerance = 0.000000001
+
+    def __init__(self, constraint_matrix, constraint_vector):
+        self.original_constraint_matrix = constraint_matrix
+        self.original_constraint_vector = np.asarray(constraint_vector, dtype=float)
+        self.row_count, self.space_dimensions = constraint_matrix.shape
+        self.sparse = sc.sparse.issparse(constraint_matrix)
+        self.set_scaled_rows()
+        self.set_zero_rows()
+        self.set_duplicate_rows()
+        self.set_redundant_rows()
+        self.set_reduced_problem()
+
+    def set_scaled_rows(self):
+        if self.sparse:
+            matrix = sc.sparse.csr_matrix(self.original_constraint_matrix, dtype=float)
+            self.row_scales = abs(matrix).max(axis=1).toarray().ravel()
+        else:
+            matrix = np.asarray(self.original_constraint_matrix, dtype=float)
+            self.row_scales = np.max(abs(matrix), axis=1)
+        scale_divisors = np.where(self.row_scales > 0, self.row_scales, 1)
+        if self.sparse:
+            self.scaled_matrix = sc.sparse.diags(1 / scale_divisors) @ matrix
+        else:
+            self.scaled_matrix = matrix / scale_divisors[:, np.newaxis]
+        self.scaled_vector = self.original_constraint_vector / scale_divisors
+
+    def set_zero_rows(self):
+        self.zero_rows = np.flatnonzero(self.row_scales == 0)
+        if np.any(self.original_constraint_vector[self.zero_rows] < 0):
+            raise Exception("A constraint with no coefficients has a negative bound so the problem is infeasible")
+
+    def set_duplicate_rows(self):
+        "Rows with the same scaled coefficients are duplicates, and the one with the smallest bound is kept"
+        candidate_rows = np.flatnonzero(self.row_scales > 0)
+        candidate_rows = candidate_rows[np.argsort(self.scaled_vector[candidate_rows], kind="stable")]
+        row_labels = self.get_row_labels(candidate_rows)
+        unique_labels, first_indices = np.unique(row_labels, return_index=True)
+        duplicate_filter = np.ones(len(candidate_rows), dtype=bool)
+        duplicate_filter[first_indices] = False
+        self.duplicate_rows = np.sort(candidate_rows[duplicate_filter])
+
+    def get_row_labels(self, rows):
+        "Returns a label for each row that is equal for rows with equal rounded coefficients"
+        if self.sparse:
+            matrix = self.scaled_matrix[rows]
+            matrix.sort_indices()
+            row_keys = {}
+            row_labels = np.zeros(len(rows), dtype=int)
+            for index in range(len(rows)):
+                row_slice = slice(matrix.indptr[index], matrix.indptr[index + 1])
+                key = (matrix.indices[row_slice].tobytes(),
+                       np.round(matrix.data[row_slice], self.duplicate_decimals).tobytes())
+                row_labels[index] = row_keys.setdefault(key, len(row_keys))
+            return row_labels
+        rounded_rows = np.round(self.scaled_matrix[rows], self.duplicate_decimals) + 0.0
+        unique_rows, row_labels = np.unique(rounded_rows, axis=0, return_inverse=True)
+        return row_labels.ravel()
+
+    def set_redundant_rows(self):
+        candidate_filter = np.ones(self.row_count, dtype=bool)
+        candidate_filter[self.zero_rows] = False
+        candidate_filter[self.duplicate_rows] = False
+        rows, columns, values = self.get_entries(candidate_filter)
+        upper_bounds, bounding_rows = self.get_upper_bounds(rows, columns, values)
+        maximum_activities = self.get_maximum_activities(rows, columns, values, upper_bounds)
+        redundant_filter = (candidate_filter
+                            & (maximum_activities <= self.scaled_vector - self.redundancy_tolerance))
+        redundant_filter[bounding_rows] = False
+        self.redundant_rows = np.flatnonzero(redundant_filter)
+
+    def get_entries(self, row_filter):
+        "Returns the row, column, and value of every non-zero scaled coefficient in the filtered rows"
+        if self.sparse:
+            matrix = self.scaled_matrix.tocoo()
+            rows, columns, values = matrix.row, matrix.col, matrix.data
+        else:
+            rows, columns = np.nonzero(self.scaled_matrix)
+            values = self.scaled_matrix[rows, columns]
+        entry_filter = row_filter[rows] & (values != 0)
+        return rows[entry_filter], columns[entry_filter], values[entry_filter]
+
+    def get_upper_bounds(self, rows, columns, values):
+        "Bounds implied by rows with no negative coefficients, and the rows giving them"
+        negative_counts = np.bincount(rows[values < 0], minlength=self.row_count)
+        bounding_filter = (values > 0) & (negative_counts[rows] == 0)
+        limits = self.scaled_vector[rows[bounding_filter]] / values[bounding_filter]
+        limit_columns = columns[bounding_filter]
+        limit_rows = rows[bounding_filter]
+        order = np.lexsort((limits, limit_columns))
+        bounded_columns, first_indices = np.unique(limit_columns[order], return_index=True)
+        upper_bounds = np.full(self.space_dimensions, np.inf)
+        upper_bounds[bounded_columns] = limits[order][first_indices]
+        bounding_rows = limit_rows[order][first_indices]
+        return upper_bounds, bounding_rows
+
+    def get_maximum_activities(self, rows, columns, values, upper_bounds):
+        "The largest value of each row over the box 0 <= x <= upper_bounds"
+        positive_filter = (values > 0)
+        maximum_activities = np.zeros(self.row_count)
+        np.add.at(maximum_activities, rows[positive_filter],
+                  values[positive_filter] * upper_bounds[columns[positive_filter]])
+        return maximum_activities
+
+    def set_reduced_problem(self):
+        removed_rows = np.concatenate((self.zero_rows, self.duplicate_rows, self.redundant_rows))
+        self.removed_rows = np.sort(removed_rows)
+        self.kept_rows = np.setdiff1d(np.arange(self.row_count), self.removed_rows)
+        self.constraint_matrix = self.scaled_matrix[self.kept_rows]
+        if self.sparse:
+            self.constraint_matrix = sc.sparse.csc_matrix(self.constraint_matrix)
+        self.constraint_vector = self.scaled_vector[self.kept_rows]
+
+    def get_original_variables(self, variables):
+        "Maps variables of the reduced problem to the variables of the original problem"
+        variable_map = np.concatenate((np.arange(self.space_dimensions),
+                                       self.kept_rows + self.space_dimensions))
+        return variable_map[variables]
+
+    def get_original_basis(self, basic_variables, non_basic_variables):
+        "The slack variables of the removed rows are added to the basic variables"
+        removed_slack_variables = self.removed_rows + self.space_dimensions
+        original_basic_variables = np.concatenate((self.get_original_variables(basic_variables),
+                                                   removed_slack_variables))
+        original_non_basic_variables = self.get_original_variables(non_basic_variables)
+        return original_basic_variables, original_non_basic_variables
+
+    def get_original_slack_values(self, position):
+        "Slack values of every original constraint, in the original scaling"
+        return self.original_constraint_vector - self.original_constraint_matrix @ position
+
+    def __str__(self):
+        string = (f"Original rows: {self.row_count}\n"
+                  f"Zero rows removed: {len(self.zero_rows)}\n"
+                  f"Duplicate rows removed: {len(self.duplicate_rows)}\n"
+                  f"Redundant rows removed: {len(self.redundant_rows)}\n"
+                  f"Rows kept: {len(self.kept_rows)}\n")
+        return string
@@ -0,0 +1,233 @@
+import numpy as np
+from copy import deepcopy
+
+class PricingStrategy():
+
+    """
+    Chooses the entering variable of a primal pivot and the leaving variable
+    of a dual pivot. This base class is Dantzig's rule: the largest entry of
+    the profit row, and the most negative value.
+
+    Subclasses keep weights that are updated incrementally on every pivot,
+    so update must be called before the basis of the tableau changes. The
+    tableau passed in must provide basis_factorisation, get_non_basic_matrix,
+    get_non_basic_transpose_product, and has_slack_basis, as Tableau and
+    LinearProblem do.
+    Primal weights are indexed by position in the non-basic variables and
+    dual weights by position in the basic variables, and the exiting
+    variable takes the position of the entering variable.
+
+    With Dantzig's rule a QuadraticSimplex tableau still prefers the variable
+    of its own dimension when that does not decrease the profit, as it always
+    has. The other strategies have prefer_dimension False, so the column they
+    choose is the one that enters.
+    """
+
+    zero = 0.0000001
+    prefer_dimension = True
+
+    def __init__(self, tableau, basic_count, non_basic_count, track_dual=False):
+        self.basic_count = basic_count
+        self.non_basic_count = non_basic_count
+        self.track_dual = track_dual
+        self.initialise_weights(tableau)
+
+    def initialise_weights(self, tableau):
+        pass
+
+    def choose_entering(self, profit_row):
+        return np.argmax(profit_row)
+
+    def choose_leaving(self, values):
+        return np.argmin(values)
+
+    def update(self, tableau, pivot_row_index, pivot_column_index, pivot_column):
+        pass
+
+    def copy(self):
+        return deepcopy(self)
+
+    def get_pivot_row(self, tableau, pivot_row_index):
+        unit_vector = np.zeros(self.basic_count)
+        unit_vector[pivot_row_index] = 1
+        row_multipliers = tableau.basis_factorisation.solve_transpose(unit_vector)
+        pivot_row = tableau.get_non_basic_transpose_product(row_multipliers)
+        return pivot_row, row_multipliers
+
+
+class PartialPricing(PricingStrategy):
+
+    """
+    Only prices a block of candidates at a time. The blocks are scanned
+    cyclically from where the last choice was made, and the best candidate
+    in the first block that contains an improving candidate is chosen.
+    """
+
+    block_size = 10
+    prefer_dimension = False
+
+    def initialise_weights(self, tableau):
+        self.entering_block_start = 0
+        self.leaving_block_start = 0
+
+    def choose_entering(self, profit_row):
+        index, self.entering_block_start = self.choose_in_blocks(
+            profit_row, self.entering_block_start)
+        return index
+
+    def choose_leaving(self, values):
+        index, self.leaving_block_start = self.choose_in_blocks(
+            -1 * values, self.leaving_block_start)
+        return index
+
+    def choose_in_blocks(self, scores, block_start):
+        for offset in range(0, len(scores), self.block_size):
+            block = (block_start + offset + np.arange(self.block_size)) % len(scores)
+            block_index = np.argmax(scores[block])
+            if scores[block[block_index]] > self.zero:
+                return block[block_index], block[0]
+        return np.argmax(scores), block_start
+
+
+class DevexPricing(PricingStrategy):
+
+    """
+    Approximate steepest edge pricing with reference framework weights.
+    Candidates are scored by their profit (or infeasibility) squared divided
+    by their weight. If a pivot value is too small to update the weights
+    with, or an update leaves a weight that is not positive and finite, the
+    weights are reset to 1, which starts a new reference framework.
+    """
+
+    prefer_dimension = False
+
+    def initialise_weights(self, tableau):
+        self.reset_weights()
+
+    def reset_weights(self):
+        self.primal_weights = np.ones(self.non_basic_count)
+        self.dual_weights = np.ones(self.basic_count)
+
+    def can_update_weights(self, pivot_value):
+        return abs(pivot_value) > self.zero
+
+    def check_weights(self):
+        weights = np.concatenate((self.primal_weights, self.dual_weights))
+        if not np.all(np.isfinite(weights) & (weights > 0)):
+            self.reset_weights()
+
+    def choose_entering(self, profit_row):
+        return self.choose_weighted(profit_row, self.primal_weights)
+
+    def choose_leaving(self, values):
+        return self.choose_weighted(-1 * values, self.dual_weights)
+
+    def choose_weighted(self, scores, weights):
+        improving = (scores > self.zero)
+        if not np.any(improving):
+            return np.argmax(scores)
+        weighted_scores = np.where(improving, scores**2 / weights, -np.inf)
+        return np.argmax(weighted_scores)
+
+    def update(self, tableau, pivot_row_index, pivot_column_index, pivot_column):
+        pivot_row, row_multipliers = self.get_pivot_row(tableau, pivot_row_index)
+        if (self.can_update_weights(pivot_row[pivot_column_index])
+                and self.can_update_weights(pivot_column[pivot_row_index])):
+            self.update_weights(tableau, pivot_row_index, pivot_column_index,
+                                pivot_column, pivot_row, row_multipliers)
+            self.check_weights()
+        else:
+            self.reset_weights()
+
+    def update_weights(self, tableau, pivot_row_index, pivot_column_index,
+                       pivot_column, pivot_row, row_multipliers):
+        self.update_primal_weights(pivot_row, pivot_column_index)
+        if self.track_dual:
+            self.update_dual_weights(pivot_column, pivot_row_index)
+
+    def update_primal_weights(self, pivot_row, pivot_column_index):
+        pivot_value = pivot_row[pivot_column_index]
+        ratios = pivot_row / pivot_value
+        entering_weight = self.primal_weights[pivot_column_index]
+        self.primal_weights = np.maximum(self.primal_weights, ratios**2 * entering_weight)
+        self.primal_weights[pivot_column_index] = max(entering_weight / pivot_value**2, 1)
+
+    def update_dual_weights(self, pivot_column, pivot_row_index):
+        pivot_value = pivot_column[pivot_row_index]
+        ratios = pivot_column / pivot_value
+        leaving_weight = self.dual_weights[pivot_row_index]
+        self.dual_weights = np.maximum(self.dual_weights, ratios**2 * leaving_weight)
+        self.dual_weights[pivot_row_index] = max(leaving_weight / pivot_value**2, 1)
+
+
+class SteepestEdgePricing(DevexPricing):
+
+    """
+    Exact steepest edge pricing. The primal weight of a non-basic variable is
+    1 + |A_B^{-1} A_j|^2 and the dual weight of a basic variable is the
+    squared norm of its row of A_B^{-1}. Both are computed once and then
+    updated with the Goldfarb-Reid and Forrest-Goldfarb recurrences, which
+    cost one extra solve each per pivot. Weights are reset to 1 in the same
+    cases as Devex weights.
+
+    A basis of slack variables is the identity, so its dual weights are all
+    1. Otherwise the row norms of A_B^{-1} are summed over blocks of
+    dual_weight_block_size of its columns, so A_B^{-1} is never formed.
+    """
+
+    dual_weight_block_size = 100
+
+    def initialise_weights(self, tableau):
+        non_basic_matrix = tableau.get_non_basic_matrix()
+        tableau_columns = tableau.basis_factorisation.solve(non_basic_matrix)
+        self.primal_weights = 1 + np.sum(tableau_columns**2, axis=0)
+        self.dual_weights = np.ones(self.basic_count)
+        if self.track_dual and not tableau.has_slack_basis():
+            self.dual_weights = self.get_basis_inverse_row_norms(tableau)
+
+    def get_basis_inverse_row_norms(self, tableau):
+        row_norms = np.zeros(self.basic_count)
+        for block_start in range(0, self.basic_count, self.dual_weight_block_size):
+            block = np.arange(block_start, min(block_start + self.dual_weight_block_size, self.basic_count))
+            unit_vectors = np.zeros((self.basic_count, len(block)))
+            unit_vectors[block, np.arange(len(block))] = 1
+            inverse_columns = tableau.basis_factorisation.solve(unit_vectors)
+            row_norms += np.sum(inverse_columns**2, axis=1)
+        return row_norms
+
+    def update_weights(self, tableau, pivot_row_index, pivot_column_index,
+                       pivot_column, pivot_row, row_multipliers):
+        self.update_primal_weights(tableau, pivot_row, pivot_column_index, pivot_column)
+        if self.track_dual:
+            self.update_dual_weights(tableau, pivot_row_index, pivot_column, row_multipliers)
+
+    def update_primal_weights(self, tableau, pivot_row, pivot_column_index, pivot_column):
+        pivot_value = pivot_row[pivot_column_index]
+        ratios = pivot_row / pivot_value
+        entering_weight = 1 + np.dot(pivot_column, pivot_column)
+        reference_vector = tableau.basis_factorisation.solve_transpose(pivot_column)
+        cross_terms = tableau.get_non_basic_transpose_product(reference_vector)
+        weights = self.primal_weights - 2 * ratios * cross_terms + ratios**2 * entering_weight
+        self.primal_weights = np.maximum(weights, 1 + ratios**2)
+        self.primal_weights[pivot_column_index] = max(entering_weight / pivot_value**2, 1)
+
+    def update_dual_weights(self, tableau, pivot_row_index, pivot_column, row_multipliers):
+        pivot_value = pivot_column[pivot_row_index]
+        ratios = pivot_column / pivot_value
+        leaving_weight = np.dot(row_multipliers, row_multipliers)
+        cross_terms = tableau.basis_factorisation.solve(row_multipliers)
+        weights = self.dual_weights - 2 * ratios * cross_terms + ratios**2 * leaving_weight
+        self.dual_weights = np.maximum(weights, self.zero)
+        self.dual_weights[pivot_row_index] = max(leaving_weight / pivot_value**2, self.zero)
+
+
+pricing_strategies = {"Dantzig": PricingStrategy,
+                      "Partial": PartialPricing,
+                      "Devex": DevexPricing,
+                      "SteepestEdge": SteepestEdgePricing}
+
+def get_pricing_strategy(name, tableau, basic_count, non_basic_count, track_dual=False):
+    if name not in pricing_strategies:
+        raise Exception((f"Unknown pricing strategy {name}\n"
+                         f"Options are {', '.join(pricing_strategies)}"))
+    return pricing_strategies[name](tableau, basic_count, non_basic_count, track_dual)
@@ -1,8 +1,16 @@
 import numpy as np
 import scipy as sc
 import math
-from copy import deepcopy
+import time
+from copy import copy
+from concurrent.futures import ThreadPoolExecutor
 from Tableau import Tableau
+from TableauBatch import TableauBatch
+from FactorisationCache import FactorisationCache
+from Presolve import Presolve
+from WarmStart import WarmStart
+from SolveStats import SolveStats
+from TraceRecorder import TraceRecorder
 from PlotState import PlotState
 from PlotState3D import PlotState3D
 
@@ -16,35 +24,516 @@ class QuadraticSimplex():
     positive and the origin must be a feasible point.
 
     For more details on the algorithm, implementation, and formulation
-    of quadratic problems into this form see the README document. """
-
-    option_plot_state = True
+    of quadratic problems into this form see the README document.
+
+    The constraint matrix may be given as a scipy.sparse CSC or CSR matrix.
+
+    With option_presolve, zero, duplicate, and redundant constraints are
+    removed and the rest are scaled before the tableaux are built. Constraint
+    indices then refer to the presolved rows, and get_original_bases reports
+    the bases in terms of the constraints that were given.
+
+    equality_rows gives the rows of Ax <= b that must hold with equality, and
+    free_variables gives the variables that may also be negative. These are
+    handled by the tableaux directly rather than by adding rows or splitting
+    variables. As the origin must be feasible, b is zero on equality rows. A
+    variable with a negative lower bound l is a free variable with the single
+    row -x <= -l.
+
+    Degenerate pivots, which change the basis without moving the vertex, are
+    counted in degenerate_pivot_count over every pivot of every tableau.
+    With option_perturbation each inequality bound is raised by a small
+    random amount before solving, and the solve is finished from the same
+    bases with the original bounds.
+
+    The solve can be stopped early by option_max_iterations,
+    option_time_limit in seconds, or option_target_gap, with the status
+    "IterationLimit", "TimeLimit", or "GapReached". Throughout the solve the
+    best vertex found is kept as incumbent_position with x^Tx equal to
+    incumbent_value, and upper_bound is a bound on x^Tx found from the
+    constraints. The gap is (upper_bound - incumbent_value) / upper_bound.
+
+    solve_stats counts the iterations and pivots of the solve, and with
+    option_profiling it also times each phase of an iteration and the
+    factorisation of bases. iteration_count and degenerate_pivot_count are
+    read from it. A function given to set_iteration_hook is called with the
+    problem after every iteration.
+
+    Nothing is printed or plotted unless option_output or option_plot_state
+    is set. With option_trace each iteration is recorded in trace, a
+    TraceRecorder keeping the last trace_capacity iterations, with the basic
+    variables and partial position of each tableau by dimension, the profit,
+    the profit vector, and the pivot of the updating tableau. Rows of merged
+    tableaux are -1 and nan, and the partial position of a tableau that has
+    not had one found yet is nan. """
+
+    option_plot_state = False
+    option_output = False
+    option_batched_evaluation = False
+    option_pricing = "Dantzig"
+    option_lookahead = False
+    option_worker_count = 1
+    option_presolve = False
+    option_degenerate_pivot_limit = 10
+    option_perturbation = False
+    perturbation_size = 0.001
+    perturbation_seed = None
+    option_max_iterations = None
+    option_time_limit = None
+    option_target_gap = None
+    option_profiling = False
+    option_trace = False
+    trace_capacity = 1000
+    merge_reference_tolerance = 0.0001
+    merge_direction_cell_size = 0.004
+
+    def __init__(self, constraint_matrix, constraint_vector, factorisation_cache=None,
+                 warm_start=None, equality_rows=None, free_variables=None):
+        self.set_variable_types(equality_rows, free_variables)
+        constraint_matrix, constraint_vector = self.presolve_constraints(constraint_matrix,
+                                                                         constraint_vector)
+        self.set_constraint_matrix(constraint_matrix)
+        self.set_dimensions()
+        self.set_variable_filters()
+        self.set_space_constraints()
+        self.set_factorisation_cache(factorisation_cache)
+        self.warm_start = warm_start
+        self.iteration_hook = None
+        self.set_constraint_vector(constraint_vector)
+
+    def set_variable_types(self, equality_rows, free_variables):
+        if equality_rows is None:
+            equality_rows = []
+        if free_variables is None:
+            free_variables = []
+        self.equality_rows = np.unique(np.asarray(equality_rows, dtype=int))
+        self.free_variables = np.unique(np.asarray(free_variables, dtype=int))
+
+    def set_variable_filters(self):
+        "Marks the slack variables of equality rows as fixed, and the free spatial variables"
+        self.fixed_variable_filter = np.zeros(self.total_dimensions, dtype=bool)
+        self.fixed_variable_filter[self.equality_rows + self.space_dimensions] = True
+        self.free_variable_filter = np.zeros(self.total_dimensions, dtype=bool)
+        self.free_variable_filter[self.free_variables] = True
+
+    def set_constraint_vector(self, constraint_vector):
+        if np.any(constraint_vector[self.equality_rows] != 0):
+            raise Exception("Equality constraints must have a zero bound so that the origin is feasible")
+        self.set_upper_bound(constraint_vector)
+        self.unperturbed_constraint_vector = None
+        if self.option_perturbation:
+            self.unperturbed_constraint_vector = constraint_vector
+            constraint_vector = self.get_perturbed_constraint_vector(constraint_vector)
+        self.constraint_vector = constraint_vector
+        self.constraint_vector_key = self.factorisation_cache.get_vector_key(constraint_vector)
+        self.solved_status = "Unsolved"
+        self.solve_stats = SolveStats()
+        self.executor = None
+        self.set_trace()
+        self.set_initial_tableaux()
+        self.reset_incumbent()
+        self.set_plot_state()
 
-    def __init__(self, constraint_matrix, constraint_vector):
-        self.constraint_matrix = constraint_matrix
+    def set_upper_bound(self, constraint_vector):
+        """
+        A row with no negative coefficients keeps x in the simplex with
+        vertices (b/a_j) e_j, so x_j is at most b/a_j, and if every a_j is
+        positive then x^Tx is at most the largest (b/a_j)^2. The upper bound
+        is the smallest of these simplex bounds and the bound of the box given
+        by the smallest limit on each x_j. Free variables have no such limits
+        """
+        self.upper_bound = np.inf
+        if len(self.free_variables) > 0:
+            return
+        rows, columns, values = self.get_constraint_entries()
+        negative_counts = np.bincount(rows[values < 0], minlength=self.slack_dimensions)
+        positive_counts = np.bincount(rows[values > 0], minlength=self.slack_dimensions)
+        limit_filter = (values > 0) & (negative_counts[rows] == 0)
+        limit_rows = rows[limit_filter]
+        squared_limits = np.maximum(constraint_vector[limit_rows] / values[limit_filter], 0)**2
+        axis_limits = np.full(self.space_dimensions, np.inf)
+        np.minimum.at(axis_limits, columns[limit_filter], squared_limits)
+        row_bounds = np.zeros(self.slack_dimensions)
+        np.maximum.at(row_bounds, limit_rows, squared_limits)
+        simplex_rows = (negative_counts == 0) & (positive_counts == self.space_dimensions)
+        self.upper_bound = float(min(np.sum(axis_limits), np.min(row_bounds[simplex_rows], initial=np.inf)))
+
+    def get_constraint_entries(self):
+        "The row, column, and value of every non-zero entry of the constraint matrix"
+        if sc.sparse.issparse(self.constraint_matrix):
+            matrix = self.constraint_matrix.tocoo()
+            return matrix.row, matrix.col, matrix.data
+        rows, columns = np.nonzero(self.constraint_matrix)
+        return rows, columns, self.constraint_matrix[rows, columns]
+
+    def set_iteration_hook(self, iteration_hook):
+        "iteration_hook(problem) is called after every iteration, or never if it is None"
+        self.iteration_hook = iteration_hook
+
+    def set_trace(self):
+        "The trace is restarted when the constraints change, as the shape of a basis changes"
+        self.trace = None
+        if self.option_trace:
+            self.trace = TraceRecorder(self.trace_capacity)
+
+    def record_trace(self):
+        basic_variables = np.full((self.space_dimensions, self.slack_dimensions), -1)
+        partial_positions = np.full((self.space_dimensions, self.space_dimensions), np.nan)
+        for tableau in self.tableaux:
+            basic_variables[tableau.dimension] = tableau.basic_variables
+            partial_positions[tableau.dimension] = getattr(tableau, "partial_position", np.nan)
+        self.trace.record(iteration=self.iteration_count,
+                          profit=self.profit,
+                          profit_vector=self.profit_vector[:self.space_dimensions],
+                          basic_variables=basic_variables,
+                          partial_positions=partial_positions,
+                          updating_dimension=self.updating_tableau.dimension,
+                          entering_variable=self.updating_tableau.last_entering_variable,
+                          exiting_variable=self.updating_tableau.last_exiting_variable,
+                          degenerate_pivot=self.updating_tableau.last_pivot_degenerate)
+
+    def run_phase(self, phase, function):
+        "Calls function, timing it as the given phase of solve_stats when profiling"
+        if not self.option_profiling:
+            return function()
+        start_time = time.perf_counter()
+        result = function()
+        self.solve_stats.record_phase(phase, time.perf_counter() - start_time)
+        return result
+
+    def reset_incumbent(self):
+        "The origin is always feasible so it is the first incumbent"
+        self.incumbent_position = np.zeros(self.space_dimensions)
+        self.incumbent_value = 0.0
+
+    def update_incumbent(self):
+        """
+        Keeps the vertex with the largest x^Tx. When the bounds are perturbed
+        only vertices that satisfy the original constraints are kept
+        """
+        vertex_positions = np.vstack([tableau.get_vertex_position() for tableau in self.tableaux])
+        if self.unperturbed_constraint_vector is not None:
+            slack_values = (self.unperturbed_constraint_vector[:, np.newaxis]
+                            - self.constraint_matrix @ vertex_positions.T)
+            vertex_positions = vertex_positions[np.all(slack_values >= -Tableau.feasibility_tolerance, axis=0)]
+        if len(vertex_positions) > 0:
+            vertex_values = np.sum(vertex_positions**2, axis=1)
+            best_index = np.argmax(vertex_values)
+            if vertex_values[best_index] > self.incumbent_value:
+                self.incumbent_value = float(vertex_values[best_index])
+                self.incumbent_position = np.copy(vertex_positions[best_index])
+
+    def get_gap(self):
+        if self.upper_bound == np.inf:
+            return np.inf
+        if self.upper_bound == 0:
+            return 0.0
+        return (self.upper_bound - self.incumbent_value) / self.upper_bound
+
+    def check_limits(self):
+        if self.solved_status != "Unsolved":
+            return
+        if self.option_target_gap is not None and self.get_gap() <= self.option_target_gap:
+            self.solved_status = "GapReached"
+        elif self.option_max_iterations is not None and self.iteration_count >= self.option_max_iterations:
+            self.solved_status = "IterationLimit"
+        elif (self.option_time_limit is not None
+              and time.perf_counter() - self.start_time >= self.option_time_limit):
+            self.solved_status = "TimeLimit"
+
+    def get_perturbed_constraint_vector(self, constraint_vector):
+        """
+        Raises each inequality bound by a random amount of at most
+        perturbation_size relative to its size. This separates constraints
+        that meet at the same vertex, so ties in the ratio test are broken
+        and the origin stays feasible
+        """
+        random_generator = np.random.default_rng(self.perturbation_seed)
+        perturbation = random_generator.uniform(0, self.perturbation_size, len(constraint_vector))
+        perturbation *= 1 + abs(constraint_vector)
+        perturbation[self.equality_rows] = 0
+        return constraint_vector + perturbation
+
+    def remove_perturbation(self):
+        """
+        Restores the original constraint vector. The tableaux keep their
+        bases, which are repaired with dual simplex pivots if their vertices
+        are no longer feasible
+        """
+        self.constraint_vector = self.unperturbed_constraint_vector
+        self.constraint_vector_key = self.factorisation_cache.get_vector_key(self.constraint_vector)
+        self.unperturbed_constraint_vector = None
+        for tableau in self.tableaux:
+            tableau.update_problem_dimensions()
+            tableau.set_tableau_vectors()
+        self.repair_tableaux()
+
+    def copy_with_constraint_vector(self, constraint_vector, warm_start=None):
+        """
+        Returns a new unsolved problem with a different constraint vector. The
+        constraint matrix, space constraints, and factorisation cache depend
+        only on the constraint matrix so they are shared rather than rebuilt.
+        Which rows presolve removes depends on the constraint vector, so a
+        presolved problem is built again from the original constraints
+        """
+        if self.presolve is not None:
+            return type(self)(self.presolve.original_constraint_matrix, constraint_vector,
+                              warm_start=warm_start)
+        problem = copy(self)
+        problem.warm_start = warm_start
+        problem.set_constraint_vector(constraint_vector)
+        return problem
+
+    def presolve_constraints(self, constraint_matrix, constraint_vector):
+        if not self.option_presolve:
+            self.presolve = None
+            return constraint_matrix, constraint_vector
+        if len(self.equality_rows) > 0 or len(self.free_variables) > 0:
+            raise Exception("Presolve only supports inequality constraints on non-negative variables")
+        self.presolve = Presolve(constraint_matrix, constraint_vector)
+        return self.presolve.constraint_matrix, self.presolve.constraint_vector
+
+    def get_original_bases(self):
+        """
+        Returns the basic and non basic variables of each tableau, with the
+        slack variables numbered by the rows of the constraints before presolve
+        """
+        bases = [(tableau.basic_variables, tableau.non_basic_variables) for tableau in self.tableaux]
+        if self.presolve is None:
+            return bases
+        if self.slack_dimensions != len(self.presolve.kept_rows):
+            raise Exception("The constraints have been changed since presolve so the original bases are not known")
+        return [self.presolve.get_original_basis(*basis) for basis in bases]
+
+    def add_constraints(self, constraint_matrix, constraint_vector):
+        """
+        Adds the constraints constraint_matrix x <= constraint_vector. Every
+        tableau keeps its basis with the new slack variables basic, and any
+        tableau whose vertex violates the new constraints is repaired with dual
+        simplex pivots, so solving again only takes a few more iterations
+        """
+        if not sc.sparse.issparse(constraint_matrix):
+            constraint_matrix = np.atleast_2d(np.asarray(constraint_matrix, dtype=float))
+        constraint_vector = np.atleast_1d(np.asarray(constraint_vector, dtype=float))
+        self.check_added_constraints(constraint_matrix, constraint_vector)
+        if sc.sparse.issparse(self.constraint_matrix) or sc.sparse.issparse(constraint_matrix):
+            constraint_matrix = sc.sparse.vstack((self.constraint_matrix, constraint_matrix))
+        else:
+            constraint_matrix = np.vstack((self.constraint_matrix, constraint_matrix))
+        self.set_constraints(constraint_matrix,
+                             np.concatenate((self.constraint_vector, constraint_vector)))
+        self.for_each_tableau(Tableau.add_constraints)
+        self.repair_tableaux()
+
+    def check_added_constraints(self, constraint_matrix, constraint_vector):
+        if constraint_matrix.ndim != 2 or constraint_matrix.shape[1] != self.space_dimensions:
+            raise Exception((f"Added constraints must have {self.space_dimensions} columns, "
+                             f"not shape {constraint_matrix.shape}"))
+        if np.any(constraint_vector < 0):
+            raise Exception("Added constraints must keep the origin feasible")
+
+    def remove_constraints(self, indices):
+        """
+        Removes the constraints with the given row indices. The slack variable
+        of each removed constraint is pivoted into the basis first, and the
+        remaining variables are renumbered
+        """
+        rows = np.unique(indices)
+        removed_slack_variables = rows + self.space_dimensions
+        for tableau in self.tableaux:
+            tableau.make_slack_variables_basic(removed_slack_variables)
+        variable_map = self.get_variable_map(removed_slack_variables)
+        kept_rows = np.setdiff1d(np.arange(self.slack_dimensions), rows)
+        self.equality_rows = np.flatnonzero(np.isin(kept_rows, self.equality_rows))
+        self.set_constraints(self.constraint_matrix[kept_rows], self.constraint_vector[kept_rows])
+        for tableau in self.tableaux:
+            tableau.remove_constraints(variable_map)
+        self.repair_tableaux()
+
+    def get_variable_map(self, removed_variables):
+        variable_map = np.full(self.total_dimensions, -1)
+        kept_variables = np.setdiff1d(np.arange(self.total_dimensions), removed_variables)
+        variable_map[kept_variables] = np.arange(len(kept_variables))
+        return variable_map
+
+    def set_constraints(self, constraint_matrix, constraint_vector):
+        "Replaces the problem data that depends on the constraints, keeping the tableaux"
+        self.set_constraint_matrix(constraint_matrix)
         self.constraint_vector = constraint_vector
         self.set_dimensions()
+        self.set_variable_filters()
         self.set_space_constraints()
-        self.set_initial_tableaux()
-        self.solved_status = "Unsolved"
+        self.factorisation_cache = FactorisationCache()
+        self.constraint_vector_key = self.factorisation_cache.get_vector_key(constraint_vector)
+        self.set_upper_bound(constraint_vector)
+        self.reset_incumbent()
+        self.set_profit_vector(self.profit_vector[:self.space_dimensions])
+        self.set_trace()
         self.set_plot_state()
+
+    def repair_tableaux(self):
+        self.tableaux = [tableau if tableau.repair_feasibility()
+                         else self.get_cold_started_tableau(tableau.dimension)
+                         for tableau in self.tableaux]
+        self.solved_status = "Unsolved"
+        self.reset_profit_information()
+
+    def get_warm_start(self):
+        "Returns the state needed to start another solve from where this one is"
+        return WarmStart.from_problem(self)
         
+    def set_constraint_matrix(self, constraint_matrix):
+        if sc.sparse.issparse(constraint_matrix):
+            self.constraint_matrix = sc.sparse.csc_matrix(constraint_matrix)
+        else:
+            self.constraint_matrix = np.asarray(constraint_matrix, dtype=float).view()
+            self.constraint_matrix.setflags(write=False)
+
+    def set_factorisation_cache(self, factorisation_cache):
+        if factorisation_cache is None:
+            self.factorisation_cache = FactorisationCache()
+        else:
+            self.factorisation_cache = factorisation_cache
+
+    def get_dense_constraint_matrix(self):
+        if sc.sparse.issparse(self.constraint_matrix):
+            return self.constraint_matrix.toarray()
+        return self.constraint_matrix
+
     def set_dimensions(self):
         self.space_dimensions = self.constraint_matrix.shape[1]
         self.slack_dimensions = self.constraint_matrix.shape[0]
         self.total_dimensions = self.space_dimensions + self.slack_dimensions
+        self.set_merge_projection_vector()
+
+    def set_merge_projection_vector(self):
+        "A fixed random unit vector, so that directions along different axes are in different cells"
+        projection_vector = np.random.default_rng(0).random(self.space_dimensions)
+        self.merge_projection_vector = projection_vector / np.linalg.norm(projection_vector)
 
     def set_space_constraints(self):
-        non_negativity_constraints = np.identity(self.space_dimensions)
-        self.space_constraints = np.concatenate((non_negativity_constraints,
-                                                 self.constraint_matrix),
-                                                axis=0)
+        if sc.sparse.issparse(self.constraint_matrix):
+            non_negativity_constraints = sc.sparse.identity(self.space_dimensions)
+            self.space_constraints = sc.sparse.vstack((non_negativity_constraints,
+                                                       self.constraint_matrix),
+                                                      format="csr")
+        else:
+            non_negativity_constraints = np.identity(self.space_dimensions)
+            self.space_constraints = np.concatenate((non_negativity_constraints,
+                                                     self.constraint_matrix),
+                                                    axis=0)
 
     def set_initial_tableaux(self):
         self.set_initial_profit_information()
-        initial_tableau = Tableau(self, -1, self.profit_vector)
-        self.tableaux = [self.create_tableau_dimension(initial_tableau, dimension)
+        if self.warm_start is None:
+            self.set_cold_started_tableaux()
+        else:
+            self.set_warm_started_tableaux()
+
+    def set_cold_started_tableaux(self):
+        """
+        Making the free variables basic can move the starting vertex away
+        from the origin. Every tableau starts at that vertex, so the profit
+        is its distance from the origin, and as there is no hyperplane yet
+        the profit vector has components of 1 with the sign of the vertex.
+        If no column then improves the profit the vertex is optimal
+        """
+        initial_tableau = self.get_cold_started_tableau(0)
+        vertex_position = initial_tableau.get_vertex_position()
+        if np.any(vertex_position != 0):
+            self.profit = float(np.linalg.norm(vertex_position))
+            self.set_profit_vector(np.where(vertex_position < 0, -1.0, 1.0))
+            self.update_pivot_column(initial_tableau)
+        self.tableaux = [initial_tableau.copy_for_dimension(dimension)
                          for dimension in range(self.space_dimensions)]
+        if np.any(vertex_position != 0) and not initial_tableau.has_improving_column():
+            self.updating_tableau = self.tableaux[0]
+            self.solved_status = "Optimal"
+
+    def get_cold_started_tableau(self, dimension):
+        tableau = Tableau(self, dimension, self.profit_vector)
+        tableau.pivot_column_index = dimension
+        tableau.set_tableau_components()
+        if np.any(self.fixed_variable_filter) or np.any(self.free_variable_filter):
+            tableau.make_fixed_variables_non_basic()
+            tableau.make_free_variables_basic()
+            tableau.set_initial_pivot_column_index()
+            tableau.set_pivot_column()
+        return tableau
+
+    def set_warm_started_tableaux(self):
+        """
+        Each tableau starts from its basis in the warm start and is made
+        feasible with dual simplex pivots, falling back to the origin if that
+        fails. If every vertex is where it was when the warm start was taken
+        then the rest of the state is restored as it was, and otherwise it is
+        recomputed from the new vertices
+        """
+        self.warm_start.check_dimensions(self.space_dimensions, self.slack_dimensions)
+        self.set_profit_vector(self.warm_start.profit_normal)
+        self.tableaux = [self.get_warm_started_tableau(index)
+                         for index in range(len(self.warm_start.dimensions))]
+        if self.warm_start_vertices_match():
+            self.restore_warm_start_state()
+        else:
+            self.reset_profit_information()
+
+    def get_warm_started_tableau(self, index):
+        dimension = self.warm_start.dimensions[index]
+        tableau = Tableau(self, dimension, self.profit_vector)
+        tableau.set_basis(self.warm_start.basic_variables[index],
+                          self.warm_start.non_basic_variables[index])
+        tableau.pivot_column_index = self.warm_start.pivot_column_indices[index]
+        tableau.set_tableau_components()
+        if not tableau.repair_feasibility():
+            tableau = self.get_cold_started_tableau(dimension)
+        return tableau
+
+    def warm_start_vertices_match(self):
+        vertex_positions = np.vstack([tableau.get_vertex_position() for tableau in self.tableaux])
+        return np.allclose(vertex_positions, self.warm_start.vertex_positions)
+
+    def restore_warm_start_state(self):
+        for tableau, partial_position in zip(self.tableaux, self.warm_start.partial_positions):
+            tableau.partial_position = np.copy(partial_position)
+        self.profit = self.warm_start.profit
+        self.solved_status = self.warm_start.solved_status
+
+    def reset_profit_information(self):
+        """
+        Used when the tableaux have been moved to new vertices from outside the
+        algorithm. The vertex furthest from the origin sets the profit, so that
+        every line of movement meets the hypersphere, and the partial
+        positions, profit vector, and pivot columns are recomputed from there
+        """
+        self.for_each_tableau(Tableau.forget_last_pivot)
+        self.for_each_tableau(Tableau.choose_pivot_column_index)
+        self.set_lines_of_movement()
+        vertex_profits = [np.linalg.norm(tableau.line_reference_vector) for tableau in self.tableaux]
+        self.updating_tableau = self.tableaux[np.argmax(vertex_profits)]
+        self.profit = float(max(vertex_profits))
+        self.update_tableaux()
+        self.for_each_tableau(Tableau.choose_pivot_column_index)
+        if self.has_edge_at_right_angles_to_point():
+            self.set_point_profit_vector()
+            self.for_each_tableau(Tableau.choose_pivot_column_index)
+        self.updating_tableau.check_if_problem_solved()
+
+    def has_edge_at_right_angles_to_point(self):
+        """
+        When every partial position is the same point the profit vector is
+        normal to the hypersphere there. An edge at right angles to it then
+        has no profit, though moving along it leaves the hypersphere
+        """
+        if len(self.get_positions_no_repeats()) > 1 or any(self.for_each_tableau(Tableau.has_improving_column)):
+            return False
+        return any(self.for_each_tableau(Tableau.has_zero_profit_column))
+
+    def set_point_profit_vector(self):
+        "As for a cold start away from the origin, with components of 1 with the sign of the point"
+        position = self.updating_tableau.partial_position
+        self.set_profit_vector(np.where(position < 0, -1.0, 1.0))
+        self.update_pivot_columns()
         
     def set_initial_profit_information(self):
         profit_normal = np.ones(self.space_dimensions)
@@ -55,51 +544,141 @@ class QuadraticSimplex():
         profit_vector_slack = np.zeros(self.slack_dimensions)
         self.profit_vector = np.concatenate((normal, profit_vector_slack), axis=0)
 
-    def create_tableau_dimension(self, initial_tableau, dimension):
-        tableau_dimension = deepcopy(initial_tableau)
-        tableau_dimension.global_problem = self
-        tableau_dimension.dimension = dimension
-        tableau_dimension.pivot_column_index = dimension
-        tableau_dimension.set_tableau_components()
-        return tableau_dimension
-
     def solve(self):
+        """
+        If the solve stops at a limit while the bounds are perturbed, the
+        perturbation is left in place, and the incumbent still satisfies the
+        original constraints
+        """
+        self.start_time = time.perf_counter()
+        self.open_executor()
+        try:
+            self.update_incumbent()
+            self.check_limits()
+            self.iterate_until_solved()
+            if self.unperturbed_constraint_vector is not None and self.solved_status == "Optimal":
+                self.remove_perturbation()
+                self.update_incumbent()
+                self.iterate_until_solved()
+        finally:
+            self.close_executor()
+        self.solve_stats.solve_time += time.perf_counter() - self.start_time
+        if self.option_output:
+            if self.solved_status == "Optimal":
+                print(f"Solved in {self.iteration_count} iterations!")
+            else:
+                print(f"Stopped with status {self.solved_status} after {self.iteration_count} iterations")
+
+    def iterate_until_solved(self):
         while self.solved_status == "Unsolved":
             self.iterate()
+            self.update_incumbent()
+            self.check_limits()
+            if self.iteration_hook is not None:
+                self.iteration_hook(self)
+            if self.trace is not None:
+                self.record_trace()
+            self.output_iteration()
+            self.plot_obj.plot()
+
+    def output_iteration(self):
+        if self.option_output:
             self.output_partial_positions()
             self.output_profit()
-            self.plot_obj.plot()
-        print("Solved!")
 
     def iterate(self):
-        self.set_lines_of_movement()
-        self.merge_any_converged_pairs()
-        self.set_updating_tableau()
-        self.updating_tableau.pivot()
+        self.solve_stats.iteration_count += 1
+        self.run_phase("lines_of_movement", self.set_lines_of_movement)
+        self.run_phase("merge_detection", self.merge_any_converged_pairs)
+        self.run_phase("potential_profit", self.set_updating_tableau)
+        self.run_phase("pivot", self.updating_tableau.pivot)
         self.update_global_problem()
 
+    @property
+    def iteration_count(self):
+        return self.solve_stats.iteration_count
+
+    @property
+    def degenerate_pivot_count(self):
+        return self.solve_stats.degenerate_pivot_count
+
+    def for_each_tableau(self, function):
+        """
+        Calls function on every tableau and returns the results in tableau
+        order. The work for each tableau only touches that tableau, so while
+        solving with more than one worker it is spread over a thread pool and
+        the results are the same as running it sequentially. The pool only
+        exists during solve, so setting up and changing the constraints,
+        which use the shared factorisation cache, always run sequentially
+        """
+        if self.executor is not None:
+            return list(self.executor.map(function, self.tableaux))
+        return [function(tableau) for tableau in self.tableaux]
+
+    def open_executor(self):
+        if self.option_worker_count > 1 and self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.option_worker_count)
+
+    def close_executor(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
     def set_lines_of_movement(self):
-        for tableau in self.tableaux:
-            tableau.set_line_of_movement()
+        self.for_each_tableau(Tableau.set_line_of_movement)
 
     def merge_any_converged_pairs(self):
-        for tableau_index_1 in range(len(self.tableaux)):
-            for tableau_index_2 in range(tableau_index_1 + 1, len(self.tableaux)):
-                self.check_if_merged(tableau_index_1, tableau_index_2)
-
-    def check_if_merged(self, tableau_index_1, tableau_index_2):
-        tableau_1 = self.tableaux[tableau_index_1]
-        tableau_2 = self.tableaux[tableau_index_2]
-        if self.reference_vectors_match(tableau_1, tableau_2):
-            if self.direction_vectors_match(tableau_1, tableau_2):
+        """
+        A tableau is merged into any later tableau whose line of movement
+        matches its own. Each tableau is hashed to a cell by the sum of its
+        reference vector and the projection of its unit direction vector onto
+        a fixed random vector. Matching lines are in the same or neighbouring
+        cells, so only the tableaux in those cells are compared
+        """
+        merged_indices = self.get_merged_indices()
+        if len(merged_indices) > 0:
+            if self.option_output:
                 print("Merging!")
-                self.tableaux.pop(tableau_index_1)
+            self.tableaux = [tableau for index, tableau in enumerate(self.tableaux)
+                             if index not in merged_indices]
+
+    def get_merged_indices(self):
+        cells = {}
+        merged_indices = set()
+        for index, tableau in enumerate(self.tableaux):
+            reference_cell, direction_cell = self.get_merge_cell(tableau)
+            for reference_offset in (-1, 0, 1):
+                for direction_offset in (-1, 0, 1):
+                    for other_index in cells.get((reference_cell + reference_offset,
+                                                  direction_cell + direction_offset), []):
+                        if self.lines_of_movement_match(self.tableaux[other_index], tableau):
+                            merged_indices.add(other_index)
+            cells.setdefault((reference_cell, direction_cell), []).append(index)
+        return merged_indices
+
+    def get_merge_cell(self, tableau):
+        """
+        The sums of matching reference vectors differ by less than
+        merge_reference_tolerance. Matching unit directions are equal up to
+        sign to within 0.0032, so the absolute values of their projections
+        differ by less than merge_direction_cell_size
+        """
+        reference_sum = np.sum(tableau.line_reference_vector)
+        direction_vector = tableau.line_direction_vector / np.linalg.norm(tableau.line_direction_vector)
+        projection = abs(np.dot(direction_vector, self.merge_projection_vector))
+        return (math.floor(reference_sum / self.merge_reference_tolerance),
+                math.floor(projection / self.merge_direction_cell_size))
+
+    def lines_of_movement_match(self, tableau_1, tableau_2):
+        lines_match = (self.reference_vectors_match(tableau_1, tableau_2)
+                       and self.direction_vectors_match(tableau_1, tableau_2))
+        return lines_match
 
     def reference_vectors_match(self, tableau_1, tableau_2):
         vector_1 = tableau_1.line_reference_vector
         vector_2 = tableau_2.line_reference_vector
         difference = abs(vector_1 - vector_2)
-        vectors_match = (sum(difference) < 0.0001)
+        vectors_match = (sum(difference) < self.merge_reference_tolerance)
         return vectors_match
 
     def direction_vectors_match(self, tableau_1, tableau_2):
@@ -111,8 +690,18 @@ class QuadraticSimplex():
         return vectors_match
 
     def set_updating_tableau(self):
-        potential_profit_list = [tableau.get_potential_profit()
-                                 for tableau in self.tableaux]
+        """
+        The tableau with the smallest potential profit is updated. A tableau
+        whose pivot would return it to an earlier basis is passed over unless
+        every tableau's pivot would
+        """
+        if self.use_batched_evaluation():
+            potential_profit_list = TableauBatch(self, self.tableaux).get_potential_profits()
+        else:
+            potential_profit_list = self.for_each_tableau(Tableau.get_potential_profit)
+        revisiting = np.array(self.for_each_tableau(Tableau.pivot_revisits_basis))
+        if not np.all(revisiting):
+            potential_profit_list = np.where(revisiting, np.inf, potential_profit_list)
         updating_dimension = np.argmin(potential_profit_list)
         self.updating_tableau = self.tableaux[updating_dimension]
 
@@ -121,48 +710,61 @@ class QuadraticSimplex():
         self.set_profit()
         if abs(old_profit - self.profit) > 0.0001:
             self.update_tableaux()
-        self.updating_tableau.set_pivot_column_index()
+        self.run_phase("pricing", self.updating_tableau.set_pivot_column_index)
 
     def set_profit(self):
         updating_tableau_vertex_position = self.updating_tableau.get_vertex_position()
         self.profit = math.sqrt(sum(updating_tableau_vertex_position**2))
 
     def update_tableaux(self):
-        self.compute_partial_positions()
-        self.compute_profit_vector()
-        self.update_pivot_columns()
+        self.run_phase("hypersphere_intersection", self.compute_partial_positions)
+        self.run_phase("profit_vector", self.compute_profit_vector)
+        self.run_phase("profit_rows", self.update_pivot_columns)
 
     def compute_partial_positions(self):
-        for tableau in self.tableaux:
-            if tableau != self.updating_tableau:
-                tableau.find_hypersphere_intersection()
-            else:
-                tableau.partial_position = self.updating_tableau.get_vertex_position()
+        self.for_each_tableau(self.compute_partial_position)
 
-    def compute_profit_vector(self):
-        positions_transpose, gram_matrix = self.get_positions_transpose_and_gram_matrix()
-        intermediate_vector = sc.linalg.solve(gram_matrix, np.ones(positions_transpose.shape[1]))
-        profit_normal = np.dot(positions_transpose, intermediate_vector)
-        self.set_profit_vector(profit_normal)
+    def compute_partial_position(self, tableau):
+        if tableau != self.updating_tableau:
+            tableau.find_hypersphere_intersection()
+        else:
+            tableau.partial_position = self.updating_tableau.get_vertex_position()
 
-    def get_positions_transpose_and_gram_matrix(self):
+    def compute_profit_vector(self):
+        """
+        The normal of the hyperplane through the partial positions is the
+        minimum norm solution of Pv = 1, where the rows of P are the positions.
+        A least squares solve finds it without forming the Gram matrix, and
+        still gives a normal when the positions are linearly dependent.
+        Every partial position moves onto the new hypersphere whenever the
+        profit changes, so there is no unchanged factorisation to update
+        """
         positions = self.get_positions_no_repeats()
-        positions_transpose = np.transpose(positions)
-        gram_matrix = np.matmul(positions, positions_transpose)
-        return positions_transpose, gram_matrix
+        profit_normal = sc.linalg.lstsq(positions, np.ones(len(positions)))[0]
+        self.set_profit_vector(profit_normal)
 
     def get_positions_no_repeats(self):
         positions = np.vstack([tableau.partial_position for tableau in self.tableaux])
         positions_rounded = np.round(positions, 6)
         positions_rounded, unique_indices = np.unique(positions_rounded, axis=0, return_index=True)
-        positions = positions[unique_indices]
+        positions = positions[np.sort(unique_indices)]
         return positions
 
     def update_pivot_columns(self):
-        for tableau in self.tableaux:
-            tableau.set_column_filtered_arrays()
-            tableau.set_profit_row()
-            #tableau.set_pivot_column_index()
+        if self.use_batched_evaluation():
+            TableauBatch(self, self.tableaux).set_profit_rows()
+        else:
+            self.for_each_tableau(self.update_pivot_column)
+
+    def update_pivot_column(self, tableau):
+        tableau.set_column_filtered_arrays()
+        tableau.set_profit_row()
+        #tableau.set_pivot_column_index()
+
+    def use_batched_evaluation(self):
+        use_batched = (self.option_batched_evaluation
+                       and not sc.sparse.issparse(self.constraint_matrix))
+        return use_batched
 
     def output_problem_constraints(self):
         print("Problem constraints")
@@ -183,7 +785,7 @@ class QuadraticSimplex():
     def output_partial_positions(self):
         print("Outputting partial positions")
         for tableau in self.tableaux:
-            print(f"Dimension: {tableau.dimension}, position: {tableau.partial_position}")
+            print(f"Dimension: {tableau.dimension}, position: {getattr(tableau, 'partial_position', None)}")
         print("")
 
     def set_plot_state(self):
@@ -196,7 +798,8 @@ class QuadraticSimplex():
         string = (f"Space dimensions: {self.space_dimensions}\n"
                   f"Slack dimensions: {self.slack_dimensions}\n"
                   f"Total dimensions: {self.total_dimensions}\n"
-                  f"Solved status: {self.solved_status}/n")
+                  f"Solved status: {self.solved_status}\n"
+                  f"Iterations: {self.iteration_count}\n")
         return string
 
 
@@ -241,17 +844,20 @@ constraint_matrix = np.array([[-1, 0, 0],
 constraint_vector = np.array([0, 0, 0, 4, 3, 3, 0.3, 3.4])
 """
 
-N = 30
-constraint_matrix = np.random.rand(N, 3)
-constraint_matrix = constraint_matrix / np.linalg.norm(constraint_matrix, axis=1).reshape(N, 1)
-print(constraint_matrix)
-constraint_vector = np.random.rand(N)/3 + 0.7
-print([list(i) for i in constraint_matrix])
-print(list(constraint_vector))
-
-#constraint_matrix = np.array([[2.926413872904681, 1.0847136814905383, 2.65372612696535], [1.010047566777689, 2.2462791285252677, 4.748971112601782], [4.798545379569625, 4.14918950180408, 1.3388303955334109], [3.082590600500611, 1.5090858187033056, 2.91709850939197], [3.272392402726407, 3.5066551643852395, 2.9176255867916283], [4.542156829387358, 3.556880418542365, 2.7985613655952033], [4.82038049991272, 1.257160247519029, 2.7119642579623435], [2.063304757871728, 3.955695578334879, 4.499038258378556], [4.309610027165567, 1.8911312122481907, 3.332005858908505], [3.6642966882466763, 1.0340221019201734, 2.1394287780346373], [1.014851808220519, 1.8168807108465514, 3.883964328563588], [1.0559007000964027, 1.701933005629093, 4.9182826704414655], [3.883308942682502, 3.805996296633884, 2.9713313483087926], [4.167135051945373, 1.8823515631981191, 1.516354493069138], [2.852462996322677, 4.47342716872487, 4.429356606112812], [2.0435177959479778, 1.3166593284856787, 1.7619991173755853], [2.967224091911079, 3.0903950572718277, 4.895934907903739], [2.966119422928603, 1.220940718855811, 4.356514199778456], [1.177340038021614, 4.463210521642405, 3.985493024379138], [2.684144746994798, 2.733646245071985, 3.7058208425984627], [5.038398927463475, 1.1763802476707526, 2.8907840845239794], [2.0141341956261236, 4.77849852577405, 2.8141825819117674], [4.471137237795851, 1.264758628504437, 1.0020975614116265], [3.9588226684345815, 2.83760546665806, 1.3290827434035477], [1.0745909977812547, 2.335077628973479, 1.8245336446131963], [1.8212198773994328, 4.421940329194557, 1.9705922281590664], [3.283927278525925, 4.718921989637628, 1.0012380509096905], [3.5817659713503645, 1.278798480789799, 3.85579045842465], [2.8182982420802043, 2.4807610347562536, 5.024702882471913], [4.6598919682507045, 2.3824918019147843, 4.465548809483165]])
-#constraint_vector = np.array([4.005876511974748, 4.5601698553771435, 4.892958745505702, 4.6515505987598615, 4.572133578580334, 4.22227557784988, 4.2294811157263865, 4.260472871923132, 4.504618693247361, 4.323804367613552, 4.7004356148818625, 4.941191362557812, 4.655570286406181, 4.726885287084638, 4.0098422750508265, 4.859185624508852, 4.111818181259705, 4.426269329620348, 4.568103811718706, 4.658405651228994, 4.551612721515293, 4.64463158692862, 4.696130121097248, 4.21398616987616, 4.105247533779582, 4.425841631305803, 4.9091435812852815, 4.633946559576172, 4.881592837256371, 4.992296003219178])
-
-problem = QuadraticSimplex(constraint_matrix, constraint_vector)
-problem.solve()
+if __name__ == "__main__":
+    N = 30
+    constraint_matrix = np.random.rand(N, 3)
+    constraint_matrix = constraint_matrix / np.linalg.norm(constraint_matrix, axis=1).reshape(N, 1)
+    print(constraint_matrix)
+    constraint_vector = np.random.rand(N)/3 + 0.7
+    print([list(i) for i in constraint_matrix])
+    print(list(constraint_vector))
+
+    #constraint_matrix = np.array([[2.926413872904681, 1.0847136814905383, 2.65372612696535], [1.010047566777689, 2.2462791285252677, 4.748971112601782], [4.798545379569625, 4.14918950180408, 1.3388303955334109], [3.082590600500611, 1.5090858187033056, 2.91709850939197], [3.272392402726407, 3.5066551643852395, 2.9176255867916283], [4.542156829387358, 3.556880418542365, 2.7985613655952033], [4.82038049991272, 1.257160247519029, 2.7119642579623435], [2.063304757871728, 3.955695578334879, 4.499038258378556], [4.309610027165567, 1.8911312122481907, 3.332005858908505], [3.6642966882466763, 1.0340221019201734, 2.1394287780346373], [1.014851808220519, 1.8168807108465514, 3.883964328563588], [1.0559007000964027, 1.701933005629093, 4.9182826704414655], [3.883308942682502, 3.805996296633884, 2.9713313483087926], [4.167135051945373, 1.8823515631981191, 1.516354493069138], [2.852462996322677, 4.47342716872487, 4.429356606112812], [2.0435177959479778, 1.3166593284856787, 1.7619991173755853], [2.967224091911079, 3.0903950572718277, 4.895934907903739], [2.966119422928603, 1.220940718855811, 4.356514199778456], [1.177340038021614, 4.463210521642405, 3.985493024379138], [2.684144746994798, 2.733646245071985, 3.7058208425984627], [5.038398927463475, 1.1763802476707526, 2.8907840845239794], [2.0141341956261236, 4.77849852577405, 2.8141825819117674], [4.471137237795851, 1.264758628504437, 1.0020975614116265], [3.9588226684345815, 2.83760546665806, 1.3290827434035477], [1.0745909977812547, 2.335077628973479, 1.8245336446131963], [1.8212198773994328, 4.421940329194557, 1.9705922281590664], [3.283927278525925, 4.718921989637628, 1.0012380509096905], [3.5817659713503645, 1.278798480789799, 3.85579045842465], [2.8182982420802043, 2.4807610347562536, 5.024702882471913], [4.6598919682507045, 2.3824918019147843, 4.465548809483165]])
+    #constraint_vector = np.array([4.005876511974748, 4.5601698553771435, 4.892958745505702, 4.6515505987598615, 4.572133578580334, 4.22227557784988, 4.2294811157263865, 4.260472871923132, 4.504618693247361, 4.323804367613552, 4.7004356148818625, 4.941191362557812, 4.655570286406181, 4.726885287084638, 4.0098422750508265, 4.859185624508852, 4.111818181259705, 4.426269329620348, 4.568103811718706, 4.658405651228994, 4.551612721515293, 4.64463158692862, 4.696130121097248, 4.21398616987616, 4.105247533779582, 4.425841631305803, 4.9091435812852815, 4.633946559576172, 4.881592837256371, 4.992296003219178])
+
+    QuadraticSimplex.option_plot_state = True
+    QuadraticSimplex.option_output = True
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
     
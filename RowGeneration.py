@@ -0,0 +1,134 @@
+import numpy as np
+import scipy as sc
+from BatchSolve import QuadraticSimplex
+
+class RowGeneration():
+
+    """
+    Solves a QuadraticSimplex problem with a very large number of constraints
+    by only giving the tableaux a small working set of them.
+
+    The working set starts with the row that bounds each axis most tightly.
+    After each solve, the vertices of the tableaux are checked against every
+    constraint, and the most violated rows not yet in the working set are
+    added. This repeats until no vertex violates any constraint. The full
+    constraint matrix is only read in chunks of rows, so it may be a numpy
+    memmap or a sparse matrix.
+
+    By default each round solves the working set from the origin. With
+    option_incremental_rounds the rows are instead added to the existing
+    problem with add_constraints, which takes fewer iterations but may stop
+    at a lower vertex, as the tableaux are not restarted.
+
+    After solve, problem is the QuadraticSimplex of the final working set,
+    working_rows gives the row of the full matrix for each of its
+    constraints, and round_count is the number of solves.
+    """
+
+    scan_chunk_size = 100000
+    maximum_rows_per_round = 50
+    violation_tolerance = 0.000001
+    option_incremental_rounds = False
+
+    def __init__(self, constraint_matrix, constraint_vector, initial_rows=None):
+        self.constraint_matrix = constraint_matrix
+        self.constraint_vector = np.asarray(constraint_vector, dtype=float)
+        self.row_count, self.space_dimensions = constraint_matrix.shape
+        self.set_working_rows(initial_rows)
+        self.round_count = 0
+
+    def set_working_rows(self, initial_rows):
+        if initial_rows is None:
+            initial_rows = self.get_axis_bounding_rows()
+        self.working_rows = np.unique(initial_rows)
+
+    def get_axis_bounding_rows(self):
+        """
+        For each axis, the row that allows the smallest value of that
+        coordinate. Rows with no negative coefficients bound an axis over the
+        whole positive orthant, so they are preferred, and any row with a
+        positive coefficient is only used when no such row exists
+        """
+        bounding_rows = self.get_smallest_limit_rows(only_non_negative_rows=True)
+        unbounded_axes = (bounding_rows < 0)
+        if np.any(unbounded_axes):
+            fallback_rows = self.get_smallest_limit_rows(only_non_negative_rows=False)
+            bounding_rows[unbounded_axes] = fallback_rows[unbounded_axes]
+        if np.any(bounding_rows < 0):
+            raise Exception("The constraints do not bound every axis so the problem is unbounded")
+        return bounding_rows
+
+    def get_smallest_limit_rows(self, only_non_negative_rows):
+        smallest_limits = np.full(self.space_dimensions, np.inf)
+        smallest_limit_rows = np.full(self.space_dimensions, -1)
+        for start, matrix_chunk, vector_chunk in self.get_chunks():
+            valid_entries = (matrix_chunk > 0)
+            if only_non_negative_rows:
+                valid_entries &= np.all(matrix_chunk >= 0, axis=1)[:, np.newaxis]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                limits = np.where(valid_entries, vector_chunk[:, np.newaxis] / matrix_chunk, np.inf)
+            chunk_rows = np.argmin(limits, axis=0)
+            chunk_limits = limits[chunk_rows, np.arange(self.space_dimensions)]
+            improved = (chunk_limits < smallest_limits)
+            smallest_limits[improved] = chunk_limits[improved]
+            smallest_limit_rows[improved] = start + chunk_rows[improved]
+        return smallest_limit_rows
+
+    def get_chunks(self):
+        for start in range(0, self.row_count, self.scan_chunk_size):
+            stop = min(start + self.scan_chunk_size, self.row_count)
+            matrix_chunk = self.constraint_matrix[start:stop]
+            if sc.sparse.issparse(matrix_chunk):
+                matrix_chunk = matrix_chunk.toarray()
+            yield start, np.asarray(matrix_chunk, dtype=float), self.constraint_vector[start:stop]
+
+    def solve(self):
+        self.set_working_problem()
+        self.solve_round()
+        violated_rows = self.get_violated_rows()
+        while len(violated_rows) > 0:
+            self.add_working_rows(violated_rows)
+            self.solve_round()
+            violated_rows = self.get_violated_rows()
+
+    def set_working_problem(self):
+        self.problem = QuadraticSimplex(self.get_matrix_rows(self.working_rows),
+                                        self.constraint_vector[self.working_rows])
+
+    def add_working_rows(self, rows):
+        self.working_rows = np.concatenate((self.working_rows, rows))
+        if self.option_incremental_rounds:
+            self.problem.add_constraints(self.get_matrix_rows(rows),
+                                         self.constraint_vector[rows])
+        else:
+            self.set_working_problem()
+
+    def solve_round(self):
+        self.problem.solve()
+        self.round_count += 1
+
+    def get_matrix_rows(self, rows):
+        matrix_rows = self.constraint_matrix[rows]
+        if not sc.sparse.issparse(matrix_rows):
+            matrix_rows = np.array(matrix_rows, dtype=float)
+        return matrix_rows
+
+    def get_violated_rows(self):
+        """
+        Returns the rows violated by any vertex, most violated first, scanning
+        the full constraint matrix one chunk at a time
+        """
+        vertex_positions = np.vstack([tableau.get_vertex_position()
+                                      for tableau in self.problem.tableaux])
+        violated_rows = []
+        violations = []
+        for start, matrix_chunk, vector_chunk in self.get_chunks():
+            chunk_violations = np.max(matrix_chunk @ vertex_positions.T, axis=1) - vector_chunk
+            chunk_rows = np.flatnonzero(chunk_violations > self.violation_tolerance)
+            violated_rows.append(start + chunk_rows)
+            violations.append(chunk_violations[chunk_rows])
+        violated_rows = np.concatenate(violated_rows)
+        violations = np.concatenate(violations)
+        new_rows = ~np.isin(violated_rows, self.working_rows)
+        violated_rows = violated_rows[new_rows][np.argsort(-violations[new_rows], kind="stable")]
+        return violated_rows[:self.maximum_rows_per_round]
@@ -1,4 +1,9 @@
 import numpy as np
+import scipy.sparse as sc_sparse
+from copy import copy
+from FactorisationCache import FactorisationCache
+from PricingStrategy import get_pricing_strategy
+from TraceRecorder import TraceRecorder
 
 np.set_printoptions(suppress=True)
 
@@ -7,36 +12,81 @@ class LinearProblem():
     """
     Each object is a linear programming problem of the form Ax <= b
     where the objective is to maximise c^T x
+
+    The matrix may be a scipy.sparse matrix, in which case A is kept sparse
+    and the basis is factorised with a sparse LU
+
+    This is a revised simplex implementation. Only the factorisation of A_B
+    is kept, and each step computes the dual prices, the pivot column, and
+    (for dual steps) the pivot row. The full tableau is only built when it
+    is displayed
+
+    Nothing is displayed while solving unless display_tableau_bool or
+    display_basic_variables_bool is set. With option_trace each pivot is
+    recorded in trace, a TraceRecorder keeping the basic variables, profit,
+    and entering and exiting variables of the last trace_capacity pivots
     """
     
     display_rounding = 4
     output_rounding = 3
-    display_tableau_bool = True
-    display_basic_variables_bool = True
+    display_tableau_bool = False
+    display_basic_variables_bool = False
+    option_trace = False
+    trace_capacity = 1000
     ntive_zero = -0.0000001
     ptive_zero =  0.0000001
+    option_pricing = "Dantzig"
 
-    def __init__(self, matrix, b, c, B=None):
+    def __init__(self, matrix, b, c, B=None, factorisation_cache=None):
         "Initialising all variables"
         self.non_num = len(c)
         self.bas_num = len(b)
         self.var_num = self.non_num + self.bas_num
-        self.N, self.B = self.get_B_and_N(B)
         self.matrix = matrix
-        self.A = np.concatenate((matrix, np.identity(self.bas_num)), axis = 1)
-        self.A_N = self.get_matrix_I(self.A, self.N)
-        self.A_B = self.get_matrix_I(self.A, self.B)
-        self.A_B_inverse = np.linalg.inv(self.A_B)
-        self.A_prod = np.matmul(self.A_B_inverse, self.A_N)
+        self.A = self.get_A(matrix)
         self.c = c
-        c_full = np.concatenate((c, np.zeros(self.bas_num)))
+        self.set_factorisation_cache(factorisation_cache)
+        self.set_basis_and_b(b, B)
+
+    def set_factorisation_cache(self, factorisation_cache):
+        "The cache can be shared by problems with the same matrix"
+        if factorisation_cache is None:
+            self.factorisation_cache = FactorisationCache()
+        else:
+            self.factorisation_cache = factorisation_cache
+
+    def set_basis_and_b(self, b, B=None):
+        "Initialising everything that depends on the starting basis or on b"
+        self.N, self.B = self.get_B_and_N(B)
+        self.set_N_and_B_positions()
+        self.basis_factorisation = self.get_cached_factorisation()
+        self.pricing_strategy = get_pricing_strategy(self.option_pricing, self,
+                                                     self.bas_num, self.non_num, track_dual=True)
+        self.iteration_count = 0
+        self.set_trace()
+        c_full = np.concatenate((self.c, np.zeros(self.bas_num)))
         self.c_N = self.get_vector_I(c_full, self.N)
         self.c_B = self.get_vector_I(c_full, self.B)
         self.b = b
+        self.b_key = self.factorisation_cache.get_vector_key(b)
         self.update_values()
         self.update_profit_and_profit_row()
         self.problem_status = "Unsolved"
 
+    def set_trace(self):
+        self.trace = None
+        if self.option_trace:
+            self.trace = TraceRecorder(self.trace_capacity)
+
+    def copy_with_b(self, b, B=None):
+        """
+        Returns a new unsolved problem with a different b and optionally a
+        different starting basis. A, c, and the factorisation cache are shared
+        """
+        problem = copy(self)
+        problem.set_basis_and_b(b, B)
+        return problem
+
     def get_B_and_N(self, B):
         if type(B) == type(None):
             N = np.array(range(self.non_num))
@@ -45,6 +95,21 @@ class LinearProblem():
             N = np.array(list(set(range(self.var_num)) - set(B)))
         return N, B
 
+    def set_N_and_B_positions(self):
+        "Maps each variable to its index in N and in B, with -1 when it is not in that set"
+        self.N_positions = np.full(self.var_num, -1)
+        self.B_positions = np.full(self.var_num, -1)
+        self.N_positions[self.N] = np.arange(len(self.N))
+        self.B_positions[self.B] = np.arange(len(self.B))
+
+    def get_A(self, matrix):
+        "Appends the columns of the slack variables to the constraint matrix"
+        if sc_sparse.issparse(matrix):
+            A = sc_sparse.hstack((matrix, sc_sparse.identity(self.bas_num)), format = "csc")
+        else:
+            A = np.concatenate((matrix, np.identity(self.bas_num)), axis = 1)
+        return A
+
     def get_matrix_I(self, matrix, I):
         """
         Returns a matrix where the columns are given by an indexing set, I.
@@ -52,10 +117,54 @@ class LinearProblem():
         matrix = (2, 3, 4, 1, 0)    matrix_I = (2, 4, 1)
                  (5, 6, 7, 0, 1)               (5, 7, 0)
         """
-        columns = [matrix[:, i] for i in I]
-        matrix_I = np.stack(columns, axis = 1)
+        matrix_I = matrix[:, I]
         return matrix_I
 
+    def get_basis_matrix(self, B=None):
+        "Returns A_B, or the columns of another set of basic variables"
+        if B is None:
+            B = self.B
+        return self.get_matrix_I(self.A, B)
+
+    def get_cached_factorisation(self):
+        "Returns a factorisation of A_B, reusing one from the cache if A_B has been factorised before"
+        return self.factorisation_cache.get_factorisation(self.B, self.get_basis_matrix)
+
+    def get_column(self, variable):
+        "Returns the column of A for a variable as a dense vector"
+        column = self.A[:, variable]
+        if sc_sparse.issparse(column):
+            column = column.toarray().ravel()
+        return column
+
+    def get_pivot_column(self, pivot_index_of_N):
+        "Returns the column of the tableau for a non basic variable, A_B^{-1} A_i"
+        column = self.get_column(self.N[pivot_index_of_N])
+        pivot_column = self.basis_factorisation.solve(column)
+        return pivot_column
+
+    def get_pivot_row(self, pivot_index_of_B):
+        "Returns the non basic part of a row of the tableau, e_i^T A_B^{-1} A_N"
+        unit_vector = np.zeros(self.bas_num)
+        unit_vector[pivot_index_of_B] = 1
+        row_multipliers = self.basis_factorisation.solve_transpose(unit_vector)
+        pivot_row = self.get_non_basic_transpose_product(row_multipliers)
+        return pivot_row
+
+    def get_non_basic_transpose_product(self, vector):
+        "Returns A_N^T vector"
+        return (self.A.T @ vector)[self.N]
+
+    def has_slack_basis(self):
+        return np.all(self.B >= self.non_num)
+
+    def get_non_basic_matrix(self):
+        "Returns A_N as a dense matrix"
+        A_N = self.get_matrix_I(self.A, self.N)
+        if sc_sparse.issparse(A_N):
+            A_N = A_N.toarray()
+        return A_N
+
     def get_vector_I(self, vector, I):
         """
         Returns a vector where the entries are given by an indexing set, I.
@@ -84,15 +193,15 @@ class LinearProblem():
 
     def primal_simplex_step(self):
         "Performs a primal pivot of the tableau"
-        pivot_index_of_N = np.argmax(self.profit_row_non_trivial)
+        pivot_index_of_N = self.pricing_strategy.choose_entering(self.profit_row_non_trivial)
         #pivot_index_of_N = int(input(f"{self.profit_row_non_trivial}: "))
-        pivot_column = self.A_prod[:, pivot_index_of_N]
+        pivot_column = self.get_pivot_column(pivot_index_of_N)
         if np.all(pivot_column <= -0.0000001):
             self.problem_status = "Unbounded"
         else:
             exiting = self.N[pivot_index_of_N]
             entering = self.get_pivot_index_of_B(pivot_column)
-            self.update(exiting, entering)
+            self.update(exiting, entering, pivot_column)
             self.display()
 
     def get_pivot_index_of_B(self, pivot_column):
@@ -108,8 +217,8 @@ class LinearProblem():
 
     def dual_simplex_step(self):
         "Performs a dual pivot of the tableau"
-        pivot_index_of_B = np.argmin(self.values)
-        pivot_row = self.A_prod[pivot_index_of_B, :]
+        pivot_index_of_B = self.pricing_strategy.choose_leaving(self.values)
+        pivot_row = self.get_pivot_row(pivot_index_of_B)
         if np.all(pivot_row > self.ptive_zero):
             self.problem_status = "Infeasible"
         else:
@@ -129,24 +238,38 @@ class LinearProblem():
         entering_variable = N_filtered[N_filtered_index]
         return entering_variable
 
-    def update(self, entering, exiting):
+    def update(self, entering, exiting, pivot_column=None):
         """
-        Updates N, B, A_N, A_B, A_B_inverse, c_N, c_B, values, profit
+        Updates N, B, the factorisation of A_B, c_N, c_B, values, profit
         For example, N = (0, 1, 2), B = (3, 4, 5)
         entering variable = 2 (the variable that is becoming basic)
         exiting variable = 4 (the variable that is no longer going to be basic)
         The new N is (0, 1, 4) and the new B is (3, 2, 5)
 
         The other variables are updated using the entering and exiting indexes
-        or directly from the previous updated variables
+        or directly from the previous updated variables. The pivot column of
+        the entering variable is computed if it is not given
         """
-        index_entering = np.where(self.N==entering)[0][0]
-        index_exiting = np.where(self.B==exiting)[0][0]
+        index_entering = self.N_positions[entering]
+        index_exiting = self.B_positions[exiting]
+        if pivot_column is None:
+            pivot_column = self.get_pivot_column(index_entering)
+        self.pricing_strategy.update(self, index_exiting, index_entering, pivot_column)
+        self.iteration_count += 1
         self.update_B_and_N(index_entering, index_exiting)
-        self.update_matrices(index_entering, index_exiting)
+        self.update_factorisation(index_exiting, pivot_column)
         self.update_c(index_entering, index_exiting)
         self.update_values()
         self.update_profit_and_profit_row()
+        if self.trace is not None:
+            self.record_trace(entering, exiting)
+
+    def record_trace(self, entering, exiting):
+        self.trace.record(iteration=self.iteration_count,
+                          profit=self.profit,
+                          basic_variables=self.B,
+                          entering_variable=entering,
+                          exiting_variable=exiting)
 
     def update_B_and_N(self, index_entering, index_exiting):
         "Swapping the entering and exiting variables between the non basic and basic variables"
@@ -154,15 +277,19 @@ class LinearProblem():
         exiting_value = self.B[index_exiting]
         self.B[index_exiting] = entering_value
         self.N[index_entering] = exiting_value
+        self.B_positions[entering_value] = index_exiting
+        self.N_positions[exiting_value] = index_entering
+        self.B_positions[exiting_value] = -1
+        self.N_positions[entering_value] = -1
 
-    def update_matrices(self, index_entering, index_exiting):
-        "Swapping a column between A_N and A_B. Also computing the new A_B_inverse"
-        entering_column = np.copy(self.A_N[:, index_entering])
-        exiting_column = np.copy(self.A_B[:, index_exiting])
-        self.A_B[:, index_exiting] = entering_column
-        self.A_N[:, index_entering] = exiting_column
-        self.A_B_inverse = np.linalg.inv(self.A_B)
-        self.A_prod = np.matmul(self.A_B_inverse, self.A_N)
+    def update_factorisation(self, index_exiting, pivot_column):
+        "Replacing the column of the exiting variable in the factorisation of A_B"
+        if self.factorisation_cache.contains(self.B):
+            self.basis_factorisation = self.get_cached_factorisation()
+        elif self.basis_factorisation.can_update(index_exiting, pivot_column):
+            self.basis_factorisation.update(index_exiting, pivot_column)
+        else:
+            self.basis_factorisation = self.get_cached_factorisation()
 
     def update_c(self, index_entering, index_exiting):
         "Updates c_N and c_B so that they correspond to the new N and B after an iteration"
@@ -173,18 +300,21 @@ class LinearProblem():
 
     def update_values(self):
         "Computing what the new values of the non basic variables are going to be"
-        self.values = np.matmul(self.A_B_inverse, self.b)
+        self.values = self.factorisation_cache.get_values(self.B, self.b_key,
+                                                          self.basis_factorisation, self.b)
 
     def update_profit_and_profit_row(self):
         "Computing the new profit now that the non basic variables have changed"
         self.profit = np.dot(self.c_B, self.values)
-        intermediate_matrix = np.matmul(np.transpose(self.c_B), self.A_prod)
-        self.profit_row_non_trivial = self.c_N - intermediate_matrix
+        self.dual_prices = self.basis_factorisation.solve_transpose(self.c_B)
+        self.profit_row_non_trivial = self.c_N - self.get_non_basic_transpose_product(self.dual_prices)
 
     def get_tableau_body(self):
-        "Returns the body of the tableau where the columns are ordered with I = B, N"
-        columns = [np.matmul(self.A_B_inverse, self.A[:, i]) for i in range(self.var_num)]
-        tableau_body = np.stack((columns), axis = 1)
+        "Returns the body of the tableau, A_B^{-1} A. This is only built when it is displayed"
+        A = self.A
+        if sc_sparse.issparse(A):
+            A = A.toarray()
+        tableau_body = self.basis_factorisation.solve(A)
         tableau_body = tableau_body.round(15)
         return tableau_body
 
@@ -200,10 +330,8 @@ class LinearProblem():
 
     def get_point(self):
         "Returns the coordinates of the current point in terms of the original variables"
-        point = np.zeros(self.non_num)
-        for basic_variable, value in zip(self.B, self.values):
-            if basic_variable < self.non_num:
-                point[basic_variable] = value
+        rows = self.B_positions[:self.non_num]
+        point = np.where(rows >= 0, self.values[rows], 0)
         return point
 
     def compute_profit(self, point):
@@ -236,16 +364,20 @@ class LinearProblem():
         for variable, value in zip(self.B, self.values):
             print(f"{variable}: {round(value, self.output_rounding)}")
         print(f"Profit: {round(self.profit, self.output_rounding)}")
+        print(f"Iterations: {self.iteration_count}")
+
+if __name__ == "__main__":
+    A = np.array([[-3, 1],
+                  [3, 5],
+                  [1, -3],
+                  [9, 8]])
+    b = np.array([3, 90, 2, 180])
+    c = np.array([0.05561337, 0.0407022])
+    B = np.array([1, 0, 4, 2])
 
-A = np.array([[-3, 1],
-              [3, 5],
-              [1, -3],
-              [9, 8]])
-b = np.array([3, 90, 2, 180])
-c = np.array([0.05561337, 0.0407022])
-B = np.array([1, 0, 4, 2])
-
-prob = LinearProblem(A, b, c, B)
-prob.display()
-prob.solve()
-prob.output()
+    prob = LinearProblem(A, b, c, B)
+    prob.display_tableau_bool = True
+    prob.display_basic_variables_bool = True
+    prob.display()
+    prob.solve()
+    prob.output()
@@ -0,0 +1,63 @@
+import numpy as np
+
+class SolveResult():
+
+    """
+    The outcome of solving one problem in a batch. Only arrays and numbers
+    are kept so that results are cheap to send back from worker processes.
+    If solving raised an exception then solved_status is "Failed" and error
+    describes the exception. incumbent_position is the best vertex found,
+    which is the answer when the solve stopped at a limit, and upper_bound
+    bounds x^Tx. solve_stats is the SolveStats of the solve.
+    """
+
+    def __init__(self, index, solved_status, profit=None, profit_vector=None,
+                 positions=None, iteration_count=0, error=None, degenerate_pivot_count=0,
+                 incumbent_position=None, incumbent_value=None, upper_bound=None,
+                 solve_stats=None):
+        self.index = index
+        self.solved_status = solved_status
+        self.profit = profit
+        self.profit_vector = profit_vector
+        self.positions = positions
+        self.iteration_count = iteration_count
+        self.error = error
+        self.degenerate_pivot_count = degenerate_pivot_count
+        self.incumbent_position = incumbent_position
+        self.incumbent_value = incumbent_value
+        self.upper_bound = upper_bound
+        self.solve_stats = solve_stats
+
+    @classmethod
+    def from_problem(cls, index, problem):
+        positions = np.vstack([tableau.get_vertex_position() for tableau in problem.tableaux])
+        result = cls(index, problem.solved_status,
+                     profit=problem.profit,
+                     profit_vector=problem.profit_vector[:problem.space_dimensions],
+                     positions=positions,
+                     iteration_count=problem.iteration_count,
+                     degenerate_pivot_count=problem.degenerate_pivot_count,
+                     incumbent_position=problem.incumbent_position,
+                     incumbent_value=problem.incumbent_value,
+                     upper_bound=problem.upper_bound,
+                     solve_stats=problem.solve_stats)
+        return result
+
+    @classmethod
+    def from_error(cls, index, error, iteration_count=0):
+        result = cls(index, "Failed",
+                     iteration_count=iteration_count,
+                     error=f"{type(error).__name__}: {error}")
+        return result
+
+    def __str__(self):
+        string = (f"Index: {self.index}\n"
+                  f"Solved status: {self.solved_status}\n"
+                  f"Profit: {self.profit}\n"
+                  f"Iterations: {self.iteration_count}\n"
+                  f"Degenerate pivots: {self.degenerate_pivot_count}\n"
+                  f"Incumbent value: {self.incumbent_value}\n"
+                  f"Upper bound: {self.upper_bound}\n")
+        if self.error is not None:
+            string += f"Error: {self.error}\n"
+        return string
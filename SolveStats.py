@@ -0,0 +1,60 @@
+class SolveStats():
+
+    """
+    Counts and timings for one solve of a QuadraticSimplex problem, which
+    are the only record of them, so the problem's iteration_count and
+    degenerate_pivot_count are read from here.
+
+    Iterations and pivots are always counted. pivot_count includes every
+    pivot of every tableau, including those that set up or repair a basis,
+    and degenerate_pivot_count is the number of those that did not move the
+    vertex. The wall time and number of calls of each phase of an iteration
+    are only recorded with option_profiling, so that timing costs nothing
+    when it is not wanted. pricing is the choice of the updating tableau's
+    next pivot column, and profit_rows is the recomputation of every
+    tableau's profit row after the profit vector changes.
+
+    factorisation is the time spent factorising and updating bases. It is
+    part of the time of the phase it happens in, usually pivot, so it is
+    reported separately and left out of get_profiled_time.
+    """
+
+    phases = ("lines_of_movement",
+              "merge_detection",
+              "potential_profit",
+              "pivot",
+              "hypersphere_intersection",
+              "profit_vector",
+              "profit_rows",
+              "pricing")
+    nested_phases = ("factorisation",)
+
+    def __init__(self):
+        self.phase_times = {phase: 0.0 for phase in self.phases + self.nested_phases}
+        self.phase_counts = {phase: 0 for phase in self.phases + self.nested_phases}
+        self.iteration_count = 0
+        self.pivot_count = 0
+        self.degenerate_pivot_count = 0
+        self.solve_time = 0.0
+
+    def record_phase(self, phase, elapsed_time):
+        self.phase_times[phase] += elapsed_time
+        self.phase_counts[phase] += 1
+
+    def record_pivot(self, degenerate):
+        self.pivot_count += 1
+        if degenerate:
+            self.degenerate_pivot_count += 1
+
+    def get_profiled_time(self):
+        return sum(self.phase_times[phase] for phase in self.phases)
+
+    def __str__(self):
+        string = (f"Solve time: {self.solve_time:.6f}s\n"
+                  f"Iterations: {self.iteration_count}\n"
+                  f"Pivots: {self.pivot_count} ({self.degenerate_pivot_count} degenerate)\n")
+        if sum(self.phase_counts.values()) > 0:
+            for phase in self.phases + self.nested_phases:
+                string += (f"{phase}: {self.phase_times[phase]:.6f}s "
+                           f"in {self.phase_counts[phase]} calls\n")
+        return string
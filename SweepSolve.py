@@ -0,0 +1,211 @@
+import os
+import numpy as np
+import scipy as sc
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from BatchSolve import QuadraticSimplex
+from SimplexAlgorithm import LinearProblem
+from FactorisationCache import FactorisationCache
+
+class SweepSolve():
+
+    """
+    Solves the QuadraticSimplex problem with one constraint matrix for each
+    row of a stack of constraint vectors, over a pool of processes.
+
+    A dense constraint matrix is copied into shared memory once and every
+    worker maps it instead of receiving its own copy. Each worker builds the
+    problem once and then only swaps the constraint vector, so the space
+    constraints are not rebuilt. The factorisation cache is kept across the
+    scenarios of a worker, so a basis reached by an earlier scenario is not
+    factorised again.
+
+    After solve, the results are arrays indexed by scenario: solved_statuses,
+    profits, points, iteration_counts, and errors. A scenario that raised an
+    exception has the status "Failed", NaN profit and point, and a
+    description of the exception in errors.
+    """
+
+    chunk_size = 16
+    default_options = {"option_plot_state": False,
+                       "option_output": False}
+    unpickled_attributes = ["constraint_vectors", "shared_memory", "solved_statuses",
+                            "profits", "points", "iteration_counts", "errors"]
+
+    def __init__(self, constraint_matrix, constraint_vectors, options=None, worker_count=None):
+        self.constraint_matrix = constraint_matrix
+        self.constraint_vectors = np.atleast_2d(np.asarray(constraint_vectors, dtype=float))
+        self.set_options(options)
+        self.worker_count = worker_count or os.cpu_count()
+
+    def set_options(self, options):
+        self.options = dict(self.default_options)
+        if options is not None:
+            self.options.update(options)
+
+    def __getstate__(self):
+        "Workers are sent everything except the constraint vectors, results, and a shared matrix"
+        state = {key: value for key, value in self.__dict__.items()
+                 if key not in self.unpickled_attributes}
+        if self.shared_memory_name is not None:
+            state["constraint_matrix"] = None
+        return state
+
+    def solve(self):
+        self.initialise_results()
+        self.create_shared_matrix()
+        try:
+            self.solve_chunks()
+        finally:
+            self.release_shared_matrix()
+
+    def initialise_results(self):
+        scenario_count = len(self.constraint_vectors)
+        self.solved_statuses = np.full(scenario_count, "Unsolved", dtype=object)
+        self.profits = np.full(scenario_count, np.nan)
+        self.points = np.full((scenario_count, self.constraint_matrix.shape[1]), np.nan)
+        self.iteration_counts = np.zeros(scenario_count, dtype=int)
+        self.errors = np.full(scenario_count, None, dtype=object)
+
+    def create_shared_matrix(self):
+        if sc.sparse.issparse(self.constraint_matrix):
+            self.shared_memory = None
+            self.shared_memory_name = None
+        else:
+            matrix = np.asarray(self.constraint_matrix, dtype=float)
+            self.shared_memory = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+            self.shared_memory_name = self.shared_memory.name
+            self.matrix_shape = matrix.shape
+            shared_matrix = np.ndarray(self.matrix_shape, dtype=float, buffer=self.shared_memory.buf)
+            shared_matrix[:] = matrix
+
+    def release_shared_matrix(self):
+        if self.shared_memory is not None:
+            self.shared_memory.close()
+            self.shared_memory.unlink()
+            self.shared_memory = None
+
+    def solve_chunks(self):
+        with ProcessPoolExecutor(max_workers=self.worker_count,
+                                 initializer=initialise_worker,
+                                 initargs=(self,)) as executor:
+            futures = [executor.submit(solve_scenarios, indices, self.constraint_vectors[indices])
+                       for indices in self.get_chunks()]
+            for future in as_completed(futures):
+                self.set_results(future.result())
+
+    def get_chunks(self):
+        scenario_indices = np.arange(len(self.constraint_vectors))
+        chunks = [scenario_indices[start:start + self.chunk_size]
+                  for start in range(0, len(scenario_indices), self.chunk_size)]
+        return chunks
+
+    def set_results(self, results):
+        for index, solved_status, profit, point, iteration_count, error in results:
+            self.solved_statuses[index] = solved_status
+            self.profits[index] = profit
+            self.points[index] = point
+            self.iteration_counts[index] = iteration_count
+            self.errors[index] = error
+
+    def initialise_worker(self):
+        self.attach_shared_matrix()
+        self.factorisation_cache = FactorisationCache()
+        self.template_problem = None
+        for name, value in self.options.items():
+            setattr(self.get_problem_class(), name, value)
+
+    def attach_shared_matrix(self):
+        if self.shared_memory_name is not None:
+            self.worker_shared_memory = shared_memory.SharedMemory(name=self.shared_memory_name)
+            self.constraint_matrix = np.ndarray(self.matrix_shape, dtype=float,
+                                                buffer=self.worker_shared_memory.buf)
+
+    def solve_scenarios(self, indices, constraint_vectors):
+        results = [(index, *self.solve_scenario(constraint_vector))
+                   for index, constraint_vector in zip(indices, constraint_vectors)]
+        return results
+
+    def solve_scenario(self, constraint_vector):
+        problem = None
+        try:
+            problem = self.get_problem(constraint_vector)
+            problem.solve()
+            return self.get_result(problem)
+        except Exception as error:
+            iteration_count = 0 if problem is None else problem.iteration_count
+            return "Failed", np.nan, np.nan, iteration_count, f"{type(error).__name__}: {error}"
+
+    def get_problem_class(self):
+        return QuadraticSimplex
+
+    def get_problem(self, constraint_vector):
+        if self.template_problem is None:
+            self.template_problem = QuadraticSimplex(self.constraint_matrix, constraint_vector,
+                                                     self.factorisation_cache)
+            return self.template_problem
+        return self.template_problem.copy_with_constraint_vector(constraint_vector)
+
+    def get_result(self, problem):
+        "A solve that stops before its first iteration has no updating tableau, so gives its incumbent"
+        updating_tableau = getattr(problem, "updating_tableau", None)
+        if updating_tableau is None:
+            point = np.copy(problem.incumbent_position)
+        else:
+            point = updating_tableau.get_vertex_position()
+        return problem.solved_status, problem.profit, point, problem.iteration_count, None
+
+
+class LinearSweepSolve(SweepSolve):
+
+    """
+    Solves the LinearProblem with one matrix and objective for each row of a
+    stack of constraint vectors. Changing b keeps the optimal basis of the
+    previous scenario dual feasible, so each scenario of a worker starts from
+    the optimal basis of the one before it and only needs dual simplex steps
+    to repair it.
+    """
+
+    default_options = {"display_tableau_bool": False,
+                       "display_basic_variables_bool": False}
+
+    def __init__(self, matrix, objective_vector, constraint_vectors, options=None, worker_count=None):
+        super().__init__(matrix, constraint_vectors, options, worker_count)
+        self.objective_vector = np.asarray(objective_vector, dtype=float)
+
+    def initialise_worker(self):
+        super().initialise_worker()
+        self.warm_start_basis = None
+
+    def get_problem_class(self):
+        return LinearProblem
+
+    def get_problem(self, constraint_vector):
+        if self.template_problem is None:
+            self.template_problem = LinearProblem(self.constraint_matrix, constraint_vector,
+                                                  self.objective_vector,
+                                                  factorisation_cache=self.factorisation_cache)
+            return self.template_problem
+        return self.template_problem.copy_with_b(constraint_vector, self.get_warm_start_basis())
+
+    def get_warm_start_basis(self):
+        if self.warm_start_basis is None:
+            return None
+        return np.copy(self.warm_start_basis)
+
+    def get_result(self, problem):
+        if problem.problem_status == "Optimal":
+            self.warm_start_basis = np.copy(problem.B)
+        point = problem.get_point()
+        return problem.problem_status, problem.profit, point, problem.iteration_count, None
+
+
+worker_sweep = None
+
+def initialise_worker(sweep):
+    global worker_sweep
+    worker_sweep = sweep
+    worker_sweep.initialise_worker()
+
+def solve_scenarios(indices, constraint_vectors):
+    return worker_sweep.solve_scenarios(indices, constraint_vectors)
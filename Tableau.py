@@ -1,6 +1,10 @@
 import numpy as np
 import scipy.linalg as sc_la
+import scipy.sparse as sc_sparse
 import math
+from copy import copy
+from BasisFactorisation import BasisFactorisation
+from PricingStrategy import get_pricing_strategy
 
 class Tableau():
 
@@ -10,23 +14,86 @@ class Tableau():
     Constructs an initial tableau from data Ax <= b and profit function c^Tx.
     Computes pivot column, theta_column, pivot_row, and performs row operations
     Outputs basic and non-basic variables, profit, values, and the whole tableau
+
+    The tableau is [A | I], but only A is stored and it is shared by every
+    tableau of the problem. Slack columns are unit vectors and are built on
+    demand when the basis is factorised or a pivot column is needed. A may
+    be a scipy.sparse matrix, in which case the basis is factorised with a
+    sparse LU.
+
+    The slack variables of equality constraints are fixed: they are made
+    non-basic at the start and never chosen to enter. Free spatial variables
+    are made basic at the start and their rows are left out of every ratio
+    test, so they never leave the basis and may take negative values.
+
+    A pivot that does not move the vertex is degenerate. After
+    option_degenerate_pivot_limit of these in a row, the pivot column and row
+    are chosen with Bland's rule until the vertex moves again. A tableau that
+    returns to a basis it has already had uses Bland's rule from then on, so
+    the basis cannot cycle. Outside of Bland's rule a tableau only chooses
+    the column that undoes its last pivot when no other column improves the
+    profit.
+
+    If the line of movement misses the hypersphere of the current profit, or
+    only meets it where a variable that is not free is negative, the step to
+    the hypersphere is rejected and the partial position stays at the vertex.
     """
 
     debug_theta = False
-
-    valid_theta_signs = np.array([[False, False, False],
-                                  [True, True, False],
-                                  [False, False, True]])
+    debug_direction = False
+    feasibility_tolerance = 0.0000001
+    degenerate_tolerance = 0.00001
 
     def __init__(self, global_problem, dimension, profit_vector):
         self.dimension = dimension
+        self.set_global_problem(global_problem)
+        self.initialise_problem_from_input_data()
+        self.pivot_column_index = None
+        self.consecutive_degenerate_pivots = 0
+        self.last_pivot_degenerate = False
+        self.last_entering_variable = -1
+        self.last_exiting_variable = -1
+        self.visited_bases = set()
+        self.basis_repeated = False
+
+    def set_global_problem(self, global_problem):
         self.global_problem = global_problem
-        # Maybe remove these later if they turn out to be unnecessary
         self.constraint_matrix = global_problem.constraint_matrix
         self.constraint_vector = global_problem.constraint_vector
         self.space_constraints = global_problem.space_constraints
-        self.initialise_problem_from_input_data()
-        self.pivot_column_index = None
+        self.fixed_variable_filter = global_problem.fixed_variable_filter
+        self.free_variable_filter = global_problem.free_variable_filter
+
+    def copy_for_dimension(self, dimension):
+        """
+        Returns a tableau for another dimension with the same basis. Problem data
+        and vectors that are only ever reassigned are shared with this tableau,
+        and only the state that a pivot modifies in place is copied.
+        """
+        tableau = copy(self)
+        tableau.set_global_problem(self.global_problem)
+        tableau.dimension = dimension
+        tableau.copy_basis_state()
+        tableau.set_initial_pivot_column_index()
+        tableau.set_pivot_column()
+        return tableau
+
+    def set_initial_pivot_column_index(self):
+        "The variable of the tableau's dimension enters first, unless it is already basic"
+        dimension_index = self.non_basic_variable_positions[self.dimension]
+        if dimension_index >= 0:
+            self.pivot_column_index = dimension_index
+        else:
+            self.pivot_column_index = self.pricing_strategy.choose_entering(self.profit_row)
+
+    def copy_basis_state(self):
+        self.basic_variables = np.copy(self.basic_variables)
+        self.non_basic_variables = np.copy(self.non_basic_variables)
+        self.basic_variable_positions = np.copy(self.basic_variable_positions)
+        self.non_basic_variable_positions = np.copy(self.non_basic_variable_positions)
+        self.basis_factorisation = self.basis_factorisation.copy()
+        self.pricing_strategy = self.pricing_strategy.copy()
+        self.visited_bases = set(self.visited_bases)
 
     def initialise_problem_from_input_data(self):
         self.set_dimensions()
@@ -46,42 +113,257 @@ class Tableau():
     def initialise_basic_and_non_basic_variables(self):
         self.non_basic_variables = np.array(range(self.space_dimensions))
         self.basic_variables = np.array(range(self.space_dimensions, self.total_dimensions))
+        self.set_variable_positions()
+
+    def set_basis(self, basic_variables, non_basic_variables):
+        self.basic_variables = np.array(basic_variables)
+        self.non_basic_variables = np.array(non_basic_variables)
+        self.set_variable_positions()
+
+    def add_constraints(self):
+        """
+        Extends the basis after constraints have been added to the global
+        problem. The new slack variables are basic, so the vertex does not
+        move, but they are negative if the vertex violates the new constraints
+        """
+        old_total_dimensions = self.total_dimensions
+        self.update_problem_dimensions()
+        new_slack_variables = np.arange(old_total_dimensions, self.total_dimensions)
+        self.set_basis(np.concatenate((self.basic_variables, new_slack_variables)),
+                       self.non_basic_variables)
+        self.set_tableau_components()
+
+    def make_fixed_variables_non_basic(self):
+        """
+        Pivots the slack variable of each equality constraint out of the
+        basis. Equality constraints hold at the origin, so these slack
+        variables are zero and the pivots do not move the vertex. A slack
+        variable with no non-zero entry in its row belongs to a constraint
+        that the others already imply, and it stays basic at zero
+        """
+        for fixed_variable in np.flatnonzero(self.fixed_variable_filter):
+            pivot_row_index = self.basic_variable_positions[fixed_variable]
+            if pivot_row_index >= 0:
+                pivot_row, row_multipliers = self.pricing_strategy.get_pivot_row(self, pivot_row_index)
+                pivot_row = np.where(self.fixed_variable_filter[self.non_basic_variables], 0, pivot_row)
+                if np.max(abs(pivot_row)) > self.feasibility_tolerance:
+                    self.pivot_column_index = np.argmax(abs(pivot_row))
+                    self.pivot_row_index = pivot_row_index
+                    self.set_pivot_column()
+                    self.pivot()
+
+    def make_free_variables_basic(self):
+        """
+        Pivots each free variable into the basis, moving it in whichever
+        direction reaches the further vertex. A free variable that can move
+        without limit in either direction means x^Tx is unbounded
+        """
+        for free_variable in np.flatnonzero(self.free_variable_filter):
+            pivot_column_index = self.non_basic_variable_positions[free_variable]
+            if pivot_column_index >= 0:
+                self.pivot_column_index = pivot_column_index
+                self.set_pivot_column()
+                self.pivot_row_index = self.get_free_variable_pivot_row_index(free_variable)
+                self.pivot()
+
+    def get_free_variable_pivot_row_index(self, free_variable):
+        allowed_rows = ~self.free_variable_filter[self.basic_variables]
+        pivot_row_indices = []
+        steps = []
+        for direction in [1, -1]:
+            bounding_rows = np.flatnonzero(allowed_rows & (direction * self.pivot_column
+                                                           > self.feasibility_tolerance))
+            if len(bounding_rows) == 0:
+                raise Exception(f"Free variable {free_variable} is unbounded so the problem is unbounded")
+            ratios = self.values[bounding_rows] / abs(self.pivot_column[bounding_rows])
+            pivot_row_indices.append(bounding_rows[np.argmin(ratios)])
+            steps.append(np.min(ratios))
+        return pivot_row_indices[np.argmax(steps)]
+
+    def make_slack_variables_basic(self, slack_variables):
+        """
+        Pivots each of the given slack variables into the basis before their
+        constraints are removed. The slack variable is decreased, which moves
+        the vertex into the region the constraint was cutting off, and the
+        leaving row is found with the ratio test so the other variables stay
+        feasible when possible
+        """
+        for slack_variable in slack_variables:
+            if self.non_basic_variable_positions[slack_variable] >= 0:
+                self.pivot_column_index = self.non_basic_variable_positions[slack_variable]
+                self.set_pivot_column()
+                self.pivot_row_index = self.get_removal_pivot_row_index(slack_variables)
+                self.pivot()
+
+    def get_removal_pivot_row_index(self, slack_variables):
+        allowed_rows = (~np.isin(self.basic_variables, slack_variables)
+                        & ~self.free_variable_filter[self.basic_variables])
+        for direction in [-1, 1]:
+            bounding_rows = np.flatnonzero(allowed_rows & (direction * self.pivot_column
+                                                           > self.feasibility_tolerance))
+            if len(bounding_rows) > 0:
+                ratios = self.values[bounding_rows] / abs(self.pivot_column[bounding_rows])
+                return bounding_rows[np.argmin(ratios)]
+        allowed_rows = np.flatnonzero(allowed_rows)
+        return allowed_rows[np.argmax(abs(self.pivot_column[allowed_rows]))]
+
+    def remove_constraints(self, variable_map):
+        """
+        Shrinks the basis after constraints have been removed from the global
+        problem. The slack variables of the removed constraints must be basic,
+        and variable_map gives the new index of every old variable, or -1 for
+        the removed slack variables
+        """
+        basic_variables = variable_map[self.basic_variables]
+        basic_variables = basic_variables[basic_variables >= 0]
+        non_basic_variables = variable_map[self.non_basic_variables]
+        self.update_problem_dimensions()
+        self.set_basis(basic_variables, non_basic_variables)
+        self.set_tableau_components()
+
+    def update_problem_dimensions(self):
+        self.set_global_problem(self.global_problem)
+        self.set_dimensions()
+        self.set_spatial_and_non_spatial_variables()
+
+    def set_variable_positions(self):
+        """
+        Maps each variable to its row in the basis and its column in the
+        non-basis, with -1 when the variable is not in that set
+        """
+        self.basic_variable_positions = np.full(self.total_dimensions, -1)
+        self.non_basic_variable_positions = np.full(self.total_dimensions, -1)
+        self.basic_variable_positions[self.basic_variables] = np.arange(len(self.basic_variables))
+        self.non_basic_variable_positions[self.non_basic_variables] = np.arange(len(self.non_basic_variables))
 
     def set_tableau_data(self):
         self.values = np.copy(self.constraint_vector)
         self.profit = 0
-        self.tableau = np.concatenate((self.constraint_matrix,
-                                       np.identity(self.slack_dimensions)),
-                                      axis=1)
 
     def set_tableau_components(self):
         self.set_column_filtered_arrays()
-        self.A_basic_LU, self.A_permute = sc_la.lu_factor(self.A_basic)
+        self.global_problem.run_phase("factorisation", self.set_basis_factorisation)
+        self.set_pricing_strategy()
+        self.set_tableau_vectors()
+
+    def set_pricing_strategy(self):
+        self.pricing_strategy = get_pricing_strategy(self.global_problem.option_pricing, self,
+                                                     self.slack_dimensions, self.space_dimensions)
+
+    def set_basis_factorisation(self):
+        if np.array_equal(self.basic_variables, self.slack_variables):
+            self.basis_factorisation = BasisFactorisation()
+        else:
+            self.basis_factorisation = self.get_cached_basis_factorisation()
+
+    def get_cached_basis_factorisation(self):
+        factorisation_cache = self.global_problem.factorisation_cache
+        return factorisation_cache.get_factorisation(self.basic_variables, self.get_basis_matrix)
+
+    def update_tableau_components(self):
+        self.set_column_filtered_arrays()
+        self.global_problem.run_phase("factorisation", self.update_basis_factorisation)
+        self.set_tableau_vectors()
+
+    def update_basis_factorisation(self):
+        if self.global_problem.factorisation_cache.contains(self.basic_variables):
+            self.basis_factorisation = self.get_cached_basis_factorisation()
+        elif self.basis_factorisation.can_update(self.pivot_row_index, self.pivot_column):
+            self.basis_factorisation.update(self.pivot_row_index, self.pivot_column)
+        else:
+            self.basis_factorisation = self.get_cached_basis_factorisation()
+
+    def set_tableau_vectors(self):
         self.set_values()
         self.set_pivot_column()
         self.set_profit_row()
         self.profit = self.get_profit()
-    
+
     def set_column_filtered_arrays(self):
-        self.A_basic = self.tableau[:, self.basic_variables]
-        self.A_non_basic = self.tableau[:, self.non_basic_variables]
         self.c_basic = self.global_problem.profit_vector[self.basic_variables]
         self.c_non_basic = self.global_problem.profit_vector[self.non_basic_variables]
 
     def set_values(self):
-        self.values = sc_la.lu_solve((self.A_basic_LU, self.A_permute),
-                                         self.constraint_vector)
+        factorisation_cache = self.global_problem.factorisation_cache
+        self.values = factorisation_cache.get_values(self.basic_variables,
+                                                     self.global_problem.constraint_vector_key,
+                                                     self.basis_factorisation,
+                                                     self.constraint_vector)
     
+    def get_basis_matrix(self, basic_variables=None):
+        if basic_variables is None:
+            basic_variables = self.basic_variables
+        if sc_sparse.issparse(self.constraint_matrix):
+            basis_matrix = self.get_tableau_columns_sparse(basic_variables)
+        else:
+            basis_matrix = self.get_tableau_columns_dense(basic_variables)
+        return basis_matrix
+
+    def get_tableau_columns_dense(self, variables):
+        spatial_filter = (variables < self.space_dimensions)
+        slack_indices = np.flatnonzero(~spatial_filter)
+        columns = np.zeros((self.slack_dimensions, len(variables)))
+        columns[:, spatial_filter] = self.constraint_matrix[:, variables[spatial_filter]]
+        columns[variables[slack_indices] - self.space_dimensions, slack_indices] = 1
+        return columns
+
+    def get_tableau_columns_sparse(self, variables):
+        spatial_indices = np.flatnonzero(variables < self.space_dimensions)
+        slack_indices = np.flatnonzero(variables >= self.space_dimensions)
+        spatial_columns = self.constraint_matrix[:, variables[spatial_indices]].tocoo()
+        rows = np.concatenate((spatial_columns.row,
+                               variables[slack_indices] - self.space_dimensions))
+        columns = np.concatenate((spatial_indices[spatial_columns.col], slack_indices))
+        data = np.concatenate((spatial_columns.data, np.ones(len(slack_indices))))
+        shape = (self.slack_dimensions, len(variables))
+        return sc_sparse.csc_matrix((data, (rows, columns)), shape=shape)
+
+    def get_non_basic_matrix(self):
+        return self.get_tableau_columns(self.non_basic_variables)
+
+    def has_slack_basis(self):
+        return np.all(self.basic_variables >= self.space_dimensions)
+
+    def get_tableau_columns(self, variables):
+        if sc_sparse.issparse(self.constraint_matrix):
+            columns = self.get_tableau_columns_sparse(variables).toarray()
+        else:
+            columns = self.get_tableau_columns_dense(variables)
+        return columns
+
+    def get_tableau_column(self, variable):
+        if variable < self.space_dimensions:
+            column = self.constraint_matrix[:, variable]
+            if sc_sparse.issparse(column):
+                column = column.toarray().ravel()
+        else:
+            column = np.zeros(self.slack_dimensions)
+            column[variable - self.space_dimensions] = 1
+        return column
+
     def set_pivot_column(self):
-        pivot_column = self.A_non_basic[:, self.pivot_column_index]
-        self.pivot_column = sc_la.lu_solve((self.A_basic_LU, self.A_permute),
-                                               pivot_column)
+        entering_variable = self.non_basic_variables[self.pivot_column_index]
+        pivot_column = self.get_tableau_column(entering_variable)
+        self.pivot_column = self.basis_factorisation.solve(pivot_column)
 
     def set_profit_row(self):
-        intermediate_vector = sc_la.lu_solve((self.A_basic_LU, self.A_permute),
-                                             self.c_basic, trans = 1)
-        self.profit_row = self.c_non_basic - np.dot(np.transpose(self.A_non_basic),
-                                                    intermediate_vector)
+        intermediate_vector = self.basis_factorisation.solve_transpose(self.c_basic)
+        self.profit_row = self.c_non_basic - self.get_non_basic_transpose_product(intermediate_vector)
+        self.clear_fixed_profit_row()
+
+    def clear_fixed_profit_row(self):
+        "Fixed variables can never enter the basis so their entries are -inf"
+        self.profit_row[self.fixed_variable_filter[self.non_basic_variables]] = -np.inf
+
+    def get_non_basic_transpose_product(self, vector):
+        "Returns A_N^T vector"
+        tableau_product = self.get_tableau_transpose_product(vector)
+        return tableau_product[self.non_basic_variables]
+
+    def get_tableau_transpose_product(self, vector):
+        "Returns [A | I]^T vector without forming the slack columns"
+        spatial_product = self.constraint_matrix.T @ vector
+        return np.concatenate((spatial_product, vector))
 
     def get_profit(self):
         profit = np.dot(self.c_basic, self.values)
@@ -89,22 +371,28 @@ class Tableau():
 
     def get_potential_profit(self):
         theta_column = self.get_theta_column()
-        self.pivot_row_index = np.argmin(theta_column)
+        if self.use_bland_rule():
+            self.pivot_row_index = self.get_bland_pivot_row_index(theta_column)
+        else:
+            self.pivot_row_index = np.argmin(theta_column)
         potential_profit = self.process_theta_column(theta_column)
         return potential_profit
 
     def get_theta_column(self):
-        self.set_pivot_column()
         valid_theta_array = self.get_valid_theta_array()
         pivot_column = np.where(valid_theta_array, self.pivot_column, 1)
-        theta_column = np.where(valid_theta_array, self.values/pivot_column, np.inf)
+        theta_column = np.where(valid_theta_array, np.maximum(self.values, 0)/pivot_column, np.inf)
         self.debug_theta_computation(theta_column, pivot_column, valid_theta_array)
         return theta_column
 
     def get_valid_theta_array(self):
-        pivot_column_sign = np.sign(np.around(self.pivot_column, 4)).astype('int')
-        value_column_sign = np.sign(np.around(self.values, 4)).astype('int')
-        valid_theta_array = self.valid_theta_signs[pivot_column_sign, value_column_sign]
+        """
+        Every row that decreases as the entering variable increases bounds
+        the step, except the rows of free variables. Values that have drifted
+        below zero are treated as zero so that the step is never negative
+        """
+        valid_theta_array = (self.pivot_column > self.feasibility_tolerance)
+        valid_theta_array &= ~self.free_variable_filter[self.basic_variables]
         return valid_theta_array
 
     def debug_theta_computation(self, theta_column, pivot_column_valid, valid_theta_array):
@@ -128,78 +416,263 @@ class Tableau():
     def compute_potential_profit(self):
         self.pivot_value = self.pivot_column[self.pivot_row_index]
         potential_values = self.get_potential_values()
-        potential_profit = math.sqrt(sum(np.array(potential_values)**2))
+        potential_profit = math.sqrt(np.sum(potential_values**2))
         return potential_profit
 
     def get_potential_values(self):
-        potential_values = [self.get_potential_value(spatial_variable)
-                            for spatial_variable in self.spatial_variables]
+        potential_values = np.zeros(self.space_dimensions)
+        self.set_potential_spatial_basic_values(potential_values)
+        entering_variable = self.non_basic_variables[self.pivot_column_index]
+        if entering_variable < self.space_dimensions:
+            potential_values[entering_variable] = self.values[self.pivot_row_index] / self.pivot_value
         return potential_values
 
-    def get_potential_value(self, spatial_variable):
-        if spatial_variable == self.non_basic_variables[self.pivot_column_index]:
-            value = self.values[self.pivot_row_index] / self.pivot_column[self.pivot_row_index]
-        elif spatial_variable in self.basic_variables:
-            value = self.get_potential_spatial_basic_value(spatial_variable)
-        else:
-            value = 0
-        return value
-
-    def get_potential_spatial_basic_value(self, spatial_variable):
-        basic_variable_index = np.where(self.basic_variables == spatial_variable)[0][0]
-        multiplier = self.pivot_column[basic_variable_index] / self.pivot_column[self.pivot_row_index]
-        value = self.values[basic_variable_index] - multiplier * self.values[self.pivot_row_index]
-        return value
+    def set_potential_spatial_basic_values(self, potential_values):
+        rows = self.basic_variable_positions[self.spatial_variables]
+        basic_filter = (rows >= 0)
+        rows = rows[basic_filter]
+        multipliers = self.pivot_column[rows] / self.pivot_value
+        potential_values[basic_filter] = (self.values[rows]
+                                          - multipliers * self.values[self.pivot_row_index])
+
+    def use_bland_rule(self):
+        return (self.basis_repeated
+                or self.consecutive_degenerate_pivots >= self.global_problem.option_degenerate_pivot_limit)
+
+    def get_bland_pivot_row_index(self, theta_column):
+        "Of the rows that tie in the ratio test, the one with the lowest basic variable"
+        tied_rows = np.flatnonzero(theta_column <= np.min(theta_column) + self.degenerate_tolerance)
+        return tied_rows[np.argmin(self.basic_variables[tied_rows])]
+
+    def get_bland_pivot_column_index(self):
+        "Of the columns that improve the profit, the one with the lowest non basic variable"
+        candidates = np.flatnonzero(self.profit_row > 0.0001)
+        if len(candidates) == 0:
+            return np.argmax(self.profit_row)
+        return candidates[np.argmin(self.non_basic_variables[candidates])]
 
     def pivot(self):
+        self.record_degeneracy()
+        self.global_problem.solve_stats.record_pivot(self.last_pivot_degenerate)
+        self.pricing_strategy.update(self, self.pivot_row_index,
+                                     self.pivot_column_index, self.pivot_column)
+        self.visited_bases.add(self.get_basis_key(self.basic_variables))
         self.update_basic_and_non_basic_variables()
-        self.set_tableau_components()
+        self.check_for_repeated_basis()
+        self.update_tableau_components()
+
+    def record_degeneracy(self):
+        "A pivot is degenerate when the value of the leaving variable is zero, so the vertex does not move"
+        self.last_pivot_degenerate = (abs(self.values[self.pivot_row_index]) < self.degenerate_tolerance)
+        if self.last_pivot_degenerate:
+            self.consecutive_degenerate_pivots += 1
+        else:
+            self.consecutive_degenerate_pivots = 0
+
+    def get_basis_key(self, basic_variables):
+        return np.sort(basic_variables).tobytes()
+
+    def check_for_repeated_basis(self):
+        "Returning to an earlier basis means the pivots are cycling"
+        if self.get_basis_key(self.basic_variables) in self.visited_bases:
+            self.basis_repeated = True
+
+    def pivot_revisits_basis(self):
+        "Whether the chosen pivot returns the tableau to a basis it has already had"
+        basic_variables = np.copy(self.basic_variables)
+        basic_variables[self.pivot_row_index] = self.non_basic_variables[self.pivot_column_index]
+        return self.get_basis_key(basic_variables) in self.visited_bases
 
     def update_basic_and_non_basic_variables(self):
         exiting_variable = self.basic_variables[self.pivot_row_index]
         entering_variable = self.non_basic_variables[self.pivot_column_index]
         self.basic_variables[self.pivot_row_index] = entering_variable
         self.non_basic_variables[self.pivot_column_index] = exiting_variable
+        self.basic_variable_positions[entering_variable] = self.pivot_row_index
+        self.basic_variable_positions[exiting_variable] = -1
+        self.non_basic_variable_positions[exiting_variable] = self.pivot_column_index
+        self.non_basic_variable_positions[entering_variable] = -1
+        self.last_entering_variable = entering_variable
+        self.last_exiting_variable = exiting_variable
+
+    def forget_last_pivot(self):
+        """
+        Used when the tableau has been changed from outside the algorithm, as
+        the last pivot is then no longer one that can be reversed and removing
+        a constraint renumbers the variables after its slack variable. The
+        bases visited so far are forgotten for the same reason
+        """
+        self.last_entering_variable = -1
+        self.last_exiting_variable = -1
+        self.visited_bases = set()
+        self.basis_repeated = False
 
     def set_pivot_column_index(self):
-        self.pivot_column_index = np.argmax(self.profit_row)
-        self.set_pivot_column_index_to_dimension()
+        self.choose_pivot_column_index()
         self.check_if_problem_solved()
 
+    def choose_pivot_column_index(self):
+        if self.use_bland_rule():
+            self.pivot_column_index = self.get_bland_pivot_column_index()
+        else:
+            if self.global_problem.option_lookahead:
+                self.pivot_column_index = self.get_lookahead_pivot_column_index()
+            else:
+                self.pivot_column_index = self.pricing_strategy.choose_entering(self.profit_row)
+                if self.pricing_strategy.prefer_dimension:
+                    self.set_pivot_column_index_to_dimension()
+            if self.reverses_last_pivot():
+                self.set_pivot_column_index_without_reversal()
+        self.set_pivot_column()
+
+    def reverses_last_pivot(self):
+        """
+        Undoing the last pivot moves the profit vector back with the vertex,
+        so the two vertices can then alternate forever
+        """
+        entering_variable = self.non_basic_variables[self.pivot_column_index]
+        return entering_variable == self.last_exiting_variable
+
+    def set_pivot_column_index_without_reversal(self):
+        """
+        Chooses the best other column if one improves the profit. Otherwise
+        the last pivot is undone, and if that returns to the earlier basis
+        the tableau uses Bland's rule from then on
+        """
+        profit_row = np.copy(self.profit_row)
+        profit_row[self.pivot_column_index] = -np.inf
+        if np.max(profit_row) > 0.0001:
+            self.pivot_column_index = np.argmax(profit_row)
+
+    def get_lookahead_pivot_column_index(self):
+        """
+        Evaluates the ratio test and the resulting value of x^Tx for every
+        improving non-basic column with one multi right hand side solve, and
+        returns the column that moves the point furthest. This takes the place
+        of the preference for the tableau's own dimension
+        """
+        candidates = np.flatnonzero(self.profit_row > 0.0001)
+        entering_variables = self.non_basic_variables[candidates]
+        pivot_columns = self.basis_factorisation.solve(self.get_tableau_columns(entering_variables))
+        potential_profits = self.get_lookahead_potential_profits(entering_variables, pivot_columns)
+        if np.all(potential_profits == -np.inf):
+            pivot_column_index = self.pricing_strategy.choose_entering(self.profit_row)
+        else:
+            pivot_column_index = candidates[np.argmax(potential_profits)]
+        return pivot_column_index
+
+    def get_lookahead_potential_profits(self, entering_variables, pivot_columns):
+        values = np.maximum(self.values, 0)[:, np.newaxis]
+        valid_theta_array = (pivot_columns > self.feasibility_tolerance)
+        valid_theta_array &= ~self.free_variable_filter[self.basic_variables, np.newaxis]
+        pivot_columns_valid = np.where(valid_theta_array, pivot_columns, 1)
+        theta_columns = np.where(valid_theta_array, values / pivot_columns_valid, np.inf)
+        theta = np.min(theta_columns, axis=0)
+        potential_positions = self.get_lookahead_potential_positions(entering_variables,
+                                                                     pivot_columns, theta)
+        potential_profits = np.sqrt(np.sum(potential_positions**2, axis=0))
+        potential_profits = np.where(theta == np.inf, -np.inf, potential_profits)
+        return potential_profits
+
+    def get_lookahead_potential_positions(self, entering_variables, pivot_columns, theta):
+        bounded_theta = np.where(theta == np.inf, 0, theta)
+        potential_positions = np.zeros((self.space_dimensions, len(entering_variables)))
+        rows = self.basic_variable_positions[self.spatial_variables]
+        basic_filter = (rows >= 0)
+        rows = rows[basic_filter]
+        potential_positions[basic_filter] = (self.values[rows, np.newaxis]
+                                             - pivot_columns[rows] * bounded_theta)
+        entering_spatial = np.flatnonzero(entering_variables < self.space_dimensions)
+        potential_positions[entering_variables[entering_spatial], entering_spatial] = bounded_theta[entering_spatial]
+        return potential_positions
+
     def set_pivot_column_index_to_dimension(self):
-        if self.dimension in self.non_basic_variables:
-            dimension_index = np.where(self.non_basic_variables == self.dimension)[0][0]
+        dimension_index = self.non_basic_variable_positions[self.dimension]
+        if dimension_index >= 0:
             if self.profit_row[dimension_index] > -0.0001:
                 self.pivot_column_index = dimension_index
 
     def check_if_problem_solved(self):
-        if self.profit_row[self.pivot_column_index] <= 0.0001:
+        if not self.has_improving_column():
             self.global_problem.solved_status = "Optimal"
 
+    def has_improving_column(self):
+        return np.any(self.profit_row > 0.0001)
+
+    def has_zero_profit_column(self):
+        return np.any(np.abs(self.profit_row) <= 0.0001)
+
+    def repair_feasibility(self):
+        """
+        Performs dual simplex pivots until no value is negative, which happens
+        when a warm started basis is used with a different constraint vector.
+        Returns False if the basis could not be made feasible
+        """
+        for pivot_count in range(self.total_dimensions):
+            if np.all(self.get_bounded_values() >= -self.feasibility_tolerance):
+                return True
+            if not self.dual_simplex_pivot():
+                return False
+        return np.all(self.get_bounded_values() >= -self.feasibility_tolerance)
+
+    def get_bounded_values(self):
+        "The values with the free variables replaced by zero, as they may be negative"
+        return np.where(self.free_variable_filter[self.basic_variables], 0, self.values)
+
+    def dual_simplex_pivot(self):
+        pivot_row_index = np.argmin(self.get_bounded_values())
+        pivot_row, row_multipliers = self.pricing_strategy.get_pivot_row(self, pivot_row_index)
+        candidates = np.flatnonzero((pivot_row < -self.feasibility_tolerance)
+                                    & ~self.fixed_variable_filter[self.non_basic_variables])
+        if len(candidates) == 0:
+            return False
+        ratios = self.profit_row[candidates] / pivot_row[candidates]
+        self.pivot_column_index = candidates[np.argmin(ratios)]
+        self.pivot_row_index = pivot_row_index
+        self.set_pivot_column()
+        self.pivot()
+        return True
+
     def compute_partial_position(self):
         self.set_line_of_movement()
         self.find_hypersphere_intersection()
 
     def set_line_of_movement(self):
-        self.line_reference_vector = self.get_line_reference_vector()
+        self.line_reference_vector = self.get_vertex_position()
         self.set_line_direction_vector()
-        
-    def get_line_reference_vector(self):
-        reference_vector = np.array([self.get_spatial_variable_value(dimension)
-                                     for dimension in range(self.space_dimensions)])
-        return reference_vector
-
-    def get_spatial_variable_value(self, dimension):
-        if dimension in self.basic_variables:
-            index = self.basic_variables.index(dimension)
-            value = self.basic_variables[index]
-        else:
-            value = 0
-        return value
 
     def set_line_direction_vector(self):
+        """
+        Increasing the entering variable by t moves the basic variables to
+        x_B - t * A_B^{-1} a_q, so the spatial components of the direction are
+        read off the pivot column rather than found from a null space
+        """
+        direction_vector = np.zeros(self.space_dimensions)
+        spatial_rows = np.flatnonzero(self.basic_variables < self.space_dimensions)
+        direction_vector[self.basic_variables[spatial_rows]] = -self.pivot_column[spatial_rows]
+        entering_variable = self.non_basic_variables[self.pivot_column_index]
+        if entering_variable < self.space_dimensions:
+            direction_vector[entering_variable] = 1
+        self.line_direction_vector = direction_vector
+        self.check_line_direction_vector()
+
+    def check_line_direction_vector(self):
+        if np.allclose(self.line_direction_vector, 0) or self.debug_direction:
+            direction_vector = np.copy(self.line_direction_vector)
+            self.set_line_direction_vector_null_space()
+            self.debug_direction_computation(direction_vector)
+
+    def debug_direction_computation(self, direction_vector):
+        if self.debug_direction:
+            print((f"Debugging direction computation for dimension {self.dimension}\n"
+                   f"From factorisation: {direction_vector}\n"
+                   f"From null space: {self.line_direction_vector}\n"))
+
+    def set_line_direction_vector_null_space(self):
         constraint_indices = self.get_constraint_indices()
         constraint_matrix = self.space_constraints[constraint_indices, :]
+        if sc_sparse.issparse(constraint_matrix):
+            constraint_matrix = constraint_matrix.toarray()
         null_space = sc_la.null_space(constraint_matrix)
         self.check_null_space(null_space)
         self.line_direction_vector = null_space[:, 0]
@@ -217,9 +690,13 @@ class Tableau():
 
     def find_hypersphere_intersection(self):
         reference_abs, direction_abs, cross_term = self.get_vector_quantities()
-        position_parameters = self.get_position_parameters(reference_abs, direction_abs, cross_term)
-        position_plus, position_minus = self.get_positions(position_parameters)
-        self.set_partial_position(position_plus, position_minus)
+        discriminant = self.get_discriminant(reference_abs, direction_abs, cross_term)
+        if discriminant < 0:
+            self.reject_hypersphere_step()
+        else:
+            position_parameters = self.get_position_parameters(discriminant, direction_abs, cross_term)
+            position_plus, position_minus = self.get_positions(position_parameters)
+            self.set_partial_position(position_plus, position_minus)
 
     def get_vector_quantities(self):
         reference_abs = np.dot(self.line_reference_vector, self.line_reference_vector)
@@ -227,8 +704,8 @@ class Tableau():
         cross_term = np.dot(self.line_reference_vector, self.line_direction_vector)
         return reference_abs, direction_abs, cross_term
 
-    def get_position_parameters(self, reference_abs, direction_abs, cross_term):
-        discriminant = self.get_discriminant(reference_abs, direction_abs, cross_term)
+    def get_position_parameters(self, discriminant, direction_abs, cross_term):
+        discriminant = math.sqrt(discriminant)
         position_parameter_plus = (-1*cross_term + discriminant) / direction_abs
         position_parameter_minus = (-1*cross_term - discriminant) / direction_abs
         return (position_parameter_plus, position_parameter_minus)
@@ -237,9 +714,12 @@ class Tableau():
         discriminant = (cross_term**2
                         - reference_abs * direction_abs
                         + direction_abs * self.global_problem.profit**2)
-        discriminant = math.sqrt(discriminant)
         return discriminant
 
+    def reject_hypersphere_step(self):
+        "The line of movement does not meet the hypersphere where x is feasible, so the partial position is the vertex"
+        self.partial_position = np.copy(self.line_reference_vector)
+
     def get_positions(self, position_parameters):
         position_parameter_plus, position_parameter_minus = position_parameters
         position_plus = self.line_reference_vector + position_parameter_plus * self.line_direction_vector
@@ -247,12 +727,13 @@ class Tableau():
         return position_plus, position_minus
 
     def set_partial_position(self, position_plus, position_minus):
-        if np.all(position_plus > -0.00001):
+        bounded_filter = ~self.free_variable_filter[self.spatial_variables]
+        if np.all(position_plus[bounded_filter] > -0.00001):
             self.partial_position = position_plus
-        elif np.all(position_minus > -0.00001):
+        elif np.all(position_minus[bounded_filter] > -0.00001):
             self.partial_position = position_minus
         else:
-            raise Exception(f"Neither intersections with hypersphere are positive for dimension {self.dimension}")
+            self.reject_hypersphere_step()
 
     def output_all(self):
         self.output_basic_and_non_basic_variables()
@@ -281,14 +762,14 @@ class Tableau():
         print("")
 
     def get_vertex_position(self):
-        vertex_position = [self.get_spatial_variable_value(dimension)
-                           for dimension in self.spatial_variables]
-        vertex_position = np.array(vertex_position)
+        rows = self.basic_variable_positions[self.spatial_variables]
+        vertex_position = np.where(rows >= 0, self.values[rows], 0)
         return vertex_position
     
     def get_spatial_variable_value(self, spatial_variable):
-        if spatial_variable in self.basic_variables:
-            value = self.values[self.basic_variables == spatial_variable][0]
+        row = self.basic_variable_positions[spatial_variable]
+        if row >= 0:
+            value = self.values[row]
         else:
             value = 0
         return value
@@ -0,0 +1,145 @@
+import numpy as np
+
+class TableauBatch():
+
+    """
+    Evaluates the same step of the algorithm for several tableaux at once.
+
+    Each tableau already holds the factorisation of its basis and the pivot
+    column of its entering variable, so these are gathered rather than
+    recomputed. The ratio tests and potential vertex positions are then each
+    a single numpy operation on k by m arrays rather than k separate calls.
+    The profit rows need one solve for each distinct set of basic variables,
+    as tableaux at the same vertex share their duals, followed by a single
+    product with the constraint matrix. Only dense constraint matrices are
+    supported.
+    """
+
+    def __init__(self, global_problem, tableaux):
+        self.global_problem = global_problem
+        self.tableaux = tableaux
+        self.set_dimensions()
+        self.set_stacked_variables()
+
+    def set_dimensions(self):
+        self.space_dimensions = self.global_problem.space_dimensions
+        self.slack_dimensions = self.global_problem.slack_dimensions
+
+    def set_stacked_variables(self):
+        self.basic_variables = np.stack([tableau.basic_variables
+                                         for tableau in self.tableaux])
+        self.non_basic_variables = np.stack([tableau.non_basic_variables
+                                             for tableau in self.tableaux])
+        self.pivot_column_indices = np.array([tableau.pivot_column_index
+                                              for tableau in self.tableaux])
+        self.tableau_indices = np.arange(len(self.tableaux))
+
+    def get_potential_profits(self):
+        "Batched equivalent of calling get_potential_profit on every tableau"
+        self.set_pivot_columns()
+        theta_columns = self.get_theta_columns()
+        pivot_row_indices = self.get_pivot_row_indices(theta_columns)
+        potential_profits = self.get_potential_profits_from_theta(theta_columns, pivot_row_indices)
+        self.set_tableau_pivot_information(pivot_row_indices)
+        return potential_profits
+
+    def get_pivot_row_indices(self, theta_columns):
+        "Tableaux that are using Bland's rule choose their row with it"
+        pivot_row_indices = np.argmin(theta_columns, axis=1)
+        bland_indices = [index for index, tableau in enumerate(self.tableaux) if tableau.use_bland_rule()]
+        for index in bland_indices:
+            tableau = self.tableaux[index]
+            pivot_row_indices[index] = tableau.get_bland_pivot_row_index(theta_columns[index])
+        return pivot_row_indices
+
+    def set_pivot_columns(self):
+        "The pivot column of each tableau was found with its factorisation when its column was chosen"
+        self.entering_variables = self.non_basic_variables[self.tableau_indices,
+                                                           self.pivot_column_indices]
+        self.values = np.stack([tableau.values for tableau in self.tableaux])
+        self.pivot_columns = np.stack([tableau.pivot_column for tableau in self.tableaux])
+
+    def get_theta_columns(self):
+        valid_theta_array = self.get_valid_theta_array()
+        pivot_columns = np.where(valid_theta_array, self.pivot_columns, 1)
+        theta_columns = np.where(valid_theta_array, np.maximum(self.values, 0)/pivot_columns, np.inf)
+        return theta_columns
+
+    def get_valid_theta_array(self):
+        valid_theta_array = (self.pivot_columns > self.tableaux[0].feasibility_tolerance)
+        valid_theta_array &= ~self.global_problem.free_variable_filter[self.basic_variables]
+        return valid_theta_array
+
+    def get_potential_profits_from_theta(self, theta_columns, pivot_row_indices):
+        theta = theta_columns[self.tableau_indices, pivot_row_indices]
+        bounded = (theta != np.inf)
+        potential_positions = self.get_potential_positions(theta, pivot_row_indices)
+        potential_profits = np.sqrt(np.sum(potential_positions**2, axis=1))
+        potential_profits = np.where(bounded, potential_profits, -np.inf)
+        return potential_profits
+
+    def get_potential_positions(self, theta, pivot_row_indices):
+        pivot_values = self.pivot_columns[self.tableau_indices, pivot_row_indices]
+        pivot_row_values = self.values[self.tableau_indices, pivot_row_indices]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            multipliers = self.pivot_columns / pivot_values[:, np.newaxis]
+            potential_values = self.values - multipliers * pivot_row_values[:, np.newaxis]
+        potential_positions = np.zeros((len(self.tableaux), self.space_dimensions))
+        tableau_indices, row_indices = np.nonzero(self.basic_variables < self.space_dimensions)
+        spatial_variables = self.basic_variables[tableau_indices, row_indices]
+        potential_positions[tableau_indices, spatial_variables] = potential_values[tableau_indices, row_indices]
+        self.set_entering_potential_positions(potential_positions, theta)
+        return potential_positions
+
+    def set_entering_potential_positions(self, potential_positions, theta):
+        entering_spatial = np.flatnonzero((self.entering_variables < self.space_dimensions)
+                                          & (theta != np.inf))
+        entering_variables = self.entering_variables[entering_spatial]
+        potential_positions[entering_spatial, entering_variables] = theta[entering_spatial]
+
+    def set_tableau_pivot_information(self, pivot_row_indices):
+        for tableau, pivot_row_index in zip(self.tableaux, pivot_row_indices):
+            tableau.pivot_row_index = pivot_row_index
+            tableau.pivot_value = tableau.pivot_column[pivot_row_index]
+
+    def set_profit_rows(self):
+        "Batched equivalent of calling set_profit_row on every tableau"
+        profit_vector = self.global_problem.profit_vector
+        c_basic = profit_vector[self.basic_variables]
+        c_non_basic = profit_vector[self.non_basic_variables]
+        intermediate_vectors = self.get_intermediate_vectors(c_basic)
+        tableau_products = self.get_tableau_transpose_products(intermediate_vectors)
+        profit_rows = c_non_basic - np.take_along_axis(tableau_products,
+                                                       self.non_basic_variables, axis=1)
+        self.set_tableau_profit_information(c_basic, c_non_basic, profit_rows)
+
+    def get_intermediate_vectors(self, c_basic):
+        """
+        A_B^{-T} c_B only depends on the set of basic variables, as every
+        tableau shares the profit vector, so it is solved once for each basis
+        """
+        intermediate_vectors = np.empty((len(self.tableaux), self.slack_dimensions))
+        for tableau_indices in self.get_shared_basis_groups():
+            tableau = self.tableaux[tableau_indices[0]]
+            intermediate_vector = tableau.basis_factorisation.solve_transpose(c_basic[tableau_indices[0]])
+            intermediate_vectors[tableau_indices] = intermediate_vector
+        return intermediate_vectors
+
+    def get_shared_basis_groups(self):
+        "Groups the tableaux by their set of basic variables"
+        sorted_basic_variables = np.sort(self.basic_variables, axis=1)
+        _, group_labels = np.unique(sorted_basic_variables, axis=0, return_inverse=True)
+        group_labels = group_labels.ravel()
+        return [np.flatnonzero(group_labels == label) for label in np.unique(group_labels)]
+
+    def get_tableau_transpose_products(self, vectors):
+        "Returns [A | I]^T vector for each of the stacked vectors"
+        spatial_products = vectors @ self.global_problem.constraint_matrix
+        return np.concatenate((spatial_products, vectors), axis=1)
+
+    def set_tableau_profit_information(self, c_basic, c_non_basic, profit_rows):
+        for index, tableau in enumerate(self.tableaux):
+            tableau.c_basic = c_basic[index]
+            tableau.c_non_basic = c_non_basic[index]
+            tableau.profit_row = profit_rows[index]
+            tableau.clear_fixed_profit_row()
@@ -0,0 +1,72 @@
+import numpy as np
+
+class TraceRecorder():
+
+    """
+    Records a fixed set of named arrays once per iteration of a solve.
+
+    The fields and their shapes are taken from the first record. Each field
+    has a buffer of initial_size records, which is doubled when it fills
+    until it holds capacity records, so a short solve does not allocate the
+    whole capacity and recording an iteration usually only copies into
+    arrays that already exist. When the buffers hold capacity records the
+    oldest records are overwritten. record_count is the number of records
+    made, which is more than the number kept once the buffers have wrapped
+    around.
+
+    get_records returns the kept records oldest first, and save writes them
+    to a .npz file with one array per field.
+    """
+
+    capacity = 1000
+    initial_size = 16
+
+    def __init__(self, capacity=None):
+        if capacity is not None:
+            self.capacity = capacity
+        self.buffers = None
+        self.record_count = 0
+
+    def record(self, **fields):
+        if self.buffers is None:
+            self.set_buffers(fields)
+        elif self.record_count == self.buffer_size < self.capacity:
+            self.grow_buffers()
+        index = self.record_count % self.capacity
+        for name, value in fields.items():
+            self.buffers[name][index] = value
+        self.record_count += 1
+
+    def set_buffers(self, fields):
+        self.buffer_size = min(self.initial_size, self.capacity)
+        self.buffers = {}
+        for name, value in fields.items():
+            value = np.asarray(value)
+            self.buffers[name] = np.empty((self.buffer_size,) + value.shape, dtype=value.dtype)
+
+    def grow_buffers(self):
+        old_size = self.buffer_size
+        self.buffer_size = min(2*old_size, self.capacity)
+        for name, buffer in self.buffers.items():
+            grown_buffer = np.empty((self.buffer_size,) + buffer.shape[1:], dtype=buffer.dtype)
+            grown_buffer[:old_size] = buffer
+            self.buffers[name] = grown_buffer
+
+    def get_kept_count(self):
+        return min(self.record_count, self.capacity)
+
+    def get_records(self):
+        "Returns a copy of each field with the kept records in the order they were made"
+        if self.buffers is None:
+            return {}
+        kept_count = self.get_kept_count()
+        order = (np.arange(kept_count) + self.record_count - kept_count) % self.capacity
+        return {name: buffer[order] for name, buffer in self.buffers.items()}
+
+    def save(self, path):
+        np.savez(path, **self.get_records())
+
+    def __str__(self):
+        string = (f"Records: {self.get_kept_count()} kept of {self.record_count}\n"
+                  f"Fields: {', '.join(self.buffers) if self.buffers is not None else ''}\n")
+        return string
@@ -0,0 +1,48 @@
+import numpy as np
+
+class WarmStart():
+
+    """
+    The state of a QuadraticSimplex problem that another solve can start
+    from: the bases, pivot columns, vertex positions and partial positions of
+    the remaining tableaux, along with the global profit information.
+
+    Row i of each array belongs to the tableau for dimensions[i]. Tableaux
+    that were merged away are not included.
+    """
+
+    def __init__(self, dimensions, basic_variables, non_basic_variables, pivot_column_indices,
+                 vertex_positions, partial_positions, profit_normal, profit, solved_status):
+        self.dimensions = dimensions
+        self.basic_variables = basic_variables
+        self.non_basic_variables = non_basic_variables
+        self.pivot_column_indices = pivot_column_indices
+        self.vertex_positions = vertex_positions
+        self.partial_positions = partial_positions
+        self.profit_normal = profit_normal
+        self.profit = profit
+        self.solved_status = solved_status
+
+    @classmethod
+    def from_problem(cls, problem):
+        tableaux = problem.tableaux
+        vertex_positions = np.vstack([tableau.get_vertex_position() for tableau in tableaux])
+        partial_positions = np.vstack([getattr(tableau, "partial_position", vertex_position)
+                                       for tableau, vertex_position in zip(tableaux, vertex_positions)])
+        warm_start = cls(np.array([tableau.dimension for tableau in tableaux]),
+                         np.vstack([tableau.basic_variables for tableau in tableaux]),
+                         np.vstack([tableau.non_basic_variables for tableau in tableaux]),
+                         np.array([tableau.pivot_column_index for tableau in tableaux]),
+                         vertex_positions,
+                         partial_positions,
+                         np.copy(problem.profit_vector[:problem.space_dimensions]),
+                         problem.profit,
+                         problem.solved_status)
+        return warm_start
+
+    def check_dimensions(self, space_dimensions, slack_dimensions):
+        if (self.basic_variables.shape[1] != slack_dimensions
+            or self.non_basic_variables.shape[1] != space_dimensions):
+            raise Exception((f"Warm start is for {self.non_basic_variables.shape[1]} space and "
+                             f"{self.basic_variables.shape[1]} slack dimensions, but the problem has "
+                             f"{space_dimensions} and {slack_dimensions}"))
@@ -0,0 +1,93 @@
+import itertools
+import numpy as np
+from scipy.optimize import linprog
+
+def get_example_problems():
+    "Problems from the examples in QuadraticSimplexV1.0.py"
+    problems = [(np.array([[3, 2], [-12, 13], [1, -3], [6, 5]]), np.array([55, 13, 2, 120])),
+                (np.array([[-3, 1], [3, 5], [1, -3], [9, 8]]), np.array([3, 90, 2, 180])),
+                (np.array([[-6, 1], [1, 2], [7, 4]]), np.array([3, 20, 70])),
+                (np.array([[-1, 4], [6, 5], [7, 1], [5, 2]]), np.array([26, 76, 70, 53]))]
+    return [(constraint_matrix.astype(float), constraint_vector.astype(float))
+            for constraint_matrix, constraint_vector in problems]
+
+def get_random_problem(rng, constraint_count, space_dimensions):
+    "Unit constraint normals in the positive orthant, as in the example in QuadraticSimplexV1.0.py"
+    constraint_matrix = rng.random((constraint_count, space_dimensions))
+    constraint_matrix = constraint_matrix / np.linalg.norm(constraint_matrix, axis=1).reshape(-1, 1)
+    constraint_vector = rng.random(constraint_count)/3 + 0.7
+    return constraint_matrix, constraint_vector
+
+def get_random_problems():
+    "Random problems that every pricing strategy solves to the largest vertex"
+    rng = np.random.default_rng(5)
+    return [get_random_problem(rng, constraint_count, space_dimensions)
+            for constraint_count, space_dimensions in ((8, 2), (15, 3))]
+
+def get_problems():
+    return get_example_problems() + get_random_problems()
+
+def get_random_mixed_problems(seed, count):
+    """
+    Alternately problems with constraint normals of either sign, bounded by
+    a row of ones, and problems with unit normals in the positive orthant
+    """
+    rng = np.random.default_rng(seed)
+    problems = []
+    for index in range(count):
+        space_dimensions = int(rng.integers(2, 5))
+        constraint_count = int(rng.integers(space_dimensions + 1, 13))
+        if index % 2:
+            problems.append(get_random_problem(rng, constraint_count, space_dimensions))
+        else:
+            constraint_matrix = rng.normal(size=(constraint_count, space_dimensions))
+            constraint_vector = rng.random(constraint_count) + 0.5
+            problems.append((np.vstack((constraint_matrix, np.ones((1, space_dimensions)))),
+                             np.append(constraint_vector, 3.0)))
+    return problems
+
+def get_vertices(constraint_matrix, constraint_vector, equality_rows=(), free_variables=()):
+    "Every vertex of Ax <= b with x >= 0 except on free variables, found by brute force"
+    constraint_matrix = np.asarray(constraint_matrix, dtype=float)
+    constraint_vector = np.asarray(constraint_vector, dtype=float)
+    space_dimensions = constraint_matrix.shape[1]
+    bounded_variables = [variable for variable in range(space_dimensions)
+                         if variable not in free_variables]
+    rows = np.vstack((constraint_matrix, -np.eye(space_dimensions)[bounded_variables]))
+    bounds = np.concatenate((constraint_vector, np.zeros(len(bounded_variables))))
+    vertices = []
+    for active_rows in itertools.combinations(range(len(rows)), space_dimensions):
+        active_rows = list(active_rows)
+        if abs(np.linalg.det(rows[active_rows])) < 1e-9:
+            continue
+        vertex = np.linalg.solve(rows[active_rows], bounds[active_rows])
+        feasible = np.all(rows @ vertex <= bounds + 1e-7)
+        equalities_hold = np.all(abs(constraint_matrix[list(equality_rows)] @ vertex
+                                     - constraint_vector[list(equality_rows)]) < 1e-7)
+        if feasible and equalities_hold:
+            vertices.append(vertex)
+    return np.array(vertices)
+
+def get_vertex_maximum(constraint_matrix, constraint_vector, equality_rows=(), free_variables=()):
+    "The largest x^Tx over the vertices, which is the maximum as x^Tx is convex"
+    vertices = get_vertices(constraint_matrix, constraint_vector, equality_rows, free_variables)
+    return np.max(np.sum(vertices**2, axis=1))
+
+def is_feasible(constraint_matrix, constraint_vector, point, tolerance=1e-7):
+    return (np.all(constraint_matrix @ point <= constraint_vector + tolerance)
+            and np.all(point >= -tolerance))
+
+def get_random_linear_problems(seed, count):
+    "Problems for LinearProblem with b > 0, so that the origin is feasible"
+    rng = np.random.default_rng(seed)
+    problems = []
+    for _ in range(count):
+        constraint_count, variable_count = rng.integers(3, 15), rng.integers(2, 8)
+        matrix = rng.normal(size=(constraint_count, variable_count))
+        b = rng.random(constraint_count) + 0.1
+        c = rng.normal(size=variable_count)
+        problems.append((matrix, b, c))
+    return problems
+
+def solve_with_linprog(matrix, b, c):
+    return linprog(-c, A_ub=matrix, b_ub=b, bounds=(0, None))
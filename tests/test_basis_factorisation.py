@@ -0,0 +1,64 @@
+import numpy as np
+import scipy.sparse as sc_sparse
+from BasisFactorisation import BasisFactorisation
+from BatchSolve import QuadraticSimplex
+from problems import get_problems
+
+def replace_columns(factorisation, basis_matrix, rng, update_count):
+    "Replaces random columns of the basis with random columns, updating the factorisation"
+    for _ in range(update_count):
+        index = rng.integers(len(basis_matrix))
+        column = rng.normal(size=len(basis_matrix))
+        factorisation.update(index, factorisation.solve(column))
+        basis_matrix[:, index] = column
+    return basis_matrix
+
+def test_eta_solves_match_dense_solves():
+    rng = np.random.default_rng(0)
+    basis_matrix = rng.normal(size=(6, 6))
+    factorisation = BasisFactorisation(basis_matrix)
+    basis_matrix = replace_columns(factorisation, np.copy(basis_matrix), rng, 5)
+    vector = rng.normal(size=6)
+    assert len(factorisation.eta_indices) == 5
+    assert np.allclose(factorisation.solve(vector), np.linalg.solve(basis_matrix, vector))
+    assert np.allclose(factorisation.solve_transpose(vector), np.linalg.solve(basis_matrix.T, vector))
+
+def test_eta_solves_accept_matrices():
+    rng = np.random.default_rng(1)
+    basis_matrix = rng.normal(size=(5, 5))
+    factorisation = BasisFactorisation(basis_matrix)
+    basis_matrix = replace_columns(factorisation, np.copy(basis_matrix), rng, 3)
+    vectors = rng.normal(size=(5, 4))
+    assert np.allclose(factorisation.solve(vectors), np.linalg.solve(basis_matrix, vectors))
+
+def test_identity_and_sparse_factorisations():
+    rng = np.random.default_rng(2)
+    vector = rng.normal(size=4)
+    assert np.allclose(BasisFactorisation().solve(vector), vector)
+    basis_matrix = rng.normal(size=(4, 4))
+    factorisation = BasisFactorisation(sc_sparse.csc_matrix(basis_matrix))
+    basis_matrix = replace_columns(factorisation, np.copy(basis_matrix), rng, 2)
+    assert np.allclose(factorisation.solve(vector), np.linalg.solve(basis_matrix, vector))
+
+def test_update_is_refused_after_interval_or_for_small_pivots():
+    factorisation = BasisFactorisation(np.eye(3))
+    assert not factorisation.can_update(0, np.array([0.0, 1.0, 1.0]))
+    for _ in range(factorisation.refactorisation_interval):
+        factorisation.update(0, np.array([1.0, 0.0, 0.0]))
+    assert not factorisation.can_update(0, np.array([1.0, 0.0, 0.0]))
+
+def test_copies_do_not_share_eta_files():
+    factorisation = BasisFactorisation(np.eye(3))
+    factorisation_copy = factorisation.copy()
+    factorisation_copy.update(1, np.array([0.0, 2.0, 0.0]))
+    assert len(factorisation.eta_indices) == 0
+    assert np.allclose(factorisation_copy.solve(np.ones(3)), [1.0, 0.5, 1.0])
+
+def test_tableau_factorisations_match_their_bases_after_solving():
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        for tableau in problem.tableaux:
+            basis_matrix = np.asarray(tableau.get_basis_matrix())
+            assert np.allclose(tableau.basis_factorisation.solve(constraint_vector),
+                               np.linalg.solve(basis_matrix, constraint_vector))
@@ -0,0 +1,41 @@
+import numpy as np
+import scipy.sparse as sc_sparse
+from BatchSolve import BatchSolve, QuadraticSimplex
+from problems import get_problems
+
+def solve_batch(problems, options=None):
+    results = BatchSolve(problems, options, worker_count=2).solve()
+    return sorted(results, key=lambda result: result.index)
+
+def test_batch_results_match_direct_solves():
+    problems = get_problems()
+    results = solve_batch(problems)
+    assert [result.index for result in results] == list(range(len(problems)))
+    for result, (constraint_matrix, constraint_vector) in zip(results, problems):
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        assert result.solved_status == problem.solved_status
+        assert np.isclose(result.profit, problem.profit)
+        assert result.iteration_count == problem.iteration_count
+        assert result.error is None
+
+def test_batch_accepts_generators_and_sparse_matrices():
+    problems = get_problems()
+    results = solve_batch((sc_sparse.csr_matrix(constraint_matrix), constraint_vector)
+                          for constraint_matrix, constraint_vector in problems * 3)
+    assert len(results) == 3 * len(problems)
+    assert all(result.solved_status == "Optimal" for result in results)
+
+def test_failed_problems_do_not_stop_the_batch():
+    problems = get_problems()[:2]
+    constraint_matrix, constraint_vector = problems[0]
+    problems.insert(1, (constraint_matrix, constraint_vector[:2]))
+    results = solve_batch(problems)
+    assert [result.solved_status for result in results] == ["Optimal", "Failed", "Optimal"]
+    assert results[1].error is not None
+    assert results[1].profit is None
+
+def test_options_are_set_in_the_workers():
+    results = solve_batch(get_problems(), {"option_max_iterations": 1})
+    assert all(result.solved_status == "IterationLimit" for result in results)
+    assert all(result.iteration_count == 1 for result in results)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+import scipy.sparse as sc_sparse
+from BatchSolve import QuadraticSimplex
+from problems import get_problems, get_vertex_maximum, is_feasible
+
+def get_cut(problem):
+    "A constraint that cuts off the current vertex"
+    vertex_position = problem.updating_tableau.get_vertex_position()
+    normal = vertex_position / np.linalg.norm(vertex_position)
+    return normal[np.newaxis, :], np.array([0.97 * np.dot(normal, vertex_position)])
+
+def get_point(problem):
+    return problem.updating_tableau.get_vertex_position()
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_added_constraints_are_satisfied_after_solving_again(sparse):
+    for constraint_matrix, constraint_vector in get_problems():
+        matrix = sc_sparse.csr_matrix(constraint_matrix) if sparse else constraint_matrix
+        problem = QuadraticSimplex(matrix, constraint_vector)
+        problem.solve()
+        profit = problem.profit
+        cut_matrix, cut_vector = get_cut(problem)
+        problem.add_constraints(cut_matrix, cut_vector)
+        problem.solve()
+        assert problem.solved_status == "Optimal"
+        assert problem.slack_dimensions == len(constraint_vector) + 1
+        assert is_feasible(np.vstack((constraint_matrix, cut_matrix)),
+                           np.concatenate((constraint_vector, cut_vector)), get_point(problem))
+        assert problem.profit < profit
+
+def test_constraint_changes_match_a_fresh_solve():
+    constraint_matrix, constraint_vector = get_problems()[0]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    cut_matrix, cut_vector = get_cut(problem)
+    problem.add_constraints(cut_matrix, cut_vector)
+    problem.solve()
+    assert np.isclose(problem.profit**2, get_vertex_maximum(np.vstack((constraint_matrix, cut_matrix)),
+                                                            np.concatenate((constraint_vector, cut_vector))))
+    problem.remove_constraints([len(constraint_vector)])
+    problem.solve()
+    assert np.isclose(problem.profit**2, get_vertex_maximum(constraint_matrix, constraint_vector))
+    problem.remove_constraints([0, 2])
+    problem.solve()
+    kept_matrix = np.delete(constraint_matrix, [0, 2], axis=0)
+    kept_vector = np.delete(constraint_vector, [0, 2])
+    assert problem.slack_dimensions == 2
+    assert np.array_equal(problem.constraint_vector, kept_vector)
+    assert np.isclose(problem.profit**2, get_vertex_maximum(kept_matrix, kept_vector))
+
+def test_removing_constraints_never_lowers_the_profit():
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        profit = problem.profit
+        problem.remove_constraints([1])
+        problem.solve()
+        assert problem.solved_status == "Optimal"
+        assert problem.profit >= profit - 1e-9
+
+def test_removing_a_constraint_moves_off_a_vertex_every_tableau_is_at():
+    """
+    After the cut and the equality row are removed both tableaux are at (5, 0),
+    where the edge along the second axis is at right angles to the point
+    """
+    constraint_matrix = np.array([[1.0, -1.0], [3.0, 2.0], [6.0, 5.0]])
+    constraint_vector = np.array([0.0, 55.0, 120.0])
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector, equality_rows=[0])
+    problem.solve()
+    problem.add_constraints(np.array([[1.0, 0.0]]), np.array([5.0]))
+    problem.solve()
+    problem.remove_constraints([0])
+    problem.solve()
+    assert problem.solved_status == "Optimal"
+    assert np.isclose(problem.profit**2, get_vertex_maximum(np.vstack((constraint_matrix[1:], [[1.0, 0.0]])),
+                                                            np.array([55.0, 120.0, 5.0])))
+
+def test_added_constraints_are_checked():
+    constraint_matrix, constraint_vector = get_problems()[0]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    with pytest.raises(Exception, match="must have 2 columns"):
+        problem.add_constraints(np.ones((1, 3)), [1.0])
+    with pytest.raises(Exception, match="origin feasible"):
+        problem.add_constraints(np.ones((1, 2)), [-1.0])
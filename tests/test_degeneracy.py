@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from BatchSolve import QuadraticSimplex
+from problems import get_problems, get_vertex_maximum, is_feasible
+
+def get_degenerate_problems():
+    "Constraints through the origin, as in the README's degenerate situations, and two bounding rows"
+    constraint_matrix = np.array([[1.0, -1.0, 0.0], [0.0, 1.0, -1.0], [1.0, 0.0, -1.0],
+                                  [1.0, -2.0, 0.5], [1.0, 1.0, 1.0], [2.0, 1.0, 1.0]])
+    return [(constraint_matrix, np.array([0.0, 0.0, 0.0, 0.0, 3.0 + shift, 4.0 + shift]))
+            for shift in range(3)]
+
+@pytest.mark.parametrize("degenerate_pivot_limit", [1000, 10, 2])
+def test_degenerate_problems_are_solved(monkeypatch, degenerate_pivot_limit):
+    monkeypatch.setattr(QuadraticSimplex, "option_degenerate_pivot_limit", degenerate_pivot_limit)
+    for constraint_matrix, constraint_vector in get_degenerate_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        assert problem.solved_status == "Optimal"
+        assert np.isclose(problem.profit**2, get_vertex_maximum(constraint_matrix, constraint_vector))
+        assert 0 < problem.degenerate_pivot_count <= problem.solve_stats.pivot_count
+
+def test_bland_rule_chooses_the_lowest_improving_variable(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_degenerate_pivot_limit", 2)
+    constraint_matrix, constraint_vector = get_degenerate_problems()[0]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    tableau = problem.tableaux[0]
+    tableau.profit_row = np.linspace(-1, 1, len(tableau.non_basic_variables))[::-1]
+    tableau.consecutive_degenerate_pivots = 2
+    tableau.choose_pivot_column_index()
+    improving_variables = tableau.non_basic_variables[tableau.profit_row > 0.0001]
+    assert tableau.non_basic_variables[tableau.pivot_column_index] == np.min(improving_variables)
+
+def test_consecutive_degenerate_pivots_are_counted():
+    constraint_matrix, constraint_vector = get_degenerate_problems()[0]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    pivots = []
+    def record_pivot(problem):
+        tableau = problem.updating_tableau
+        pivots.append((tableau.last_pivot_degenerate, tableau.consecutive_degenerate_pivots))
+    problem.set_iteration_hook(record_pivot)
+    problem.solve()
+    for degenerate, count in pivots:
+        assert degenerate == (count > 0)
+    assert any(degenerate for degenerate, _ in pivots)
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_perturbed_solves_satisfy_the_original_bounds(monkeypatch, seed):
+    monkeypatch.setattr(QuadraticSimplex, "option_perturbation", True)
+    monkeypatch.setattr(QuadraticSimplex, "perturbation_seed", seed)
+    for constraint_matrix, constraint_vector in get_degenerate_problems() + get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        assert np.all(problem.constraint_vector >= constraint_vector)
+        assert np.all(problem.constraint_vector <= constraint_vector
+                      + problem.perturbation_size * (1 + abs(constraint_vector)))
+        problem.solve()
+        assert problem.solved_status == "Optimal"
+        assert problem.unperturbed_constraint_vector is None
+        assert np.array_equal(problem.constraint_vector, constraint_vector)
+        assert is_feasible(constraint_matrix, constraint_vector, problem.updating_tableau.get_vertex_position())
+        assert problem.profit**2 <= get_vertex_maximum(constraint_matrix, constraint_vector) + 1e-7
+
+def test_equality_rows_are_not_perturbed(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_perturbation", True)
+    constraint_matrix = np.array([[1.0, -1.0], [3.0, 2.0], [6.0, 5.0]])
+    constraint_vector = np.array([0.0, 55.0, 120.0])
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector, equality_rows=[0])
+    assert problem.constraint_vector[0] == 0
+    problem.solve()
+    position = problem.updating_tableau.get_vertex_position()
+    assert np.isclose(position[0], position[1])
+    assert np.isclose(problem.profit**2, get_vertex_maximum(constraint_matrix, constraint_vector, [0]))
@@ -0,0 +1,104 @@
+import numpy as np
+from BatchSolve import QuadraticSimplex
+from FactorisationCache import FactorisationCache
+from SimplexAlgorithm import LinearProblem
+from problems import get_problems, get_random_linear_problems
+
+def get_full_matrix(rng, size):
+    "A well conditioned constraint matrix with its slack columns"
+    matrix = rng.normal(size=(size, size)) + size * np.eye(size)
+    return np.hstack((matrix, np.eye(size)))
+
+def test_least_recently_used_entries_are_evicted():
+    cache = FactorisationCache(maximum_size=2)
+    full_matrix = get_full_matrix(np.random.default_rng(0), 2)
+    get_basis_matrix = lambda variables: full_matrix[:, variables]
+    cache.get_factorisation([0, 1], get_basis_matrix)
+    cache.get_factorisation([0, 2], get_basis_matrix)
+    cache.get_factorisation([0, 1], get_basis_matrix)
+    cache.get_factorisation([1, 3], get_basis_matrix)
+    assert cache.contains([0, 1])
+    assert not cache.contains([0, 2])
+    assert cache.contains([1, 3])
+    assert len(cache.factorisations) == 2
+
+def test_bases_are_only_factorised_once_and_counted():
+    cache = FactorisationCache()
+    full_matrix = get_full_matrix(np.random.default_rng(1), 3)
+    factorised_bases = []
+    def get_basis_matrix(variables):
+        factorised_bases.append(list(variables))
+        return full_matrix[:, variables]
+    for basic_variables in ([0, 1, 2], [2, 0, 1], [1, 2, 0], [0, 1, 5]):
+        cache.get_factorisation(basic_variables, get_basis_matrix)
+    assert factorised_bases == [[0, 1, 2], [0, 1, 5]]
+    assert (cache.hits, cache.misses) == (2, 2)
+
+def test_shared_entries_are_given_the_column_order_of_the_basis():
+    rng = np.random.default_rng(2)
+    cache = FactorisationCache()
+    full_matrix = get_full_matrix(rng, 4)
+    get_basis_matrix = lambda variables: full_matrix[:, variables]
+    vector = rng.normal(size=4)
+    for basic_variables in ([1, 3, 4, 6], [6, 1, 4, 3], [4, 6, 3, 1]):
+        factorisation = cache.get_factorisation(basic_variables, get_basis_matrix)
+        basis_matrix = full_matrix[:, basic_variables]
+        assert np.allclose(factorisation.solve(vector), np.linalg.solve(basis_matrix, vector))
+        assert np.allclose(factorisation.solve_transpose(vector), np.linalg.solve(basis_matrix.T, vector))
+
+def test_updating_a_factorisation_leaves_the_cached_one_unchanged():
+    rng = np.random.default_rng(3)
+    cache = FactorisationCache()
+    full_matrix = get_full_matrix(rng, 3)
+    get_basis_matrix = lambda variables: full_matrix[:, variables]
+    factorisation = cache.get_factorisation([0, 1, 2], get_basis_matrix)
+    factorisation.update(0, factorisation.solve(full_matrix[:, 3]))
+    vector = rng.normal(size=3)
+    cached_factorisation = cache.get_factorisation([0, 1, 2], get_basis_matrix)
+    assert len(cached_factorisation.eta_indices) == 0
+    assert np.allclose(cached_factorisation.solve(vector), np.linalg.solve(full_matrix[:, :3], vector))
+
+def test_values_are_stored_for_each_basis_set_and_vector():
+    rng = np.random.default_rng(4)
+    cache = FactorisationCache()
+    full_matrix = get_full_matrix(rng, 3)
+    get_basis_matrix = lambda variables: full_matrix[:, variables]
+    vectors = [rng.normal(size=3) for _ in range(2)]
+    vector_keys = [cache.get_vector_key(vector) for vector in vectors]
+    for basic_variables in ([0, 2, 4], [4, 0, 2]):
+        factorisation = cache.get_factorisation(basic_variables, get_basis_matrix)
+        for vector, vector_key in zip(vectors, vector_keys):
+            values = cache.get_values(basic_variables, vector_key, factorisation, vector)
+            assert np.allclose(values, np.linalg.solve(full_matrix[:, basic_variables], vector))
+    assert (cache.value_hits, cache.value_misses) == (2, 2)
+    assert vector_keys[0] != vector_keys[1]
+    assert vector_keys[0] == cache.get_vector_key(np.copy(vectors[0]))
+
+def test_problems_sharing_a_cache_reuse_its_values():
+    constraint_matrix, constraint_vector = get_problems()[5]
+    cache = FactorisationCache()
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector, factorisation_cache=cache)
+    problem.solve()
+    misses, value_misses = cache.misses, cache.value_misses
+    repeated_problem = QuadraticSimplex(constraint_matrix, constraint_vector, factorisation_cache=cache)
+    repeated_problem.solve()
+    assert (cache.misses, cache.value_misses) == (misses, value_misses)
+    assert cache.value_hits > 0
+    assert np.isclose(repeated_problem.profit, problem.profit)
+    scaled_problem = problem.copy_with_constraint_vector(1.01 * constraint_vector)
+    scaled_problem.solve()
+    assert scaled_problem.factorisation_cache is cache
+    assert cache.value_misses > value_misses
+    assert np.isclose(scaled_problem.profit, 1.01 * problem.profit)
+
+def test_linear_problems_look_up_their_values_in_the_cache():
+    matrix, b, c = get_random_linear_problems(7, 1)[0]
+    cache = FactorisationCache()
+    problem = LinearProblem(matrix, b, c, factorisation_cache=cache)
+    problem.solve()
+    misses, value_misses = cache.misses, cache.value_misses
+    repeated_problem = LinearProblem(matrix, b, c, factorisation_cache=cache)
+    repeated_problem.solve()
+    assert (cache.misses, cache.value_misses) == (misses, value_misses)
+    assert cache.value_hits > 0
+    assert np.isclose(repeated_problem.profit, problem.profit)
@@ -0,0 +1,43 @@
+import numpy as np
+from SimplexAlgorithm import LinearProblem
+from problems import get_random_linear_problems, solve_with_linprog
+
+def test_optimal_profit_matches_linprog():
+    for matrix, b, c in get_random_linear_problems(3, 40):
+        reference = solve_with_linprog(matrix, b, c)
+        problem = LinearProblem(matrix, b, c)
+        problem.solve()
+        if reference.status == 3:
+            assert problem.problem_status == "Unbounded"
+        else:
+            assert problem.problem_status == "Optimal"
+            assert np.isclose(problem.profit, -reference.fun)
+            point = problem.get_point()
+            assert np.all(matrix @ point <= b + 1e-7)
+            assert np.isclose(problem.compute_profit(point), problem.profit)
+
+def test_infeasible_starting_basis_is_repaired_with_dual_steps():
+    matrix = np.array([[-3, 1], [3, 5], [1, -3], [9, 8]])
+    b = np.array([3, 90, 2, 180])
+    c = np.array([0.05561337, 0.0407022])
+    problem = LinearProblem(matrix, b, c, np.array([1, 0, 4, 2]))
+    problem.solve()
+    assert problem.problem_status == "Optimal"
+    assert np.isclose(problem.profit, -solve_with_linprog(matrix, b, c).fun)
+
+def test_basis_position_maps_are_kept_across_pivots():
+    for matrix, b, c in get_random_linear_problems(4, 10):
+        problem = LinearProblem(matrix, b, c)
+        problem.solve()
+        assert np.array_equal(problem.B_positions[problem.B], np.arange(len(problem.B)))
+        assert np.array_equal(problem.N_positions[problem.N], np.arange(len(problem.N)))
+
+def test_copy_with_b_starts_from_the_given_basis():
+    matrix, b, c = get_random_linear_problems(5, 1)[0]
+    problem = LinearProblem(matrix, b, c)
+    problem.solve()
+    new_b = b * 1.2
+    new_problem = problem.copy_with_b(new_b, np.copy(problem.B))
+    new_problem.solve()
+    assert new_problem.problem_status == "Optimal"
+    assert np.isclose(new_problem.profit, -solve_with_linprog(matrix, new_b, c).fun)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from BatchSolve import QuadraticSimplex
+from problems import get_problems, get_vertex_maximum
+
+@pytest.fixture
+def lookahead(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_lookahead", True)
+
+def test_lookahead_profits_match_each_column(lookahead):
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.iterate()
+        for tableau in problem.tableaux:
+            candidates = np.flatnonzero(tableau.profit_row > 0.0001)
+            entering_variables = tableau.non_basic_variables[candidates]
+            pivot_columns = tableau.basis_factorisation.solve(tableau.get_tableau_columns(entering_variables))
+            lookahead_profits = tableau.get_lookahead_potential_profits(entering_variables, pivot_columns)
+            for candidate, lookahead_profit in zip(candidates, lookahead_profits):
+                tableau.pivot_column_index = candidate
+                tableau.set_pivot_column()
+                assert np.isclose(tableau.get_potential_profit(), lookahead_profit)
+
+def test_lookahead_column_is_not_replaced_by_the_dimension(lookahead):
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        for tableau in problem.tableaux:
+            tableau.choose_pivot_column_index()
+            if not tableau.reverses_last_pivot():
+                assert tableau.pivot_column_index == tableau.get_lookahead_pivot_column_index()
+
+def test_lookahead_reaches_the_largest_vertex(lookahead):
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        assert problem.solved_status == "Optimal"
+        assert np.isclose(problem.profit**2, get_vertex_maximum(constraint_matrix, constraint_vector))
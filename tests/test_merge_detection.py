@@ -0,0 +1,72 @@
+import numpy as np
+from types import SimpleNamespace
+from BatchSolve import QuadraticSimplex
+from problems import get_problems
+
+def get_lines(rng, count, space_dimensions):
+    "Random lines, some repeated exactly, some within the tolerance, and some with the same reference sum"
+    lines = []
+    for _ in range(count):
+        choice = rng.integers(4)
+        if choice == 0 or len(lines) == 0:
+            reference_vector = rng.random(space_dimensions)
+            direction_vector = rng.normal(size=space_dimensions)
+        else:
+            reference_vector, direction_vector = lines[rng.integers(len(lines))]
+            if choice == 2:
+                reference_vector = reference_vector + rng.normal(size=space_dimensions) * 0.00001
+                direction_vector = -2 * direction_vector
+            elif choice == 3:
+                reference_vector = reference_vector + np.array([0.5, -0.5] + [0] * (space_dimensions - 2))
+        lines.append((reference_vector, direction_vector))
+    return lines
+
+def get_pairwise_merged_indices(problem):
+    merged_indices = set()
+    for index_1, tableau_1 in enumerate(problem.tableaux):
+        for tableau_2 in problem.tableaux[index_1 + 1:]:
+            if problem.lines_of_movement_match(tableau_1, tableau_2):
+                merged_indices.add(index_1)
+    return merged_indices
+
+def test_merged_indices_match_a_pairwise_scan():
+    constraint_matrix, constraint_vector = get_problems()[5]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        problem.tableaux = [SimpleNamespace(line_reference_vector=reference_vector,
+                                            line_direction_vector=direction_vector)
+                            for reference_vector, direction_vector in get_lines(rng, 12, 3)]
+        assert problem.get_merged_indices() == get_pairwise_merged_indices(problem)
+
+def test_merging_keeps_the_last_of_each_matching_group():
+    constraint_matrix, constraint_vector = get_problems()[5]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    line = (np.array([0.1, 0.2, 0.3]), np.array([1.0, 0.0, -1.0]))
+    other_line = (np.array([0.3, 0.2, 0.1]), np.array([1.0, 0.0, -1.0]))
+    problem.tableaux = [SimpleNamespace(line_reference_vector=reference_vector,
+                                        line_direction_vector=direction_vector, name=name)
+                        for name, (reference_vector, direction_vector)
+                        in enumerate((line, other_line, line, line))]
+    problem.merge_any_converged_pairs()
+    assert [tableau.name for tableau in problem.tableaux] == [1, 3]
+
+def test_lines_through_one_point_are_not_all_compared(monkeypatch):
+    space_dimensions = 100
+    problem = QuadraticSimplex(np.ones((1, space_dimensions)), np.array([1.0]))
+    rng = np.random.default_rng(1)
+    reference_vector = rng.random(space_dimensions)
+    direction_vectors = list(np.eye(space_dimensions)) + [rng.normal(size=space_dimensions) for _ in range(20)]
+    direction_vectors += [-3 * direction_vectors[index] for index in (0, 50, 110)]
+    problem.tableaux = [SimpleNamespace(line_reference_vector=reference_vector,
+                                        line_direction_vector=direction_vector)
+                        for direction_vector in direction_vectors]
+    expected_indices = get_pairwise_merged_indices(problem)
+    comparisons = []
+    lines_of_movement_match = problem.lines_of_movement_match
+    def count_comparisons(tableau_1, tableau_2):
+        comparisons.append((tableau_1, tableau_2))
+        return lines_of_movement_match(tableau_1, tableau_2)
+    monkeypatch.setattr(problem, "lines_of_movement_match", count_comparisons)
+    assert problem.get_merged_indices() == expected_indices == {0, 50, 110}
+    assert len(comparisons) < 10 * len(problem.tableaux)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import scipy.sparse as sc_sparse
+from BatchSolve import QuadraticSimplex
+from Presolve import Presolve
+from problems import get_problems
+
+def get_problem_with_removable_rows():
+    "The first example with a zero row, a tighter and a looser multiple of row 0, and a redundant row"
+    constraint_matrix, constraint_vector = get_problems()[0]
+    extra_matrix = np.array([[0.0, 0.0], [6.0, 4.0], [3.0, 2.0], [1.0, 1.0]])
+    extra_vector = np.array([1.0, 100.0, 60.0, 100.0])
+    return (np.vstack((constraint_matrix, extra_matrix)),
+            np.concatenate((constraint_vector, extra_vector)))
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_presolve_removes_zero_duplicate_and_redundant_rows(sparse):
+    constraint_matrix, constraint_vector = get_problem_with_removable_rows()
+    if sparse:
+        constraint_matrix = sc_sparse.csr_matrix(constraint_matrix)
+    presolve = Presolve(constraint_matrix, constraint_vector)
+    assert list(presolve.zero_rows) == [4]
+    assert list(presolve.duplicate_rows) == [0, 6]
+    assert list(presolve.redundant_rows) == [7]
+    assert list(presolve.kept_rows) == [1, 2, 3, 5]
+    scaled_matrix = presolve.constraint_matrix.toarray() if sparse else presolve.constraint_matrix
+    assert np.allclose(np.max(abs(scaled_matrix), axis=1), 1)
+
+def test_presolved_solve_matches_the_original_problem(monkeypatch):
+    constraint_matrix, constraint_vector = get_problem_with_removable_rows()
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    monkeypatch.setattr(QuadraticSimplex, "option_presolve", True)
+    presolved_problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    presolved_problem.solve()
+    assert presolved_problem.slack_dimensions == 4
+    assert np.isclose(presolved_problem.profit, problem.profit)
+    position = presolved_problem.updating_tableau.get_vertex_position()
+    assert np.all(presolved_problem.presolve.get_original_slack_values(position) >= -1e-9)
+
+def test_original_bases_include_the_removed_slack_variables(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_presolve", True)
+    constraint_matrix, constraint_vector = get_problem_with_removable_rows()
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    full_tableau = np.hstack((constraint_matrix, np.eye(len(constraint_vector))))
+    position = problem.updating_tableau.get_vertex_position()
+    original_values = np.concatenate((position, constraint_vector - constraint_matrix @ position))
+    for basic_variables, non_basic_variables in problem.get_original_bases():
+        assert len(basic_variables) == len(constraint_vector)
+        assert len(np.union1d(basic_variables, non_basic_variables)) == full_tableau.shape[1]
+    basic_variables, non_basic_variables = problem.get_original_bases()[problem.updating_tableau.dimension]
+    assert np.allclose(original_values[non_basic_variables], 0)
+
+def test_presolve_rejects_infeasible_zero_rows():
+    with pytest.raises(Exception, match="negative bound"):
+        Presolve(np.array([[1.0, 1.0], [0.0, 0.0]]), np.array([1.0, -1.0]))
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from BatchSolve import QuadraticSimplex
+from SimplexAlgorithm import LinearProblem
+from PricingStrategy import DevexPricing, SteepestEdgePricing, get_pricing_strategy, pricing_strategies
+from problems import (get_problems, get_random_mixed_problems, get_vertex_maximum,
+                      get_random_linear_problems, solve_with_linprog)
+
+@pytest.mark.parametrize("name", list(pricing_strategies))
+def test_quadratic_simplex_reaches_the_largest_vertex(monkeypatch, name):
+    monkeypatch.setattr(QuadraticSimplex, "option_pricing", name)
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        assert problem.solved_status == "Optimal"
+        assert np.isclose(problem.profit**2, get_vertex_maximum(constraint_matrix, constraint_vector))
+
+@pytest.mark.parametrize("name", list(pricing_strategies))
+def test_linear_problem_matches_linprog(monkeypatch, name):
+    monkeypatch.setattr(LinearProblem, "option_pricing", name)
+    for matrix, b, c in get_random_linear_problems(3, 40):
+        reference = solve_with_linprog(matrix, b, c)
+        problem = LinearProblem(matrix, b, c)
+        problem.solve()
+        if reference.status == 0:
+            assert np.isclose(problem.profit, -reference.fun)
+        else:
+            assert problem.problem_status == "Unbounded"
+
+def test_steepest_edge_weights_match_recomputed_weights(monkeypatch):
+    monkeypatch.setattr(LinearProblem, "option_pricing", "SteepestEdge")
+    for matrix, b, c in get_random_linear_problems(3, 10):
+        problem = LinearProblem(matrix, b, c)
+        problem.solve()
+        weights = SteepestEdgePricing(problem, problem.bas_num, problem.non_num, track_dual=True)
+        assert np.allclose(problem.pricing_strategy.primal_weights, weights.primal_weights)
+        assert np.allclose(problem.pricing_strategy.dual_weights, weights.dual_weights)
+
+def test_devex_weights_are_reset_when_not_finite_and_positive():
+    matrix, b, c = get_random_linear_problems(3, 1)[0]
+    problem = LinearProblem(matrix, b, c)
+    pricing_strategy = DevexPricing(problem, problem.bas_num, problem.non_num, track_dual=True)
+    pricing_strategy.primal_weights[0] = np.nan
+    pricing_strategy.check_weights()
+    assert np.all(pricing_strategy.primal_weights == 1)
+    pricing_strategy.dual_weights[0] = 0
+    pricing_strategy.check_weights()
+    assert np.all(pricing_strategy.dual_weights == 1)
+
+def test_unknown_strategy_is_an_error():
+    matrix, b, c = get_random_linear_problems(3, 1)[0]
+    problem = LinearProblem(matrix, b, c)
+    with pytest.raises(Exception, match="Unknown pricing strategy"):
+        get_pricing_strategy("Largest", problem, problem.bas_num, problem.non_num)
+
+@pytest.mark.parametrize("name", list(pricing_strategies))
+def test_tableaux_only_undo_their_last_pivot_when_nothing_else_improves(monkeypatch, name):
+    def check_updating_tableau(problem):
+        tableau = problem.updating_tableau
+        entering_variable = tableau.non_basic_variables[tableau.pivot_column_index]
+        other_profits = np.delete(tableau.profit_row, tableau.pivot_column_index)
+        if np.any(other_profits > 0.0001) and not tableau.use_bland_rule():
+            assert entering_variable != tableau.last_exiting_variable
+    monkeypatch.setattr(QuadraticSimplex, "option_pricing", name)
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.set_iteration_hook(check_updating_tableau)
+        problem.solve()
+
+@pytest.mark.parametrize("name", list(pricing_strategies))
+def test_optimal_is_only_declared_when_no_column_improves(monkeypatch, name):
+    monkeypatch.setattr(QuadraticSimplex, "option_pricing", name)
+    monkeypatch.setattr(QuadraticSimplex, "option_max_iterations", 500)
+    for constraint_matrix, constraint_vector in get_random_mixed_problems(0, 40):
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        assert problem.solved_status == "Optimal"
+        assert np.all(problem.updating_tableau.profit_row <= 0.0001)
+        assert problem.incumbent_value <= get_vertex_maximum(constraint_matrix, constraint_vector) + 1e-7
+
+def test_returning_to_a_basis_switches_to_bland_rule():
+    constraint_matrix, constraint_vector = get_problems()[4]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    tableau = problem.tableaux[0]
+    tableau.get_potential_profit()
+    assert not tableau.pivot_revisits_basis()
+    tableau.pivot()
+    tableau.pivot_column_index = tableau.non_basic_variable_positions[tableau.last_exiting_variable]
+    tableau.pivot_row_index = tableau.basic_variable_positions[tableau.last_entering_variable]
+    tableau.set_pivot_column()
+    assert tableau.pivot_revisits_basis()
+    assert not tableau.use_bland_rule()
+    tableau.pivot()
+    assert tableau.use_bland_rule()
+    tableau.forget_last_pivot()
+    assert not tableau.use_bland_rule()
+
+def test_steepest_edge_dual_weights_are_the_row_norms_of_the_basis_inverse(monkeypatch):
+    monkeypatch.setattr(SteepestEdgePricing, "dual_weight_block_size", 2)
+    for matrix, b, c in get_random_linear_problems(3, 5):
+        problem = LinearProblem(matrix, b, c)
+        weights = SteepestEdgePricing(problem, problem.bas_num, problem.non_num, track_dual=True)
+        assert np.all(weights.dual_weights == 1)
+        problem.solve()
+        weights = SteepestEdgePricing(problem, problem.bas_num, problem.non_num, track_dual=True)
+        basis_inverse = np.linalg.inv(problem.A[:, problem.B])
+        assert np.allclose(weights.dual_weights, np.sum(basis_inverse**2, axis=1))
@@ -0,0 +1,34 @@
+import numpy as np
+from types import SimpleNamespace
+from BatchSolve import QuadraticSimplex
+from problems import get_problems
+
+def get_problem_with_positions(positions):
+    constraint_matrix, constraint_vector = get_problems()[5]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.tableaux = [SimpleNamespace(partial_position=np.asarray(position, dtype=float))
+                        for position in positions]
+    problem.compute_profit_vector()
+    return problem
+
+def get_profit_normal(problem):
+    return problem.profit_vector[:problem.space_dimensions]
+
+def test_profit_normal_passes_through_the_positions():
+    rng = np.random.default_rng(0)
+    positions = rng.random((3, 3))
+    problem = get_problem_with_positions(positions)
+    assert np.allclose(positions @ get_profit_normal(problem), 1)
+    assert np.all(problem.profit_vector[problem.space_dimensions:] == 0)
+
+def test_dependent_positions_give_the_minimum_norm_normal():
+    positions = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.5, 0.5, 0.0]]
+    problem = get_problem_with_positions(positions)
+    assert np.allclose(get_profit_normal(problem), np.linalg.pinv(positions) @ np.ones(3))
+    assert np.allclose(get_profit_normal(problem), [1.0, 1.0, 0.0])
+
+def test_repeated_positions_are_used_once():
+    positions = [[1.0, 0.0, 0.0], [0.0, 2.0, 0.0], [1.0, 0.0, 0.0 + 1e-9]]
+    problem = get_problem_with_positions(positions)
+    assert len(problem.get_positions_no_repeats()) == 2
+    assert np.allclose(get_profit_normal(problem), [1.0, 0.5, 0.0])
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+import scipy.sparse as sc_sparse
+from BatchSolve import QuadraticSimplex
+from RowGeneration import RowGeneration
+from problems import get_example_problems, is_feasible
+
+def get_padded_problem(constraint_matrix, constraint_vector, rng, padding_count=2000):
+    "The problem with many loose rows added and every row shuffled"
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    box = 3 * np.max(np.abs(problem.updating_tableau.get_vertex_position()))
+    padding_matrix = rng.random((padding_count, constraint_matrix.shape[1]))
+    padding_vector = padding_matrix.sum(axis=1) * box
+    order = rng.permutation(padding_count + len(constraint_vector))
+    padded_matrix = np.vstack((constraint_matrix, padding_matrix))[order]
+    padded_vector = np.concatenate((constraint_vector, padding_vector))[order]
+    return problem, padded_matrix, padded_vector
+
+@pytest.mark.parametrize("matrix_type", ["dense", "sparse", "memmap"])
+def test_row_generation_matches_the_full_problem(matrix_type, tmp_path):
+    rng = np.random.default_rng(0)
+    for constraint_matrix, constraint_vector in get_example_problems():
+        problem, padded_matrix, padded_vector = get_padded_problem(constraint_matrix, constraint_vector, rng)
+        matrix = padded_matrix
+        if matrix_type == "sparse":
+            matrix = sc_sparse.csr_matrix(padded_matrix)
+        elif matrix_type == "memmap":
+            np.save(tmp_path / "matrix.npy", padded_matrix)
+            matrix = np.load(tmp_path / "matrix.npy", mmap_mode="r")
+        row_generation = RowGeneration(matrix, padded_vector)
+        row_generation.scan_chunk_size = 500
+        row_generation.solve()
+        assert np.isclose(row_generation.problem.profit, problem.profit)
+        point = row_generation.problem.updating_tableau.get_vertex_position()
+        assert is_feasible(padded_matrix, padded_vector, point, 1e-6)
+        assert len(row_generation.working_rows) < 20
+
+def test_incremental_rounds_give_a_feasible_vertex(monkeypatch):
+    monkeypatch.setattr(RowGeneration, "option_incremental_rounds", True)
+    rng = np.random.default_rng(1)
+    for constraint_matrix, constraint_vector in get_example_problems():
+        problem, padded_matrix, padded_vector = get_padded_problem(constraint_matrix, constraint_vector, rng)
+        row_generation = RowGeneration(padded_matrix, padded_vector)
+        row_generation.solve()
+        point = row_generation.problem.updating_tableau.get_vertex_position()
+        assert is_feasible(padded_matrix, padded_vector, point, 1e-6)
+        assert row_generation.problem.profit <= problem.profit + 1e-9
+
+def test_unbounded_axes_are_an_error():
+    with pytest.raises(Exception, match="do not bound every axis"):
+        RowGeneration(np.array([[1.0, -1.0], [-1.0, 0.0]]), np.array([1.0, 1.0]))
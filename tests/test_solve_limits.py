@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+import scipy.sparse as sc_sparse
+from BatchSolve import QuadraticSimplex
+from SolveResult import SolveResult
+from problems import get_problems, get_random_problem, get_vertex_maximum, is_feasible
+
+def get_problem():
+    return get_random_problem(np.random.default_rng(0), 10, 3)
+
+def test_upper_bound_holds_for_every_problem():
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        sparse_problem = QuadraticSimplex(sc_sparse.csr_matrix(constraint_matrix), constraint_vector)
+        problem.solve()
+        assert np.isclose(sparse_problem.upper_bound, problem.upper_bound)
+        assert get_vertex_maximum(constraint_matrix, constraint_vector) <= problem.upper_bound + 1e-9
+        assert np.isclose(problem.incumbent_value, problem.profit**2)
+        assert 0 <= problem.get_gap() < 1
+
+def test_iteration_limit_keeps_the_best_vertex_found(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_max_iterations", 2)
+    constraint_matrix, constraint_vector = get_problem()
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    assert problem.solved_status == "IterationLimit"
+    assert problem.iteration_count == 2
+    assert is_feasible(constraint_matrix, constraint_vector, problem.incumbent_position)
+    assert np.isclose(problem.incumbent_value, np.sum(problem.incumbent_position**2))
+    assert problem.incumbent_value <= get_vertex_maximum(constraint_matrix, constraint_vector) + 1e-9
+
+def test_time_limit_stops_before_the_first_iteration(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_time_limit", 0.0)
+    constraint_matrix, constraint_vector = get_problem()
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    assert problem.solved_status == "TimeLimit"
+    assert problem.iteration_count == 0
+    assert problem.incumbent_value <= problem.upper_bound
+
+@pytest.mark.parametrize("target_gap", [0.9, 0.5])
+def test_target_gap_is_reached(monkeypatch, target_gap):
+    monkeypatch.setattr(QuadraticSimplex, "option_target_gap", target_gap)
+    constraint_matrix, constraint_vector = get_problem()
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    assert problem.solved_status == "GapReached"
+    assert problem.get_gap() <= target_gap
+    assert is_feasible(constraint_matrix, constraint_vector, problem.incumbent_position)
+
+def test_perturbed_incumbent_satisfies_the_original_bounds(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_perturbation", True)
+    monkeypatch.setattr(QuadraticSimplex, "option_max_iterations", 3)
+    constraint_matrix, constraint_vector = get_problem()
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    assert problem.solved_status == "IterationLimit"
+    assert problem.unperturbed_constraint_vector is not None
+    assert is_feasible(constraint_matrix, constraint_vector, problem.incumbent_position)
+
+def test_free_variables_have_no_upper_bound():
+    problem = QuadraticSimplex(np.array([[-1.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]]),
+                               np.array([3.0, 2.0, 4.0, 3.0]), free_variables=[0])
+    problem.solve()
+    assert problem.upper_bound == np.inf
+    assert problem.get_gap() == np.inf
+    assert np.isclose(problem.incumbent_value, 18)
+
+def test_results_report_the_incumbent_and_bound(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_max_iterations", 1)
+    constraint_matrix, constraint_vector = get_problem()
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    result = SolveResult.from_problem(0, problem)
+    assert result.solved_status == "IterationLimit"
+    assert np.array_equal(result.incumbent_position, problem.incumbent_position)
+    assert result.incumbent_value == problem.incumbent_value
+    assert result.upper_bound == problem.upper_bound
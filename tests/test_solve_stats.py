@@ -0,0 +1,67 @@
+import numpy as np
+from BatchSolve import QuadraticSimplex
+from SolveResult import SolveResult
+from SolveStats import SolveStats
+from problems import get_problems
+
+def test_counts_are_read_from_the_solve_stats():
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        iteration_counts = []
+        problem.set_iteration_hook(lambda problem: iteration_counts.append(problem.iteration_count))
+        problem.solve()
+        stats = problem.solve_stats
+        assert iteration_counts == list(range(1, stats.iteration_count + 1))
+        assert problem.iteration_count == stats.iteration_count
+        assert problem.degenerate_pivot_count == stats.degenerate_pivot_count
+        assert stats.iteration_count <= stats.pivot_count
+        assert stats.solve_time > 0
+
+def test_phases_are_only_timed_when_profiling(monkeypatch):
+    constraint_matrix, constraint_vector = get_problems()[5]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    assert sum(problem.solve_stats.phase_counts.values()) == 0
+    assert problem.solve_stats.get_profiled_time() == 0
+    monkeypatch.setattr(QuadraticSimplex, "option_profiling", True)
+    profiled_problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    profiled_problem.solve()
+    stats = profiled_problem.solve_stats
+    for phase in ("lines_of_movement", "merge_detection", "potential_profit", "pivot", "pricing"):
+        assert stats.phase_counts[phase] >= stats.iteration_count
+    assert stats.phase_counts["factorisation"] > 0
+    assert stats.phase_times["factorisation"] <= stats.get_profiled_time() <= stats.solve_time
+    assert profiled_problem.iteration_count == problem.iteration_count
+
+def test_counts_are_kept_for_each_solve():
+    constraint_matrix, constraint_vector = get_problems()[0]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    iteration_count = problem.iteration_count
+    problem.solve()
+    assert problem.iteration_count == iteration_count
+    new_problem = problem.copy_with_constraint_vector(1.5 * constraint_vector)
+    assert new_problem.solve_stats is not problem.solve_stats
+    assert new_problem.iteration_count == 0
+
+def test_string_lists_the_phases_only_when_timed():
+    stats = SolveStats()
+    stats.iteration_count = 3
+    stats.record_pivot(True)
+    stats.record_pivot(False)
+    assert "Pivots: 2 (1 degenerate)" in str(stats)
+    assert "pivot:" not in str(stats)
+    stats.record_phase("pivot", 0.5)
+    stats.record_phase("factorisation", 0.25)
+    assert "pivot: 0.500000s in 1 calls" in str(stats)
+    assert "factorisation: 0.250000s in 1 calls" in str(stats)
+    assert stats.get_profiled_time() == 0.5
+
+def test_results_carry_the_solve_stats():
+    constraint_matrix, constraint_vector = get_problems()[1]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    result = SolveResult.from_problem(0, problem)
+    assert result.solve_stats is problem.solve_stats
+    assert result.iteration_count == problem.solve_stats.iteration_count
+    assert np.isclose(result.profit, problem.profit)
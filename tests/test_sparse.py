@@ -0,0 +1,39 @@
+import numpy as np
+import scipy.sparse as sc_sparse
+from BatchSolve import QuadraticSimplex
+from SimplexAlgorithm import LinearProblem
+from problems import get_problems
+
+def test_sparse_quadratic_simplex_matches_dense():
+    for constraint_matrix, constraint_vector in get_problems():
+        dense_problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        dense_problem.solve()
+        for sparse_format in (sc_sparse.csr_matrix, sc_sparse.csc_matrix):
+            sparse_problem = QuadraticSimplex(sparse_format(constraint_matrix), constraint_vector)
+            sparse_problem.solve()
+            assert sparse_problem.solved_status == dense_problem.solved_status
+            assert np.isclose(sparse_problem.profit, dense_problem.profit)
+            assert sparse_problem.iteration_count == dense_problem.iteration_count
+
+def test_sparse_matrix_is_not_densified():
+    constraint_matrix, constraint_vector = get_problems()[0]
+    problem = QuadraticSimplex(sc_sparse.csr_matrix(constraint_matrix), constraint_vector)
+    assert sc_sparse.issparse(problem.constraint_matrix)
+    problem.solve()
+    for tableau in problem.tableaux:
+        assert sc_sparse.issparse(tableau.constraint_matrix)
+
+def test_sparse_linear_problem_matches_dense():
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        constraint_matrix = rng.random((8, 4)) * (rng.random((8, 4)) < 0.6)
+        constraint_vector = rng.random(8) + 0.5
+        objective_vector = rng.random(4)
+        dense_problem = LinearProblem(constraint_matrix, constraint_vector, objective_vector)
+        dense_problem.solve()
+        sparse_problem = LinearProblem(sc_sparse.csc_matrix(constraint_matrix),
+                                       constraint_vector, objective_vector)
+        sparse_problem.solve()
+        assert sparse_problem.problem_status == dense_problem.problem_status
+        assert np.isclose(sparse_problem.profit, dense_problem.profit)
+        assert np.allclose(sparse_problem.get_point(), dense_problem.get_point())
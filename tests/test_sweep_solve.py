@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+import scipy.sparse as sc_sparse
+from BatchSolve import QuadraticSimplex
+from SweepSolve import SweepSolve, LinearSweepSolve
+from problems import get_problems, solve_with_linprog
+
+def get_constraint_vectors(constraint_vector, count, seed=0):
+    rng = np.random.default_rng(seed)
+    return constraint_vector * (1 + 0.05 * rng.standard_normal((count, len(constraint_vector))))
+
+def test_sweep_results_match_direct_solves():
+    constraint_matrix, constraint_vector = get_problems()[0]
+    constraint_vectors = get_constraint_vectors(constraint_vector, 40)
+    sweep = SweepSolve(constraint_matrix, constraint_vectors, worker_count=2)
+    sweep.solve()
+    for index in range(0, 40, 7):
+        problem = QuadraticSimplex(constraint_matrix, constraint_vectors[index])
+        problem.solve()
+        assert sweep.solved_statuses[index] == problem.solved_status
+        assert np.isclose(sweep.profits[index], problem.profit)
+        assert np.allclose(sweep.points[index], problem.updating_tableau.get_vertex_position())
+    assert np.all(sweep.errors == None)
+
+@pytest.mark.parametrize("options, solved_status", [({"option_max_iterations": 0}, "IterationLimit"),
+                                                    ({"option_time_limit": 0.0}, "TimeLimit")])
+def test_scenarios_stopped_before_iterating_give_the_incumbent(options, solved_status):
+    constraint_matrix, constraint_vector = get_problems()[0]
+    sweep = SweepSolve(constraint_matrix, get_constraint_vectors(constraint_vector, 3),
+                       options=options, worker_count=2)
+    sweep.solve()
+    assert np.all(sweep.solved_statuses == solved_status)
+    assert np.all(sweep.points == 0)
+    assert np.all(sweep.errors == None)
+
+def test_failed_scenarios_are_recorded():
+    constraint_matrix, constraint_vector = get_problems()[0]
+    sweep = SweepSolve(constraint_matrix, [constraint_vector], worker_count=1,
+                       options={"option_pricing": "Largest"})
+    sweep.solve()
+    assert sweep.solved_statuses[0] == "Failed"
+    assert np.isnan(sweep.profits[0])
+    assert "Unknown pricing strategy" in sweep.errors[0]
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_linear_sweep_matches_linprog(sparse):
+    rng = np.random.default_rng(0)
+    matrix = rng.random((30, 8))
+    objective_vector = rng.random(8) - 0.2
+    constraint_vectors = (rng.random(30) + 1) * (1 + 0.1 * rng.standard_normal((50, 30)))
+    if sparse:
+        matrix = sc_sparse.csr_matrix(matrix)
+    sweep = LinearSweepSolve(matrix, objective_vector, constraint_vectors, worker_count=2)
+    sweep.solve()
+    dense_matrix = matrix.toarray() if sparse else matrix
+    reference_profits = [-solve_with_linprog(dense_matrix, b, objective_vector).fun
+                         for b in constraint_vectors]
+    assert np.all(sweep.solved_statuses == "Optimal")
+    assert np.allclose(sweep.profits, reference_profits)
@@ -0,0 +1,120 @@
+import numpy as np
+import scipy.sparse as sc_sparse
+from BatchSolve import QuadraticSimplex
+from problems import get_problems
+
+def get_solved_problems(sparse=False):
+    problems = []
+    for constraint_matrix, constraint_vector in get_problems():
+        if sparse:
+            constraint_matrix = sc_sparse.csr_matrix(constraint_matrix)
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        problems.append(problem)
+    return problems
+
+def get_full_tableau(problem):
+    "[A | I] with the slack columns built explicitly"
+    constraint_matrix = problem.get_dense_constraint_matrix()
+    return np.hstack((constraint_matrix, np.eye(len(constraint_matrix))))
+
+def test_tableau_columns_include_the_implicit_slack_columns():
+    for sparse in (False, True):
+        for problem in get_solved_problems(sparse):
+            full_tableau = get_full_tableau(problem)
+            for tableau in problem.tableaux:
+                variables = np.arange(problem.total_dimensions)
+                assert np.allclose(tableau.get_tableau_columns(variables), full_tableau)
+                assert np.allclose(tableau.get_tableau_column(variables[-1]), full_tableau[:, -1])
+
+def test_profit_row_matches_the_full_tableau():
+    for problem in get_solved_problems():
+        full_tableau = get_full_tableau(problem)
+        for tableau in problem.tableaux:
+            basis_matrix = full_tableau[:, tableau.basic_variables]
+            dual_prices = np.linalg.solve(basis_matrix.T, tableau.c_basic)
+            profit_row = (tableau.c_non_basic
+                          - full_tableau[:, tableau.non_basic_variables].T @ dual_prices)
+            assert np.allclose(tableau.profit_row, profit_row)
+
+def test_constraint_matrix_is_shared_with_the_tableaux():
+    for problem in get_solved_problems():
+        for tableau in problem.tableaux:
+            assert tableau.constraint_matrix is problem.constraint_matrix
+
+def test_tableaux_of_each_dimension_do_not_share_basis_state():
+    constraint_matrix, constraint_vector = get_problems()[4]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    first_tableau, second_tableau = problem.tableaux[:2]
+    assert first_tableau.space_constraints is second_tableau.space_constraints
+    basic_variables = np.copy(second_tableau.basic_variables)
+    values = np.copy(second_tableau.values)
+    eta_count = len(second_tableau.basis_factorisation.eta_indices)
+    first_tableau.get_potential_profit()
+    first_tableau.pivot()
+    assert not np.array_equal(first_tableau.basic_variables, basic_variables)
+    assert np.array_equal(second_tableau.basic_variables, basic_variables)
+    assert np.array_equal(second_tableau.values, values)
+    assert len(second_tableau.basis_factorisation.eta_indices) == eta_count
+
+def test_line_directions_keep_the_other_constraints_active():
+    for problem in get_solved_problems():
+        for tableau in problem.tableaux:
+            tableau.set_line_of_movement()
+            direction_vector = tableau.line_direction_vector
+            active_constraints = problem.space_constraints[tableau.get_constraint_indices()]
+            assert np.allclose(active_constraints @ direction_vector, 0)
+            entering_variable = tableau.non_basic_variables[tableau.pivot_column_index]
+            entering_constraint = problem.space_constraints[entering_variable]
+            expected_change = 1 if entering_variable < problem.space_dimensions else -1
+            assert np.isclose(entering_constraint @ direction_vector, expected_change)
+
+def test_line_directions_match_the_null_space():
+    for problem in get_solved_problems():
+        for tableau in problem.tableaux:
+            tableau.set_line_of_movement()
+            direction_vector = tableau.line_direction_vector
+            tableau.set_line_direction_vector_null_space()
+            null_space_vector = tableau.line_direction_vector
+            cosine = (np.dot(direction_vector, null_space_vector)
+                      / np.linalg.norm(direction_vector) / np.linalg.norm(null_space_vector))
+            assert np.isclose(abs(cosine), 1)
+
+def check_variable_positions(tableau):
+    basic_positions = tableau.basic_variable_positions
+    non_basic_positions = tableau.non_basic_variable_positions
+    assert np.array_equal(basic_positions[tableau.basic_variables],
+                          np.arange(len(tableau.basic_variables)))
+    assert np.array_equal(non_basic_positions[tableau.non_basic_variables],
+                          np.arange(len(tableau.non_basic_variables)))
+    assert np.all(basic_positions[tableau.non_basic_variables] == -1)
+    assert np.all(non_basic_positions[tableau.basic_variables] == -1)
+
+def test_variable_positions_are_kept_across_pivots():
+    for problem in get_solved_problems():
+        for tableau in problem.tableaux:
+            check_variable_positions(tableau)
+
+def test_variable_positions_are_kept_when_constraints_change():
+    constraint_matrix, constraint_vector = get_problems()[5]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    problem.add_constraints(np.ones((1, 3)) / np.sqrt(3), np.array([0.8]))
+    problem.solve()
+    for tableau in problem.tableaux:
+        check_variable_positions(tableau)
+    problem.remove_constraints([0, 3])
+    problem.solve()
+    for tableau in problem.tableaux:
+        check_variable_positions(tableau)
+
+def test_lines_that_miss_the_hypersphere_stay_at_the_vertex():
+    for problem in get_solved_problems():
+        problem.profit = 0
+        for tableau in problem.tableaux:
+            tableau.set_line_of_movement()
+            tableau.find_hypersphere_intersection()
+            reference_vector = tableau.line_reference_vector
+            direction_vector = tableau.line_direction_vector
+            if abs(np.dot(reference_vector, direction_vector)) < np.linalg.norm(reference_vector) * np.linalg.norm(direction_vector) - 1e-9:
+                assert np.array_equal(tableau.partial_position, tableau.get_vertex_position())
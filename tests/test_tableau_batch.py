@@ -0,0 +1,63 @@
+import numpy as np
+from BasisFactorisation import BasisFactorisation
+from BatchSolve import QuadraticSimplex
+from TableauBatch import TableauBatch
+from problems import get_problems
+
+def get_partly_solved_problems(iteration_count):
+    problems = []
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        for _ in range(iteration_count):
+            if problem.solved_status == "Unsolved":
+                problem.iterate()
+        problems.append(problem)
+    return problems
+
+def test_batched_potential_profits_match_each_tableau():
+    for iteration_count in (0, 2):
+        for problem in get_partly_solved_problems(iteration_count):
+            batch_profits = TableauBatch(problem, problem.tableaux).get_potential_profits()
+            batch_pivot_rows = [tableau.pivot_row_index for tableau in problem.tableaux]
+            profits = [tableau.get_potential_profit() for tableau in problem.tableaux]
+            pivot_rows = [tableau.pivot_row_index for tableau in problem.tableaux]
+            assert np.allclose(batch_profits, profits)
+            assert batch_pivot_rows == pivot_rows
+
+def test_batched_profit_rows_match_each_tableau():
+    for problem in get_partly_solved_problems(2):
+        problem.set_profit_vector(np.arange(1, problem.space_dimensions + 1))
+        TableauBatch(problem, problem.tableaux).set_profit_rows()
+        batch_profit_rows = [np.copy(tableau.profit_row) for tableau in problem.tableaux]
+        for tableau, batch_profit_row in zip(problem.tableaux, batch_profit_rows):
+            problem.update_pivot_column(tableau)
+            assert np.allclose(tableau.profit_row, batch_profit_row)
+
+def test_batched_solve_matches_unbatched_solve(monkeypatch):
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        monkeypatch.setattr(QuadraticSimplex, "option_batched_evaluation", True)
+        batched_problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        batched_problem.solve()
+        monkeypatch.undo()
+        assert batched_problem.solved_status == problem.solved_status
+        assert np.isclose(batched_problem.profit, problem.profit)
+        assert batched_problem.iteration_count == problem.iteration_count
+
+def test_profit_rows_are_solved_once_for_each_basis(monkeypatch):
+    solved_vectors = []
+    solve_transpose = BasisFactorisation.solve_transpose
+    def record_solve_transpose(factorisation, vector):
+        solved_vectors.append(vector)
+        return solve_transpose(factorisation, vector)
+    monkeypatch.setattr(BasisFactorisation, "solve_transpose", record_solve_transpose)
+    for iteration_count in (0, 2):
+        for problem in get_partly_solved_problems(iteration_count):
+            solved_vectors.clear()
+            problem.set_profit_vector(np.arange(1, problem.space_dimensions + 1))
+            TableauBatch(problem, problem.tableaux).set_profit_rows()
+            basis_sets = {np.sort(tableau.basic_variables).tobytes() for tableau in problem.tableaux}
+            assert len(solved_vectors) == len(basis_sets)
+            if iteration_count == 0:
+                assert len(solved_vectors) == 1
@@ -0,0 +1,87 @@
+import numpy as np
+from BatchSolve import QuadraticSimplex
+from SimplexAlgorithm import LinearProblem
+from TraceRecorder import TraceRecorder
+from problems import get_problems, get_random_linear_problems
+
+def test_records_wrap_around_and_keep_the_latest():
+    trace = TraceRecorder(capacity=5)
+    for iteration in range(12):
+        trace.record(iteration=iteration, position=np.full(2, float(iteration)))
+    records = trace.get_records()
+    assert trace.record_count == 12
+    assert list(records["iteration"]) == [7, 8, 9, 10, 11]
+    assert np.array_equal(records["position"][:, 0], np.arange(7, 12))
+
+def test_buffers_grow_until_they_reach_the_capacity():
+    trace = TraceRecorder(capacity=40)
+    trace.record(iteration=0)
+    assert trace.buffer_size == trace.initial_size
+    for iteration in range(1, 60):
+        trace.record(iteration=iteration)
+        if iteration == trace.initial_size:
+            assert trace.buffer_size == 2 * trace.initial_size
+    assert trace.buffer_size == 40
+    assert list(trace.get_records()["iteration"]) == list(range(20, 60))
+
+def test_records_are_saved_with_one_array_per_field(tmp_path):
+    trace = TraceRecorder()
+    assert trace.get_records() == {}
+    for iteration in range(3):
+        trace.record(iteration=iteration, profit=0.5 * iteration)
+    trace.save(tmp_path / "trace.npz")
+    saved = np.load(tmp_path / "trace.npz")
+    assert sorted(saved.files) == ["iteration", "profit"]
+    assert np.array_equal(saved["profit"], [0, 0.5, 1])
+
+def test_solves_trace_nothing_and_print_nothing_by_default(capsys):
+    constraint_matrix, constraint_vector = get_problems()[0]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    assert problem.trace is None
+    assert capsys.readouterr().out == ""
+
+def test_each_iteration_is_traced(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_trace", True)
+    constraint_matrix, constraint_vector = get_problems()[5]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    records = problem.trace.get_records()
+    assert list(records["iteration"]) == list(range(1, problem.iteration_count + 1))
+    assert records["basic_variables"].shape == (problem.iteration_count, 3, len(constraint_vector))
+    assert records["partial_positions"].shape == (problem.iteration_count, 3, 3)
+    assert np.isclose(records["profit"][-1], problem.profit)
+    merged_rows = records["basic_variables"][-1, :, 0] == -1
+    assert np.all(np.isnan(records["partial_positions"][-1][merged_rows]))
+
+def test_tableaux_without_a_partial_position_are_traced_as_nan(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_trace", True)
+    problem = QuadraticSimplex(np.array([[1.0, -1.0], [-1.0, 2.0], [1.0, 1.0]]), np.array([0.0, 0.0, 4.0]))
+    problem.solve()
+    records = problem.trace.get_records()
+    assert problem.solved_status == "Optimal"
+    assert len(records["iteration"]) == problem.iteration_count
+    assert np.any(np.isnan(records["partial_positions"]))
+
+def test_trace_restarts_when_the_constraints_change(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_trace", True)
+    constraint_matrix, constraint_vector = get_problems()[0]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    trace = problem.trace
+    assert trace.record_count > 0
+    problem.add_constraints(np.array([[1.0, 0.0]]), np.array([10.0]))
+    assert problem.trace is not trace
+    assert problem.trace.record_count == 0
+
+def test_linear_problem_pivots_are_traced(monkeypatch, capsys):
+    monkeypatch.setattr(LinearProblem, "option_trace", True)
+    matrix, b, c = get_random_linear_problems(3, 1)[0]
+    problem = LinearProblem(matrix, b, c)
+    problem.solve()
+    records = problem.trace.get_records()
+    assert capsys.readouterr().out == ""
+    assert len(records["iteration"]) == problem.trace.record_count
+    assert np.isclose(records["profit"][-1], problem.profit)
+    assert np.array_equal(records["basic_variables"][-1], problem.B)
+    assert np.all(records["entering_variable"] != records["exiting_variable"])
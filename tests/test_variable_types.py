@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+import scipy.sparse as sc_sparse
+from BatchSolve import QuadraticSimplex
+from problems import get_vertices, get_vertex_maximum, is_feasible
+
+def get_problems_with_variable_types():
+    "Problems with their equality rows and free variables"
+    return [(np.array([[1.0, -1.0], [3.0, 2.0], [6.0, 5.0]]), np.array([0.0, 55.0, 120.0]), [0], []),
+            (np.array([[-1.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]]), np.array([3.0, 2.0, 4.0, 3.0]), [], [0]),
+            (np.array([[1.0, -1.0, 0.0], [3.0, 2.0, 1.0], [6.0, 5.0, 2.0], [0.0, -1.0, 1.0], [0.0, 0.0, -1.0]]),
+             np.array([0.0, 55.0, 120.0, 4.0, 5.0]), [0], [2])]
+
+def get_random_problems_with_variable_types(seed, count):
+    """
+    Random rows with up to one equality row and one free variable. Every
+    variable has an upper bound, and free variables also have a lower bound
+    """
+    rng = np.random.default_rng(seed)
+    problems = []
+    for _ in range(count):
+        space_dimensions, constraint_count = int(rng.integers(2, 5)), int(rng.integers(2, 6))
+        constraint_matrix = rng.normal(size=(constraint_count, space_dimensions))
+        constraint_vector = rng.random(constraint_count) + 0.5
+        equality_rows = sorted(rng.choice(constraint_count, size=int(rng.integers(0, 2)), replace=False))
+        constraint_vector[equality_rows] = 0
+        free_variables = sorted(rng.choice(space_dimensions, size=int(rng.integers(0, 2)), replace=False))
+        bound_rows, bounds = [], []
+        for variable in range(space_dimensions):
+            bound_rows.append(np.eye(space_dimensions)[variable])
+            bounds.append(rng.random() * 3 + 1)
+            if variable in free_variables:
+                bound_rows.append(-np.eye(space_dimensions)[variable])
+                bounds.append(rng.random() * 3 + 1)
+        problems.append((np.vstack((constraint_matrix, bound_rows)), np.concatenate((constraint_vector, bounds)),
+                         equality_rows, free_variables))
+    return problems
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_variable_types_match_brute_force(sparse):
+    for constraint_matrix, constraint_vector, equality_rows, free_variables in get_problems_with_variable_types():
+        matrix = sc_sparse.csr_matrix(constraint_matrix) if sparse else constraint_matrix
+        problem = QuadraticSimplex(matrix, constraint_vector,
+                                   equality_rows=equality_rows, free_variables=free_variables)
+        problem.solve()
+        assert problem.solved_status == "Optimal"
+        assert np.isclose(problem.profit**2, get_vertex_maximum(constraint_matrix, constraint_vector,
+                                                                equality_rows, free_variables))
+
+@pytest.mark.parametrize("pricing", ["Dantzig", "Devex", "SteepestEdge"])
+def test_free_variables_with_each_pricing_strategy(monkeypatch, pricing):
+    monkeypatch.setattr(QuadraticSimplex, "option_pricing", pricing)
+    constraint_matrix, constraint_vector, equality_rows, free_variables = get_problems_with_variable_types()[1]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector, free_variables=free_variables)
+    problem.solve()
+    assert np.isclose(problem.profit**2, 18)
+    assert np.allclose(problem.updating_tableau.get_vertex_position(), [-3, 3])
+
+def test_fixed_variables_stay_non_basic_and_free_variables_stay_basic():
+    for constraint_matrix, constraint_vector, equality_rows, free_variables in get_problems_with_variable_types():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector,
+                                   equality_rows=equality_rows, free_variables=free_variables)
+        problem.solve()
+        fixed_variables = np.array(equality_rows, dtype=int) + problem.space_dimensions
+        for tableau in problem.tableaux:
+            assert len(tableau.basic_variables) == len(constraint_vector)
+            assert not np.any(np.isin(fixed_variables, tableau.basic_variables))
+            assert np.all(np.isin(free_variables, tableau.basic_variables))
+
+def test_random_solves_stay_on_the_vertices_found_by_brute_force():
+    def check_tableaux(problem):
+        for tableau in problem.tableaux:
+            assert not np.any(tableau.fixed_variable_filter[tableau.basic_variables])
+            assert np.all(tableau.get_bounded_values() >= -1e-7)
+    for problem_data in get_random_problems_with_variable_types(3, 60):
+        constraint_matrix, constraint_vector, equality_rows, free_variables = problem_data
+        vertices = get_vertices(*problem_data)
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector,
+                                   equality_rows=equality_rows, free_variables=free_variables)
+        problem.set_iteration_hook(check_tableaux)
+        problem.solve()
+        assert problem.solved_status == "Optimal"
+        check_tableaux(problem)
+        for position in (problem.updating_tableau.get_vertex_position(), problem.incumbent_position):
+            if np.any(position != 0):
+                assert np.min(np.linalg.norm(vertices - position, axis=1)) < 1e-6
+        assert problem.incumbent_value <= np.max(np.sum(vertices**2, axis=1)) + 1e-7
+
+def test_equality_rows_hold_at_the_solution():
+    constraint_matrix, constraint_vector, equality_rows, free_variables = get_problems_with_variable_types()[2]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector,
+                               equality_rows=equality_rows, free_variables=free_variables)
+    problem.solve()
+    position = problem.updating_tableau.get_vertex_position()
+    assert np.allclose(constraint_matrix[equality_rows] @ position, constraint_vector[equality_rows])
+    assert np.all(constraint_matrix @ position <= constraint_vector + 1e-7)
+    assert position[2] < 0
+
+def test_constraint_changes_renumber_the_equality_rows():
+    constraint_matrix, constraint_vector, equality_rows, free_variables = get_problems_with_variable_types()[0]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector, equality_rows=equality_rows)
+    problem.solve()
+    problem.add_constraints(np.array([[1.0, 0.0]]), np.array([5.0]))
+    problem.solve()
+    assert list(problem.equality_rows) == [0]
+    assert np.isclose(problem.profit**2, 50)
+    assert is_feasible(constraint_matrix, constraint_vector, problem.updating_tableau.get_vertex_position())
+    problem.remove_constraints([0])
+    problem.solve()
+    assert len(problem.equality_rows) == 0
+    assert np.isclose(problem.profit**2, 576)
+
+def test_variable_types_are_checked(monkeypatch):
+    constraint_matrix, constraint_vector, equality_rows, free_variables = get_problems_with_variable_types()[0]
+    with pytest.raises(Exception, match="zero bound"):
+        QuadraticSimplex(constraint_matrix, constraint_vector, equality_rows=[1])
+    monkeypatch.setattr(QuadraticSimplex, "option_presolve", True)
+    with pytest.raises(Exception, match="Presolve only supports"):
+        QuadraticSimplex(constraint_matrix, constraint_vector, equality_rows=equality_rows)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from BatchSolve import QuadraticSimplex
+from WarmStart import WarmStart
+from problems import get_problems, get_vertices
+
+def test_warm_start_from_a_solved_problem_needs_no_iterations():
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        warm_problem = QuadraticSimplex(constraint_matrix, constraint_vector,
+                                        warm_start=problem.get_warm_start())
+        warm_problem.solve()
+        assert warm_problem.solved_status == "Optimal"
+        assert np.isclose(warm_problem.profit, problem.profit)
+        assert warm_problem.iteration_count <= 1
+
+def has_one_largest_vertex(constraint_matrix, constraint_vector):
+    "A warm start stays at a vertex that is still a local maximum, which a tie can make it"
+    vertex_values = np.sort(np.sum(get_vertices(constraint_matrix, constraint_vector)**2, axis=1))
+    return vertex_values[-2] < 0.999 * vertex_values[-1]
+
+def test_warm_start_with_a_changed_constraint_vector_matches_a_cold_start():
+    rng = np.random.default_rng(0)
+    for constraint_matrix, constraint_vector in get_problems():
+        if not has_one_largest_vertex(constraint_matrix, constraint_vector):
+            continue
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        new_constraint_vector = constraint_vector * (1 + 0.02 * rng.standard_normal(len(constraint_vector)))
+        warm_problem = problem.copy_with_constraint_vector(new_constraint_vector, problem.get_warm_start())
+        warm_problem.solve()
+        cold_problem = QuadraticSimplex(constraint_matrix, new_constraint_vector)
+        cold_problem.solve()
+        assert warm_problem.solved_status == "Optimal"
+        assert np.isclose(warm_problem.profit, cold_problem.profit)
+
+def test_warm_start_before_solving_uses_the_vertex_positions():
+    constraint_matrix, constraint_vector = get_problems()[5]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    warm_start = WarmStart.from_problem(problem)
+    assert np.array_equal(warm_start.partial_positions, warm_start.vertex_positions)
+    assert warm_start.solved_status == "Unsolved"
+
+def test_warm_start_for_other_dimensions_is_an_error():
+    constraint_matrix, constraint_vector = get_problems()[0]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    problem.solve()
+    other_matrix, other_vector = get_problems()[2]
+    with pytest.raises(Exception, match="Warm start is for"):
+        QuadraticSimplex(other_matrix, other_vector, warm_start=problem.get_warm_start())
@@ -0,0 +1,54 @@
+import pickle
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from BatchSolve import QuadraticSimplex
+from FactorisationCache import FactorisationCache
+from problems import get_problems
+
+def test_threaded_solves_match_sequential_solves(monkeypatch):
+    for constraint_matrix, constraint_vector in get_problems():
+        problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        problem.solve()
+        monkeypatch.setattr(QuadraticSimplex, "option_worker_count", 2)
+        threaded_problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+        threaded_problem.solve()
+        monkeypatch.undo()
+        assert threaded_problem.solved_status == problem.solved_status
+        assert np.isclose(threaded_problem.profit, problem.profit)
+        assert threaded_problem.iteration_count == problem.iteration_count
+
+def test_thread_pool_only_exists_during_solve(monkeypatch):
+    monkeypatch.setattr(QuadraticSimplex, "option_worker_count", 2)
+    constraint_matrix, constraint_vector = get_problems()[5]
+    problem = QuadraticSimplex(constraint_matrix, constraint_vector)
+    executors = []
+    problem.set_iteration_hook(lambda problem: executors.append(problem.executor))
+    problem.solve()
+    assert all(executor is not None for executor in executors)
+    assert problem.executor is None
+    problem.add_constraints(np.ones((1, 3)) / np.sqrt(3), np.array([0.8]))
+    assert problem.executor is None
+    problem.solve()
+    assert problem.executor is None
+
+def test_shared_cache_counts_and_bounds_are_kept_across_threads():
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(6, 6)) + 6 * np.eye(6)
+    cache = FactorisationCache(maximum_size=5)
+    bases = [np.sort(rng.choice(12, size=6, replace=False)) for _ in range(20)]
+    def get_basis_matrix(variables):
+        return np.hstack((matrix, np.eye(6)))[:, variables]
+    def look_up(basis):
+        return cache.get_factorisation(basis, get_basis_matrix)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(look_up, bases * 50))
+    assert cache.hits + cache.misses == len(bases) * 50
+    assert len(cache.factorisations) <= cache.maximum_size
+
+def test_pickled_cache_keeps_its_contents_and_gets_a_lock():
+    cache = FactorisationCache()
+    cache.get_factorisation(np.array([0, 1]), lambda variables: np.eye(2))
+    cache_copy = pickle.loads(pickle.dumps(cache))
+    assert cache_copy.contains(np.array([1, 0]))
+    assert cache_copy.lock is not cache.lock
+    assert cache_copy.misses == 1